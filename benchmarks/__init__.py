@@ -0,0 +1,33 @@
+"""Benchmarks for Subjunctive's hot paths
+
+Each module can be run on its own, for example:
+
+    $ python -m benchmarks.move
+
+Set SDL_VIDEODRIVER=dummy to run them on a machine without a display.
+The whole suite is run, and its results saved or compared with earlier
+ones, by:
+
+    $ python -m benchmarks --output results.json
+"""
+
+import time
+
+def measure(function, *, repeat=3, minimum=0.2):
+    """Return the best rate (calls per second) of function
+
+    function is called in batches until at least minimum seconds have
+    passed; this is done repeat times and the fastest rate is returned.
+    """
+    best = 0
+    for _ in range(repeat):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            function()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= minimum:
+                break
+        best = max(best, calls / elapsed)
+    return best
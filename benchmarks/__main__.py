@@ -0,0 +1,152 @@
+"""Run the benchmark suite and save the results as JSON
+
+    $ python -m benchmarks --output before.json
+    $ python -m benchmarks --compare before.json
+
+Every result is a rate, so higher is better.  With --compare, each result
+is shown next to the one saved in the given file, and the exit status is 1
+if any got slower by more than --threshold.  Names given on the command
+line pick out the benchmarks whose names contain them.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+# Benchmarks that draw need a video driver, even on a machine without a
+# display; set before SDL is initialized
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+from . import (adjacent, attributes, draw, level, move, push, queries,
+               replay, scheduler, server, session, startup)
+try:
+    from . import arrays
+except ImportError:
+    # NumPy isn't installed
+    arrays = None
+
+# (name, unit, function, parameters): function(parameter) returns the rate
+SUITE = [
+    ("Entity.move", "moves/s", move.moves_per_second, move.SIZES),
+    ("push chain", "pushes/s", push.pushes_per_second, push.LENGTHS),
+    ("Entity attribute", "assignments/s", attributes.assignments_per_second,
+     attributes.KINDS),
+    ("World.locate", "calls/s", queries.locates_per_second, queries.SIZES),
+    ("World.count", "calls/s", queries.counts_per_second, queries.SIZES),
+    ("World.spawn_random", "entities/s", queries.spawns_per_second,
+     queries.SIZES),
+    ("World.in_rect", "calls/s", queries.rects_per_second, queries.SIZES),
+    ("World.near", "calls/s", queries.nears_per_second, queries.SIZES),
+    ("World.cast", "calls/s", queries.casts_per_second, queries.SIZES),
+    ("Scheduler.update", "updates/s", scheduler.updates_per_second,
+     scheduler.COUNTS),
+    ("World.load text", "cells/s", level.cells_per_second, [256, 1024, 4096]),
+    ("World.load binary", "cells/s",
+     lambda size: level.cells_per_second(size, compiled=True),
+     [256, 1024, 4096]),
+    ("Location.adjacent", "calls/s", adjacent.adjacent_per_second,
+     adjacent.SIZES),
+    ("Grid.__iter__", "cells/s", adjacent.cells_per_second, adjacent.SIZES),
+    ("World._draw", "frames/s", draw.frames_per_second, draw.KINDS),
+    ("Think Green session", "moves/s", lambda _: session.think_green(),
+     [None]),
+    ("Floorpaint session", "moves/s", session.floorpaint, session.SIZES),
+    ("Player.play", "ticks/s", lambda _: replay.ticks_per_second(), [None]),
+    ("Player.seek", "seeks/s", lambda _: replay.seeks_per_second(), [None]),
+    ("Server Host", "session ticks/s",
+     lambda _: server.session_ticks_per_second(), [None]),
+    ("Server Pool", "session ticks/s", server.session_ticks_per_second,
+     server.PROCESSES),
+    ("startup", "starts/s", startup.starts_per_second, list(startup.STAGES)),
+]
+if arrays is not None:
+    SUITE += [
+        ("WorldArray rule", "steps/s", arrays.rules_per_second, arrays.SIZES),
+        ("WorldArray.place", "entities/s", arrays.places_per_second,
+         arrays.SIZES),
+    ]
+
+def key(result):
+    if result['parameter'] is None:
+        return result['name']
+    return "{} [{}]".format(result['name'], result['parameter'])
+
+def run(patterns=()):
+    """Run the benchmarks whose names contain any of patterns (or all)"""
+    results = []
+    for name, unit, function, parameters in SUITE:
+        if patterns and not any(pattern in name for pattern in patterns):
+            continue
+        for parameter in parameters:
+            start = time.perf_counter()
+            rate = function(parameter)
+            result = {'name': name, 'parameter': parameter, 'rate': rate,
+                      'unit': unit,
+                      'seconds': time.perf_counter() - start}
+            print("{:<40} {:>16,.1f} {}".format(key(result), rate, unit),
+                  flush=True)
+            results.append(result)
+    return results
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'],
+                              cwd=os.path.dirname(__file__),
+                              capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline, threshold):
+    """Print results against baseline; return the keys that regressed"""
+    old_rates = {key(result): result['rate'] for result in baseline}
+    regressions = []
+    print()
+    for result in results:
+        old_rate = old_rates.get(key(result))
+        if not old_rate:
+            continue
+        ratio = result['rate'] / old_rate
+        flag = ""
+        if ratio < 1 - threshold:
+            flag = "  SLOWER"
+            regressions.append(key(result))
+        print("{:<40} {:>16,.1f} -> {:>16,.1f} {:>7.2f}x{}"
+              "".format(key(result), old_rate, result['rate'], ratio, flag))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description="Run Subjunctive's benchmarks")
+    parser.add_argument('patterns', nargs='*', metavar='NAME',
+                        help="only run benchmarks whose names contain NAME")
+    parser.add_argument('--output', help="write the results to this file")
+    parser.add_argument('--compare', metavar='FILE',
+                        help="compare the results with those saved in FILE")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="slowdown (as a fraction) that counts as a "
+                             "regression; default 0.1")
+    args = parser.parse_args()
+
+    results = run(args.patterns)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'commit': _commit(),
+                       'date': datetime.datetime.now().isoformat(),
+                       'python': platform.python_version(),
+                       'platform': platform.platform(),
+                       'results': results}, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
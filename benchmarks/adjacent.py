@@ -0,0 +1,28 @@
+"""Measure Location.adjacent and Grid iteration on grids of increasing size"""
+
+from subjunctive.grid import Grid, down, left, right, up
+
+from . import measure
+
+SIZES = [8, 64, 256, 1000]
+
+def adjacent_per_second(size):
+    location = Grid(size, size).center
+
+    def walk():
+        location.adjacent(left).adjacent(up).adjacent(right).adjacent(down)
+
+    return measure(walk) * 4
+
+def cells_per_second(size):
+    grid = Grid(size, size)
+    return measure(lambda: sum(1 for _ in grid)) * size * size
+
+def main():
+    for size in SIZES:
+        print("{0:>5}x{0:<5} adjacent {1:>12,.0f} calls/s  Grid.__iter__ "
+              "{2:>12,.0f} cells/s".format(size, adjacent_per_second(size),
+                                           cells_per_second(size)))
+
+if __name__ == '__main__':
+    main()
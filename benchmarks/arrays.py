@@ -0,0 +1,90 @@
+"""Measure a cellular-automaton rule written with and without WorldArray
+
+Each step, every empty cell with at least three hazards around it gets a
+hazard.  Finding the cells and placing the new hazards are timed
+separately.  Needs NumPy.
+"""
+
+import time
+
+from subjunctive.arrays import WorldArray
+from subjunctive.entity import Entity
+from subjunctive.grid import Grid
+from subjunctive.world import World
+
+from . import measure
+
+SIZES = [64, 256, 1000]
+
+class Hazard(Entity):
+    pass
+
+def crowded_loop(world):
+    """Return the cells that get a hazard, one cell at a time"""
+    grid, cells = world.grid, []
+    for location in grid:
+        if world.at(location) is not None:
+            continue
+        hazards = 0
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                x, y = location.x + dx, location.y + dy
+                if ((dx or dy) and 0 <= x < grid.width and
+                        0 <= y < grid.height and
+                        isinstance(world.at(grid.Location(x, y)), Hazard)):
+                    hazards += 1
+        if hazards >= 3:
+            cells.append(location)
+    return cells
+
+def place_loop(world, cells):
+    for location in cells:
+        world.place(Hazard(world), location)
+
+def crowded_array(view):
+    """Return a mask of the cells that get a hazard"""
+    return (view.neighbors(view.mask(Hazard)) >= 3) & view.empty()
+
+def seeded_world(size):
+    world = World(Grid(size, size))
+    world.random.seed(0)
+    world.spawn_random(Hazard, number=size * size // 3)
+    return world
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+def rules_per_second(size):
+    """Return how many times a second the array rule runs on size boards"""
+    view = WorldArray(seeded_world(size))
+    return measure(lambda: crowded_array(view))
+
+def places_per_second(size):
+    """Return the entities per second WorldArray.place makes and places"""
+    view = WorldArray(seeded_world(size))
+    mask = crowded_array(view)
+    list(view.world.grid)
+    placed, elapsed = timed(view.place, Hazard, mask)
+    return len(placed) / elapsed * 1000
+
+def main():
+    print("{:<11} {:>12} {:>12} {:>12} {:>12}".format(
+        "", "loop rule", "loop place", "array rule", "array place"))
+    for size in SIZES:
+        world = seeded_world(size)
+        cells, loop_rule = timed(crowded_loop, world)
+        _, loop_place = timed(place_loop, world, cells)
+        view = WorldArray(seeded_world(size))
+        # The loop rule made every Location on its grid; do the same here,
+        # so that placing costs the same to start with
+        list(view.world.grid)
+        mask, array_rule = timed(crowded_array, view)
+        _, array_place = timed(view.place, Hazard, mask)
+        print("{0:>5}x{0:<5} {1:>9.1f} ms {2:>9.1f} ms {3:>9.1f} ms "
+              "{4:>9.1f} ms".format(size, loop_rule, loop_place, array_rule,
+                                    array_place))
+
+if __name__ == '__main__':
+    main()
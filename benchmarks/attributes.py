@@ -0,0 +1,49 @@
+"""Measure assigning attributes on entities, with and without snapshots
+
+Entities only report their attribute changes while their world (or any
+other) has a snapshot or a WorldArray, so the plain rate should be that
+of any Python object.
+"""
+
+from subjunctive.entity import Entity
+from subjunctive.grid import Grid
+from subjunctive.world import World
+
+from . import measure
+
+KINDS = ['plain', 'other world watched', 'snapshot']
+ASSIGNMENTS = 100
+
+class Counter(Entity):
+    count = 0
+
+def assignments_per_second(kind):
+    world = World(Grid(8, 8))
+    entity = Counter(world)
+    world.place(entity, world.grid.Location(0, 0))
+    other = World(Grid(8, 8))
+    if kind == 'other world watched':
+        other.snapshot()
+    elif kind == 'snapshot':
+        world.snapshot()
+
+    def assign():
+        for count in range(ASSIGNMENTS):
+            entity.count = count
+        if kind == 'snapshot':
+            # Keep the journal from growing without end
+            world.restore()
+
+    try:
+        return measure(assign) * ASSIGNMENTS
+    finally:
+        world.clear()
+        other.clear()
+
+def main():
+    for kind in KINDS:
+        print("{:<20} {:>14,.0f} assignments/s"
+              "".format(kind, assignments_per_second(kind)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Measure World._draw on a Think Green sized board
+
+Compares frames where nothing changed, frames where one entity moved and
+frames that redraw everything.
+"""
+
+import functools
+import os.path
+
+import sdl2.ext
+
+import subjunctive
+from subjunctive.entity import Entity
+from subjunctive.grid import Grid, left, right
+from subjunctive.world import World
+
+from . import measure
+
+GAMES = os.path.join(os.path.dirname(__file__), os.pardir, 'games')
+KINDS = ["idle", "one entity moved", "full redraw"]
+
+class Planet(World):
+    grid = Grid(22, 22)
+    grid_offset = (231, 215)
+    tile_size = (13, 13)
+
+@functools.lru_cache()
+def _setup():
+    sdl2.ext.init()
+    subjunctive.resource.add_path(os.path.join(GAMES, 'think-green'))
+    Planet.background = subjunctive.resource.image('images/green_planet.png')
+    world = Planet()
+    world.spawn_random(Entity, number=100)
+    window = sdl2.ext.Window("benchmark", (world.background.w,
+                                           world.background.h))
+    subjunctive.resource.cache.set_format(
+        window.get_surface().format.contents.format)
+    world._draw(window)
+    return world, window
+
+def frames_per_second(kind):
+    """Return the rate of frames of the given kind (one of KINDS)"""
+    world, window = _setup()
+    mover = next(world.entities)
+
+    def one_move():
+        mover.move(left)
+        mover.move(right)
+        world._draw(window)
+
+    def full():
+        world._invalidate()
+        world._draw(window)
+
+    frame = {"idle": lambda: world._draw(window),
+             "one entity moved": one_move,
+             "full redraw": full}[kind]
+    return measure(frame)
+
+def main():
+    for kind in KINDS:
+        print("{:<16} {:>12,.0f} frames/s".format(kind,
+                                                  frames_per_second(kind)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Measure World.load on text and compiled levels of 4096x4096 cells
+
+The level is mostly empty floor, with a wall around the edge and a few
+thousand scattered blocks.  cells_per_second() measures smaller levels,
+with the blocks scaled down to match.
+"""
+
+import os
+import random
+import tempfile
+import time
+
+from subjunctive import level, resource
+from subjunctive.entity import Entity
+from subjunctive.world import World
+
+SIZE = 4096
+BLOCKS = 5000
+
+class Block(Entity):
+    pass
+
+class Player(Entity):
+    pass
+
+DEFINITIONS = {'-': None, 'b': Block, 'o': Player}
+
+def make_level(path, size=SIZE, blocks=BLOCKS):
+    rng = random.Random(0)
+    rows = [bytearray(b'-' * size) for _ in range(size)]
+    for row in (rows[0], rows[-1]):
+        row[:] = b'b' * size
+    for row in rows:
+        row[0] = row[-1] = ord('b')
+    for _ in range(blocks):
+        rows[rng.randrange(1, size - 1)][rng.randrange(1, size - 1)] = ord('b')
+    rows[1][1] = ord('o')
+    with open(path, 'wb') as f:
+        f.write(b'\n'.join(rows))
+
+def timed_load(name):
+    start = time.perf_counter()
+    world, player = World.load(name, DEFINITIONS, Player)
+    return time.perf_counter() - start, len(world._entities)
+
+def cells_per_second(size, compiled=False):
+    """Return how many cells per second World.load reads in a size level"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = text_path = os.path.join(directory, 'level.txt')
+        make_level(text_path, size, BLOCKS * size * size // SIZE**2)
+        if compiled:
+            path = os.path.join(directory, 'level.sjl')
+            level.compile(text_path, path)
+        elapsed, _ = timed_load(path)
+    return size * size / elapsed
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        resource.add_path(directory)
+        text_path = os.path.join(directory, 'level.txt')
+        make_level(text_path)
+        start = time.perf_counter()
+        level.compile(text_path, os.path.join(directory, 'level.sjl'))
+        print("{0}x{0} level".format(SIZE))
+        print("{:<16} {:>8.3f} s".format("compile",
+                                         time.perf_counter() - start))
+        for name in ['level.txt', 'level.sjl']:
+            elapsed, entities = timed_load(name)
+            print("{:<16} {:>8.3f} s  ({} entities)"
+                  "".format("load " + name, elapsed, entities))
+
+if __name__ == '__main__':
+    main()
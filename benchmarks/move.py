@@ -0,0 +1,32 @@
+"""Measure Entity.move on grids of increasing size
+
+Moves per second should stay flat as the grid grows, since locating an
+entity no longer scans the grid.
+"""
+
+from subjunctive.entity import Entity
+from subjunctive.grid import Grid, left, right
+from subjunctive.world import World
+
+from . import measure
+
+SIZES = [8, 64, 256, 1000]
+
+def moves_per_second(size):
+    world = World(Grid(size, size))
+    entity = Entity(world)
+    world.place(entity, world.grid.Location(size // 2, size // 2))
+
+    def move():
+        entity.move(right)
+        entity.move(left)
+
+    return measure(move) * 2
+
+def main():
+    for size in SIZES:
+        print("{0:>5}x{0:<5} {1:>12,.0f} moves/s"
+              "".format(size, moves_per_second(size)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""Measure Entity.move pushing lines of pushable entities
+
+Lines of any length are pushed without recursion; the cost of a push
+should grow linearly with the length of the line.
+"""
+
+from subjunctive.entity import Entity
+from subjunctive.grid import Grid, left, right
+from subjunctive.world import World
+
+from . import measure
+
+LENGTHS = [1, 10, 1000, 100000]
+
+class Crate(Entity):
+    pushable = True
+
+def pushes_per_second(length):
+    # One pusher on each side of the line, with a gap on the right
+    world = World(Grid(length + 3, 1))
+    Location = world.grid.Location
+    left_pusher, right_pusher = Entity(world), Entity(world)
+    world.place(left_pusher, Location(0, 0))
+    world.place(right_pusher, Location(length + 2, 0))
+    for x in range(1, length + 1):
+        world.place(Crate(world), Location(x, 0))
+
+    def push():
+        left_pusher.move(right)
+        left_pusher.move(left)
+        right_pusher.move(left)
+        right_pusher.move(right)
+
+    return measure(push, repeat=1 if length > 1000 else 3) * 2
+
+def main():
+    for length in LENGTHS:
+        rate = pushes_per_second(length)
+        print("{:>7} long {:>12,.1f} pushes/s {:>12,.0f} entities/s"
+              "".format(length, rate, rate * length))
+
+if __name__ == '__main__':
+    main()
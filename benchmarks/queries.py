@@ -0,0 +1,88 @@
+"""Measure World's queries and spawn_random on grids of increasing size
+
+Each board is a quarter full.  None of the rates should fall much as the
+grid grows, since none of these operations scan the grid: the spatial
+queries only look at the cells they cover (a 10x10 rectangle, a radius 5
+neighborhood, and a ray to the first entity).
+"""
+
+from subjunctive.entity import Entity
+from subjunctive.grid import Grid, right
+from subjunctive.world import World
+
+from . import measure
+
+SIZES = [8, 64, 256, 1000]
+
+class Marked(Entity):
+    pass
+
+def _quarter_full(size):
+    world = World(Grid(size, size))
+    world.random.seed(0)
+    world.spawn_random(Entity, number=size * size // 4)
+    return world
+
+def locates_per_second(size):
+    world = _quarter_full(size)
+    entities = list(world.entities)[:100]
+    locate = world.locate
+
+    def locate_all():
+        for entity in entities:
+            locate(entity)
+
+    return measure(locate_all) * len(entities)
+
+def counts_per_second(size):
+    world = _quarter_full(size)
+    world.spawn_random(Marked, number=10)
+    return measure(lambda: world.count(Marked))
+
+def spawns_per_second(size):
+    world = _quarter_full(size)
+    batch = max(1, size * size // 100)
+    spawned = []
+
+    def spawn():
+        # Keep the board a quarter full
+        for entity in spawned:
+            world.remove(entity)
+        spawned[:] = world.spawn_random(Marked, number=batch)
+
+    return measure(spawn) * batch
+
+def rects_per_second(size):
+    world = _quarter_full(size)
+    x, y = world.grid.center.x, world.grid.center.y
+    return measure(lambda: world.in_rect(x - 5, y - 5, 10, 10))
+
+def nears_per_second(size):
+    world = _quarter_full(size)
+    center = world.grid.center
+    return measure(lambda: world.near(center, 5))
+
+def casts_per_second(size):
+    world = _quarter_full(size)
+    locations = [location for location, _ in
+                 world.in_rect(0, 0, size, min(size, 10))][:100]
+
+    def cast_all():
+        for location in locations:
+            world.cast(location, right)
+
+    return measure(cast_all) * len(locations)
+
+def main():
+    for name, rate in [("locate", locates_per_second),
+                       ("count", counts_per_second),
+                       ("spawn_random", spawns_per_second),
+                       ("in_rect", rects_per_second),
+                       ("near", nears_per_second),
+                       ("cast", casts_per_second)]:
+        for size in SIZES:
+            print("{0:<14} {1:>5}x{1:<5} {2:>12,.0f} /s"
+                  "".format(name, size, rate(size)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Measure drawing thousands of sprites: blitting vs. batched rendering
+
+Every frame is a full redraw.  With the dummy video driver only the
+software renderer is available; the "batched" line forces the geometry
+path anyway, to show the cost on the Python side.
+"""
+
+import os.path
+
+import sdl2.ext
+
+import subjunctive
+from subjunctive.entity import Entity
+from subjunctive.grid import Grid
+from subjunctive.render import Renderer
+from subjunctive.world import World
+
+from . import measure
+
+GAMES = os.path.join(os.path.dirname(__file__), os.pardir, 'games')
+IMAGES = ['hazard', 'recycle', 'neutralize', 'receptor0', 'death']
+
+class Crowd(World):
+    grid = Grid(80, 60)
+    tile_size = (13, 13)
+
+def main():
+    sdl2.ext.init()
+    subjunctive.resource.add_path(os.path.join(GAMES, 'think-green'))
+    kinds = [type(name, (Entity,), {'image': subjunctive.resource.image(
+                 'images/{}.png'.format(name))}) for name in IMAGES]
+    world = Crowd()
+    for location in world.grid:
+        kind = kinds[(location.x + location.y) % len(kinds)]
+        world.place(kind(world), location)
+    sprites = len(world._entities)
+
+    window = sdl2.ext.Window("benchmark", world._window_size())
+    subjunctive.resource.cache.set_format(
+        window.get_surface().format.contents.format)
+
+    def blit():
+        world._invalidate()
+        world._draw(window)
+
+    print("{} sprites".format(sprites))
+    print("{:<16} {:>10,.1f} frames/s".format("blit", measure(blit)))
+
+    renderer = Renderer(window)
+
+    def render():
+        world._invalidate()
+        renderer.draw(world)
+
+    print("{:<16} {:>10,.1f} frames/s".format("renderer", measure(render)))
+    renderer.batched = True
+    print("{:<16} {:>10,.1f} frames/s".format("batched", measure(render)))
+
+if __name__ == '__main__':
+    main()
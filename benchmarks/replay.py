@@ -0,0 +1,69 @@
+"""Measure playing back and seeking through a recorded Floorpaint session
+
+A session of TICKS ticks, with a random key pressed on most of them, is
+recorded into an input log; the log is then played back from the start,
+and sought to random ticks (mostly backwards, from the end).
+"""
+
+import io
+import random
+import time
+
+import sdl2
+
+from subjunctive import record
+from subjunctive.headless import Simulation
+
+from . import session
+
+TICKS = 5000
+SEEKS = 50
+SIZE = 25
+KEYS = [sdl2.SDLK_LEFT, sdl2.SDLK_UP, sdl2.SDLK_RIGHT, sdl2.SDLK_DOWN]
+
+def _session():
+    game = session._game('floorpaint', 'floorpaint')
+    world, player = game.World.from_level(
+        game.generate_level(random.Random(0), SIZE, SIZE), game.DEFINITIONS,
+        game.Player)
+    return world, player
+
+def _log():
+    f = io.BytesIO()
+    recorder = record.Recorder(f)
+    world, player = _session()
+    simulation = Simulation(world, on_direction=player.move, record=recorder)
+    rng = random.Random(0)
+    for _ in range(TICKS):
+        if rng.random() < 0.8:
+            simulation.key(rng.choice(KEYS))
+        simulation.step()
+    recorder.end(TICKS)
+    return record.loads(f.getvalue())
+
+def ticks_per_second():
+    """Return the ticks per second of playing the log from the start"""
+    log = _log()
+    world, player = _session()
+    start = time.perf_counter()
+    record.Player(log, world, on_direction=player.move).play()
+    return TICKS / (time.perf_counter() - start)
+
+def seeks_per_second():
+    """Return the seeks per second to random ticks of a played log"""
+    log = _log()
+    world, player = _session()
+    replay = record.Player(log, world, on_direction=player.move)
+    replay.play()
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for _ in range(SEEKS):
+        replay.seek(rng.randrange(TICKS))
+    return SEEKS / (time.perf_counter() - start)
+
+def main():
+    print("{:<10} {:>10,.0f} ticks/s".format("play", ticks_per_second()))
+    print("{:<10} {:>10,.0f} seeks/s".format("seek", seeks_per_second()))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+"""Measure Scheduler.update with many pending timers
+
+Only one timer is due on each update, so the cost of an update should
+barely change as the number of pending timers grows.
+"""
+
+from subjunctive.scheduler import Scheduler
+
+from . import measure
+
+COUNTS = [100, 1000, 10000, 100000]
+
+def updates_per_second(count):
+    scheduler = Scheduler()
+    for _ in range(count):
+        scheduler.call(lambda: None, every='10m')
+    scheduler.call(lambda: None, every='1ms')
+    return measure(scheduler.update)
+
+def main():
+    for count in COUNTS:
+        print("{:>7} timers {:>12,.0f} updates/s"
+              "".format(count, updates_per_second(count)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Measure how many Think Green sessions a server can tick
+
+Every session gets a random key every tick, like a very busy player; a
+session whose cursor dies is replaced by a new one.  The sessions run in a
+single Host, and in Pools of different sizes, to show the cost of sending
+input to the workers and what the extra cores buy.
+"""
+
+import itertools
+import random
+import time
+
+import sdl2
+
+from subjunctive.server import Host, Pool, Session
+
+from . import session
+
+SESSIONS = 200
+TICKS = 100
+PROCESSES = [1, 2, 4]
+KEYS = [sdl2.SDLK_LEFT, sdl2.SDLK_UP, sdl2.SDLK_RIGHT, sdl2.SDLK_DOWN]
+
+def think_green(seed):
+    """Return a Session of a new game of Think Green"""
+    game = session._game('think-green', 'think-green')
+    world = game.Planet()
+    world.random.seed(seed)
+    cursor = game.Cursor(world)
+    world.setup(cursor)
+
+    def move_cursor(direction):
+        world.tick(cursor)
+        previous_combo = world.combo
+        cursor.move(direction, orient=True)
+        if world.combo == previous_combo:
+            world.combo = 1
+
+    return Session(world, on_direction=move_cursor)
+
+def session_ticks_per_second(processes=None, sessions=SESSIONS, ticks=TICKS):
+    """Return the session ticks per second in a Pool (or, by default, a Host)
+
+    With a Host, the sessions are made and ticked in this process.
+    """
+    rng = random.Random(0)
+    if processes is None:
+        host = Host()
+        ids = itertools.count()
+
+        def start():
+            id = next(ids)
+            host.add(id, think_green(rng.random()))
+            return id
+    else:
+        host = Pool(think_green, processes=processes)
+
+        def start():
+            return host.start(rng.random())
+    try:
+        live = {start() for _ in range(sessions)}
+        host.tick()
+        start_time = time.perf_counter()
+        for _ in range(ticks):
+            for id in live:
+                host.send(id, rng.choice(KEYS))
+            for id in host.tick():
+                live.remove(id)
+                host.remove(id)
+                live.add(start())
+        elapsed = time.perf_counter() - start_time
+    finally:
+        if processes is not None:
+            host.close()
+    return sessions * ticks / elapsed
+
+def main():
+    for processes in [None] + PROCESSES:
+        name = "Host" if processes is None else "Pool({})".format(processes)
+        print("{:<20} {:>10,.0f} session ticks/s"
+              "".format(name, session_ticks_per_second(processes)))
+
+if __name__ == '__main__':
+    main()
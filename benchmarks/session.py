@@ -0,0 +1,107 @@
+"""Measure whole sessions of Think Green and Floorpaint, played headless
+
+Each session plays random (but seeded) moves through a Simulation with the
+game's own handlers, and draws every move into a window, as run() would.
+Think Green starts a new game whenever the cursor dies; Floorpaint moves
+on to a new generated level once a level is complete, or after
+MOVES_PER_LEVEL moves.
+"""
+
+import importlib.util
+import os.path
+import random
+import time
+
+import sdl2.ext
+
+from subjunctive.grid import down, left, right, up
+from subjunctive.headless import Simulation
+
+GAMES = os.path.join(os.path.dirname(__file__), os.pardir, 'games')
+DIRECTIONS = [left, up, right, down]
+MOVES = 2000
+# Floorpaint level sizes, and the most moves made on one level
+SIZES = [10, 25, 50]
+MOVES_PER_LEVEL = 200
+
+_games = {}
+
+def _game(directory, name):
+    """Import the game module games/directory/name.py"""
+    try:
+        return _games[name]
+    except KeyError:
+        pass
+    spec = importlib.util.spec_from_file_location(
+        name.replace('-', '_'), os.path.join(GAMES, directory, name + '.py'))
+    module = _games[name] = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def think_green(moves=MOVES):
+    """Return the moves per second of a Think Green session"""
+    game = _game('think-green', 'think-green')
+    sdl2.ext.init()
+    rng = random.Random(0)
+    window = None
+    made = 0
+    start = time.perf_counter()
+    while made < moves:
+        world = game.Planet()
+        world.random.seed(rng.random())
+        cursor = game.Cursor(world)
+        world.setup(cursor)
+        if window is None:
+            window = sdl2.ext.Window("benchmark", world._window_size())
+
+        def move_cursor(direction):
+            world.tick(cursor)
+            previous_combo = world.combo
+            cursor.move(direction, orient=True)
+            if world.combo == previous_combo:
+                world.combo = 1
+
+        simulation = Simulation(world, on_direction=move_cursor)
+        try:
+            while made < moves:
+                simulation.direction(rng.choice(DIRECTIONS))
+                simulation.step()
+                world._draw(window)
+                made += 1
+        except game.DeathError:
+            pass
+    return made / (time.perf_counter() - start)
+
+def floorpaint(size, moves=MOVES):
+    """Return the moves per second of a Floorpaint session on size levels"""
+    game = _game('floorpaint', 'floorpaint')
+    sdl2.ext.init()
+    rng = random.Random(0)
+    window = None
+    made = 0
+    start = time.perf_counter()
+    while made < moves:
+        world, player = game.World.from_level(
+            game.generate_level(rng, size, size), game.DEFINITIONS,
+            game.Player)
+        if window is None:
+            window = sdl2.ext.Window("benchmark", world._window_size())
+        world._invalidate()
+        simulation = Simulation(world, on_direction=player.move)
+        for _ in range(MOVES_PER_LEVEL):
+            simulation.direction(rng.choice(DIRECTIONS))
+            simulation.step()
+            world._draw(window)
+            made += 1
+            if made == moves or world.complete:
+                break
+    return made / (time.perf_counter() - start)
+
+def main():
+    print("{:<20} {:>10,.0f} moves/s".format("Think Green", think_green()))
+    for size in SIZES:
+        print("{:<20} {:>10,.0f} moves/s"
+              "".format("Floorpaint {0}x{0}".format(size), floorpaint(size)))
+
+if __name__ == '__main__':
+    main()
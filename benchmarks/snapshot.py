@@ -0,0 +1,44 @@
+"""Measure World snapshots on boards of increasing size
+
+Each round takes a snapshot, makes a few moves and restores it.  The rate
+should stay flat as the board grows, since only the changes are undone.
+"""
+
+from subjunctive.entity import Entity
+from subjunctive.grid import Grid, left, right
+from subjunctive.world import World
+
+from . import measure
+
+SIZES = [8, 64, 256, 1000]
+MOVES = 10
+
+def rounds_per_second(size):
+    world = World(Grid(size, size))
+    world.random.seed(0)
+    world.spawn_random(Entity, number=size * size // 4)
+    # Make room for the entity to move back and forth in the corner
+    for x in range(2):
+        blocking_entity = world.at(world.grid.Location(x, 0))
+        if blocking_entity is not None:
+            world.remove(blocking_entity)
+    entity = Entity(world)
+    world.place(entity, world.grid.Location(0, 0))
+
+    def round():
+        world.snapshot()
+        for _ in range(MOVES // 2):
+            entity.move(right)
+            entity.move(left)
+        world.score += 1
+        world.undo()
+
+    return measure(round)
+
+def main():
+    for size in SIZES:
+        print("{0:>5}x{0:<5} {1:>12,.0f} rounds/s"
+              "".format(size, rounds_per_second(size)))
+
+if __name__ == '__main__':
+    main()
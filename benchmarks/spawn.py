@@ -0,0 +1,35 @@
+"""Measure World.spawn_random on a large grid as it fills up
+
+Each call spawns a batch of entities away from the edges and away from
+the row and column of a cursor, like Think Green does.
+"""
+
+import time
+
+from subjunctive.entity import Entity
+from subjunctive.grid import Grid
+from subjunctive.world import World
+
+SIZE = 1000
+BATCH = 5000
+
+def main():
+    world = World(Grid(SIZE, SIZE))
+    cursor = Entity(world)
+    world.place(cursor, world.grid.center)
+    world.random.seed(0)
+    area = SIZE * SIZE
+    print("{0}x{0} grid, {1} entities per call".format(SIZE, BATCH))
+    for target in [0.01, 0.1, 0.5, 0.9, 0.99]:
+        while len(world._entities) < area * target - BATCH:
+            world.spawn_random(Entity, number=BATCH, avoid=cursor,
+                               edges=False)
+        start = time.perf_counter()
+        spawned = world.spawn_random(Entity, number=BATCH, avoid=cursor,
+                                     edges=False)
+        elapsed = time.perf_counter() - start
+        print("{:>4.0%} full {:>10,.0f} entities/s"
+              "".format(target, len(spawned) / elapsed))
+
+if __name__ == '__main__':
+    main()
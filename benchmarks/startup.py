@@ -0,0 +1,67 @@
+"""Measure cold starts: importing the engine and a game, up to the first frame
+
+Each stage runs in a fresh interpreter, timed from its first line, so
+nothing is already imported or loaded.  The Think Green stages also count
+the images loaded, which should be none until a frame is drawn.
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+REPEAT = 5
+
+_LOAD_GAME = '''
+import importlib.util
+spec = importlib.util.spec_from_file_location(
+    'think_green', 'games/think-green/think-green.py')
+game = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(game)
+'''
+
+_FIRST_FRAME = _LOAD_GAME + '''
+title = game.TitleScreen()
+draw = title._draw
+
+def first_draw(window):
+    draw(window)
+    raise subjunctive.SubjunctiveExit
+
+title._draw = first_draw
+subjunctive.run(title)
+'''
+
+STAGES = {
+    "import subjunctive": "import subjunctive",
+    "import subjunctive.world": "import subjunctive.world",
+    "import Think Green": _LOAD_GAME,
+    "first frame": _FIRST_FRAME,
+}
+
+def timed(stage):
+    """Return the seconds taken by stage, and the images it loaded"""
+    script = ("import time\nstart = time.perf_counter()\n"
+              "import subjunctive\n" + STAGES[stage] +
+              "\nelapsed = time.perf_counter() - start\n"
+              "print(elapsed, subjunctive.resource.cache.misses)\n")
+    environment = dict(os.environ, PYTHONPATH=ROOT)
+    environment.setdefault('SDL_VIDEODRIVER', 'dummy')
+    output = subprocess.run([sys.executable, '-W', 'ignore', '-c', script],
+                            cwd=ROOT, env=environment, capture_output=True,
+                            text=True, check=True).stdout
+    elapsed, images = output.split()
+    return float(elapsed), int(images)
+
+def starts_per_second(stage):
+    return 1 / min(timed(stage)[0] for _ in range(REPEAT))
+
+def main():
+    for stage in STAGES:
+        results = [timed(stage) for _ in range(REPEAT)]
+        elapsed = min(elapsed for elapsed, _ in results)
+        print("{:<26} {:>8.1f} ms {:>4} images"
+              "".format(stage, elapsed * 1000, results[0][1]))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Measure World storage on a board of 10^6 cells
+
+Reports the memory held by an empty World and the time taken by the
+operations that walk the world's contents.  Both should depend on the
+number of entities rather than on the area of the grid.
+"""
+
+import random
+import time
+import tracemalloc
+
+from subjunctive.entity import Entity
+from subjunctive.grid import Grid
+from subjunctive.world import World
+
+SIZE = 1000
+ENTITIES = 1000
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+def main():
+    grid = Grid(SIZE, SIZE)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    world = World(grid)
+    elapsed = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("{0}x{0} grid, {1} entities".format(SIZE, ENTITIES))
+    print("{:<16} {:>10.1f} ms {:>10.2f} MiB"
+          "".format("World()", elapsed * 1000, memory / 2**20))
+
+    rng = random.Random(0)
+    cells = rng.sample(range(SIZE * SIZE), ENTITIES)
+    for index in cells:
+        world.place(Entity(world),
+                    grid.Location(index % SIZE, index // SIZE))
+
+    results = [
+        ("entities", timed(lambda: sum(1 for _ in world.entities))),
+        ("count", timed(lambda: world.count(Entity))),
+        ("spawn_random", timed(lambda: world.spawn_random(Entity))),
+        ("clear", timed(world.clear)),
+    ]
+    for name, elapsed in results:
+        print("{:<16} {:>10.1f} ms".format(name, elapsed * 1000))
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,10 @@
 import argparse
+import logging
 import os.path
 import random
+import time
 
 import subjunctive
-from subjunctive.grid import Grid, left, right, up, down
 
 subjunctive.resource.add_path(os.path.dirname(__file__))
 
@@ -29,8 +30,6 @@ class Tile(subjunctive.entity.Entity):
         if not self.active:
             self.world.swap(self, pusher)
             self.active = True
-            if world.complete:
-                print ("YOU WON")
 
 class World(subjunctive.world.World):
     grid = subjunctive.grid.Grid(25, 25)
@@ -39,73 +38,147 @@ class World(subjunctive.world.World):
 
     @property
     def complete(self):
-        return all(e.active for e in world.entities if isinstance(e, Tile))
-
-def generate_level(width, height):
-    spaces = {(x, y): False for x in range(width) for y in range(height)}
+        return all(tile.active for tile in self.entities_of(Tile))
+
+# What each character of a level file stands for
+DEFINITIONS = {'-': Tile, 'b': Block, 'o': Player}
+
+class Puzzle(subjunctive.solver.WorldPuzzle):
+    """Floorpaint's rules, for subjunctive.solver
+
+    A state is one int: the index of the player's cell, plus a bit for
+    each cell holding an active tile, times the number of cells.
+    """
+    def __init__(self, world, player):
+        super().__init__(world, player)
+        self.tiles = world.entities_of(Tile)
+        grid = world.grid
+        self.cells = grid.width * grid.height
+        # Every cell that isn't a block holds a tile or the player
+        self.open_cells = sorted(self.index(location) for location in grid
+                                 if not isinstance(world.at(location), Block))
+        self.bits = {location: 1 << self.index(location) for location in grid}
+
+    def index(self, location):
+        return location.y * self.world.grid.width + location.x
+
+    def encode(self):
+        locate, bits = self.world.locate, self.bits
+        mask = 0
+        for tile in self.tiles:
+            if tile.active:
+                mask |= bits[locate(tile)]
+        return mask * self.cells + self.index(locate(self.player))
+
+    def decode(self, state):
+        mask, player_index = divmod(state, self.cells)
+        world, width = self.world, self.world.grid.width
+        for entity in [self.player] + self.tiles:
+            world.remove(entity)
+        world.place(self.player, world.grid.Location(player_index % width,
+                                                     player_index // width))
+        cells = (index for index in self.open_cells if index != player_index)
+        for tile, index in zip(self.tiles, cells):
+            tile.active = bool(mask >> index & 1)
+            world.place(tile, world.grid.Location(index % width,
+                                                  index // width))
+
+    def solved(self, state):
+        return self.estimate(state) == 0
+
+    def estimate(self, state):
+        # Each move activates one tile at most
+        return len(self.tiles) - bin(state // self.cells).count('1')
+
+def load_puzzle(path):
+    """Return a Puzzle for the level file at path"""
+    world, player = World.load(path, DEFINITIONS, Player)
+    return Puzzle(world, player)
+
+def generate_level(rng, width=10, height=10):
+    """Return a random level: a path through blocks from the top left
+
+    The path goes in straight runs in random directions until it gets
+    stuck or covers four fifths of the board, so following it solves the
+    level.
+    rng is a random.Random.
+    """
+    block, tile = ord('b'), ord('-')
+    cells = bytearray(b'b' * (width * height))
+    cells[0] = ord('o')
     x, y = 0, 0
-    spaces[x, y] = True
-    keepgoing = True
-    num_steps = 0
-    s = set()
-    while keepgoing:
-        choice_dir = random.choice(['down', 'up', 'right', 'left'])
-        old_num_steps = num_steps
-        s.add(choice_dir)
-        if choice_dir == 'down':
-            for i in range(random.randint(1, height / 2)):
-                if y + 1 < height and spaces[x, y + 1] == False:
-                    num_steps += 1
-                    y += 1
-                    spaces[x, y] = True
-        elif choice_dir == 'up':
-            for i in range(random.randint(1, height / 2)):
-                if y - 1 > 0 and spaces[x, y - 1] == False:
-                    num_steps += 1
-                    y -= 1
-                    spaces[x, y] = True
-        elif choice_dir == 'right':
-            for i in range(random.randint(1, width / 2)):
-                if x + 1 < width and spaces[x + 1, y] == False:
-                    num_steps += 1
-                    x += 1
-                    spaces[x, y] = True
-        elif choice_dir == 'left':
-            for i in range(random.randint(1, width / 2)):
-                if x - 1 > 0 and spaces[x - 1, y] == False:
-                    num_steps += 1
-                    x -= 1
-                    spaces[x, y] = True
-
-        if old_num_steps != num_steps:
-            s.clear()
-        elif len(s) == 4:
-            keepgoing = False
-
-        if num_steps > width * height - 20:
-            keepgoing = False
-
-    return spaces
+    steps = 0
+    # (dx, dy, longest run) for each direction
+    runs = [(-1, 0, max(1, width // 2)), (0, -1, max(1, height // 2)),
+            (1, 0, max(1, width // 2)), (0, 1, max(1, height // 2))]
+
+    def open_cell(x, y):
+        return 0 <= x < width and 0 <= y < height and (
+            cells[y * width + x] == block)
+
+    # A fraction rather than a number of cells, so small boards get a path
+    while steps < width * height * 4 // 5:
+        # Only the directions that can be taken, so there are no retries
+        choices = [run for run in runs if open_cell(x + run[0], y + run[1])]
+        if not choices:
+            break
+        dx, dy, longest = rng.choice(choices)
+        for _ in range(rng.randint(1, longest)):
+            if not open_cell(x + dx, y + dy):
+                break
+            x, y = x + dx, y + dy
+            cells[y * width + x] = tile
+            steps += 1
+    return subjunctive.level.Level(width, height, bytes(cells))
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
+    parser.add_argument('--solve', nargs='+', metavar='LEVEL',
+                        help="check that the level files can be solved, and "
+                             "list them from hardest to easiest")
+    parser.add_argument('--generate', type=int, metavar='COUNT',
+                        help="generate COUNT levels into a level pack")
+    parser.add_argument('--output', default='levels.sjl',
+                        help="level pack to write generated levels to")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="seed for generating levels")
+    parser.add_argument('--size', type=int, default=10,
+                        help="width and height of generated levels")
+    parser.add_argument('--processes', type=int,
+                        help="number of processes to generate or solve "
+                             "levels with")
+    parser.add_argument('--debug', action='store_true',
+                        help="log debugging messages")
     args = parser.parse_args()
-
-    grid = Grid(10, 10)
-    start_location = grid.top_left
-    world = World(grid)
-    player = Player(world)
-    world.place(player, start_location)
-
-    for (x, y), on_path in generate_level(10, 10).items():
-        loc = grid.Location(x, y)
-        if on_path:
-            if loc != start_location:
-                world.place(Tile(world), grid.Location(x, y))
-        else:
-            world.place(Block(world), grid.Location(x, y))
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO)
+
+    if args.generate:
+        start = time.perf_counter()
+        with open(args.output, 'wb') as f:
+            for _, level in subjunctive.generate.generate(
+                    generate_level, args.generate, args=(args.size, args.size),
+                    seed=args.seed, processes=args.processes):
+                subjunctive.level.write(f, level.width, level.height,
+                                        level.cells)
+        print("{} levels in {:.2f} s".format(args.generate,
+                                             time.perf_counter() - start))
+        raise SystemExit
+
+    if args.solve:
+        results = subjunctive.solver.solve_all(
+            load_puzzle, [(path,) for path in args.solve],
+            processes=args.processes)
+        for (path,), result in sorted(results,
+                                      key=lambda item: -item[1].states):
+            print("{}: {}".format(path, result))
+        raise SystemExit
+
+    world, player = World.from_level(generate_level(random.Random()),
+                                     DEFINITIONS, Player)
 
     def move_player(direction):
         player.move(direction)
+        if world.complete:
+            print("YOU WON")
 
     subjunctive.run(world, on_direction=move_player)
@@ -1,7 +1,6 @@
+import logging
 import os.path
-
-import sdl2
-import sdl2.ext
+import sys
 
 import subjunctive
 
@@ -36,7 +35,7 @@ class Planet(TitleScreen):
     def die(self):
         self.background = self.dead_background
         self.overlays.clear()
-        subjunctive.scheduler.call(self.show_continue, after='3s')
+        self.scheduler.call(self.show_continue, after='3s')
 
     def setup(self, cursor):
         self.place(cursor, self.grid.center)
@@ -119,8 +118,11 @@ class Recycle(subjunctive.entity.Entity):
     pushable = True
 
 if __name__ == '__main__':
+    logging.basicConfig(
+        level=logging.DEBUG if '--debug' in sys.argv else logging.INFO)
+
     ts = TitleScreen()
-    subjunctive.scheduler.call(ts.show_continue, after='3s')
+    ts.scheduler.call(ts.show_continue, after='3s')
     subjunctive.run(ts, on_select=subjunctive.exit)
 
     while True:
@@ -3,9 +3,15 @@ from setuptools import find_packages, setup
 setup(
     name='subjunctive',
     version='0.1',
+    python_requires='>=3.7',
     install_requires=[
-        'PySDL2 ==0.8.0',
+        # SDL_CreateRGBSurfaceWithFormat, used by subjunctive.render
+        'PySDL2 >=0.9.17',
     ],
+    extras_require={
+        # For subjunctive.arrays
+        'numpy': ['numpy'],
+    },
     packages=find_packages(),
     scripts=[
         'games/think-green/think-green.py',
@@ -1,55 +1,99 @@
-import sdl2
-import sdl2.ext
+import importlib
 
-from . import grid
-from . import entity
-from . import resource
-from . import scheduler
-from . import world
+from . import loop
+from .loop import SubjunctiveExit, exit
 
-class SubjunctiveExit(Exception):
-    pass
+# Submodules are imported when they are first used, so importing
+# subjunctive (say, for a tool that only needs levels) doesn't load SDL
+_SUBMODULES = {'aio', 'arrays', 'display', 'entity', 'game', 'generate',
+               'grid', 'headless', 'input', 'level', 'profile', 'record',
+               'render', 'resource', 'scheduler', 'server', 'solver',
+               'world'}
 
-def exit(*args, **kwargs):
-    raise SubjunctiveExit
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError("module {!r} has no attribute {!r}"
+                         "".format(__name__, name))
+
+def __dir__():
+    return sorted(globals().keys() | _SUBMODULES)
 
 window = None
-def run(world, *, on_direction=None, on_select=None):
-    global window
+_renderer = None
+stats = None
+def run(world, *, on_direction=None, on_select=None, on_tick=None,
+        tick_rate=50, frame_rate=None, accelerated=False, bindings=None,
+        record=None, replay=None):
+    """Show world in a window and run the game loop until exit() is called
 
-    if world.background is not None:
-        size = (world.background.w, world.background.h)
-    else:
-        size = (world.grid.width * world.tile_size[0],
-                world.grid.height * world.tile_size[1])
+    The world's scheduler (followed by on_tick, if given) is updated in
+    fixed steps of 1/tick_rate seconds, catching up if the loop falls
+    behind, and the world is drawn frame_rate times per second (by default,
+    once per tick).
+    Timing statistics for the run are kept in subjunctive.stats.
 
-    if window is None or window.size != size:
-        if window is not None:
-            window.hide()
-        window = sdl2.ext.Window(world.window_title, size)
-    window.show()
+    Between ticks the loop sleeps until the next key press, tick or frame
+    that has something to do.  Without on_tick, ticks with no scheduled
+    calls are skipped and frames are only drawn after something happened,
+    so a game waiting for input uses no CPU at all.
+
+    Keys are handled according to bindings (see input.BINDINGS).  If
+    record is a list, (tick, keysym) pairs are appended to it for the keys
+    pressed; passing them back as replay plays them again at the same
+    ticks instead of reading the keyboard, until they run out.  A
+    record.Recorder can be given as record to write them to a file.
+
+    If accelerated is True, the world is drawn with a render.Renderer
+    (which batches sprites through texture atlases, on the GPU if there is
+    one) instead of by blitting onto the window surface.
 
+    While a profile is running (see subjunctive.profile), the time spent
+    in each phase of the loop is recorded.
+    """
+    import logging
+    from . import input
+    from .game import Game
+
+    game = Game(world, on_direction=on_direction, on_select=on_select,
+                on_tick=on_tick, tick_rate=tick_rate, frame_rate=frame_rate,
+                accelerated=accelerated, bindings=bindings, record=record,
+                replay=replay)
     try:
         while True:
-            sdl2.timer.SDL_Delay(20)
-
-            events = sdl2.ext.get_events()
-            for event in events:
-                if event.type == sdl2.SDL_QUIT:
-                    raise KeyboardInterrupt
-                elif event.type == sdl2.SDL_KEYDOWN:
-                    sym = event.key.keysym.sym
-                    if on_direction is not None:
-                        direction = grid.KEYBOARD.get(sym)
-                        if direction is not None:
-                            on_direction(direction)
-                    if on_select is not None:
-                        if sym in [sdl2.SDLK_RETURN, sdl2.SDLK_SPACE]:
-                            on_select()
-
-            scheduler.update()
-            world._draw(window)
+            wake = game.step()
+            input.wait(None if wake is None else wake - loop.now())
     except SubjunctiveExit:
         pass
+    finally:
+        logging.debug("[run] %s", game.stats)
+
+def _show(world, accelerated):
+    """Show world in the window, making or resizing the window if need be
 
-sdl2.ext.init()
+    Return the window and the renderer (None unless accelerated).
+    """
+    global _renderer, window
+    from . import display, resource
+
+    display.init()
+    size = world._window_size()
+    if window is None or window.size != size:
+        if window is not None:
+            window.hide()
+            if _renderer is not None:
+                _renderer.destroy()
+                _renderer = None
+        window = display.Window(world.window_title, size)
+        if not accelerated:
+            resource.cache.set_format(
+                window.get_surface().format.contents.format)
+    window.show()
+    world._invalidate()
+    if accelerated and _renderer is None:
+        from . import render
+        _renderer = render.Renderer(window)
+    elif not accelerated and _renderer is not None:
+        _renderer.destroy()
+        _renderer = None
+    return window, _renderer
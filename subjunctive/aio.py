@@ -0,0 +1,72 @@
+"""Running games on an asyncio event loop
+
+aio.run() is run() as a coroutine, so a game can share its thread with
+network connections and other tasks:
+
+    async def main():
+        game = subjunctive.game.Game(world, on_direction=move)
+        bot = asyncio.create_task(play_remotely(game))
+        await subjunctive.aio.play(game)
+
+Other tasks can press keys with game.key(), or change the world and call
+game.changed() to have it drawn.  Coroutines can wait for game time with
+scheduler.sleep(), which makes entity behaviors easy to write:
+
+    async def patrol(guard):
+        while True:
+            for direction in [left, left, right, right]:
+                guard.move(direction)
+                await subjunctive.scheduler.sleep('500ms')
+
+The scheduler's next deadline and the next frame are turned into loop
+callbacks, so the loop sleeps in between.  SDL has nothing for asyncio to
+wait on, so the window is still polled for input: input_rate times per
+second, or idle_input_rate times once there has been no input for a
+second.  Nothing else happens until something is due.
+"""
+
+import asyncio
+
+from . import loop
+from .game import Game
+from .loop import SubjunctiveExit
+
+# Milliseconds without input before polling slows to idle_input_rate
+_IDLE_AFTER = 1000
+
+async def run(world, *, input_rate=60, idle_input_rate=10, **options):
+    """Show world in a window and run it until exit() is called
+
+    The options are those of subjunctive.run().
+    """
+    await play(Game(world, **options), input_rate=input_rate,
+               idle_input_rate=idle_input_rate)
+
+async def play(game, *, input_rate=60, idle_input_rate=10):
+    """Run game, a subjunctive.game.Game, until exit() is called"""
+    event_loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+    scheduler = game.scheduler
+    previous_on_change = scheduler.on_change
+    game.on_wake = scheduler.on_change = wake.set
+    poll_time, idle_poll_time = 1000 / input_rate, 1000 / idle_input_rate
+    try:
+        while True:
+            wake.clear()
+            next_step = game.step()
+            if loop.now() - game.input_time < _IDLE_AFTER:
+                delay = poll_time
+            else:
+                delay = idle_poll_time
+            if next_step is not None:
+                delay = min(delay, max(0, next_step - loop.now()))
+            timer = event_loop.call_later(delay / 1000, wake.set)
+            try:
+                await wake.wait()
+            finally:
+                timer.cancel()
+    except SubjunctiveExit:
+        pass
+    finally:
+        game.on_wake = None
+        scheduler.on_change = previous_on_change
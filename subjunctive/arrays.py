@@ -0,0 +1,193 @@
+"""NumPy arrays of a world's grid, for rules that look at the whole board
+
+This module needs NumPy, which Subjunctive doesn't otherwise require.  A
+WorldArray keeps arrays of the entity types and of chosen entity
+attributes in every cell up to date as the world changes, so that rules
+over a large board (counting, finding cells, cellular automata) can be
+written as array operations:
+
+    view = WorldArray(world)
+    crowded = view.neighbors(view.mask(Hazard)) >= 3
+    view.place(Hazard, crowded & view.empty())
+"""
+
+import contextlib
+
+import numpy
+
+class WorldArray:
+    """A NumPy view of a world's grid, kept in sync with the world
+
+    types is a (height, width) array holding the type ID of the entity in
+    each cell, or 0 for empty cells; type_id() gives the ID of each entity
+    type.  Arrays of entity attributes are made by state().  The arrays
+    are indexed [y, x] and updated in place, so they shouldn't be written
+    to directly; use place() and remove() to change the world in bulk.
+    """
+    def __init__(self, world):
+        self.world = world
+        self.shape = (world.grid.height, world.grid.width)
+        # Entity type -> ID, and the types in ID order (0 is empty)
+        self._ids = {}
+        self.id_types = [None]
+        # Attribute name -> (array, default)
+        self._states = {}
+        self.types = numpy.zeros(self.shape, numpy.int32)
+        for location, entity in world._entities.items():
+            self._put(entity, location)
+        world._views = world._views + (self,)
+        world._update_watching()
+
+    def close(self):
+        """Stop keeping the arrays in sync with the world"""
+        self.world._views = tuple(view for view in self.world._views
+                                  if view is not self)
+        self.world._update_watching()
+
+    def type_id(self, entity_type):
+        """Return the ID used in types for entity_type"""
+        try:
+            return self._ids[entity_type]
+        except KeyError:
+            type_id = self._ids[entity_type] = len(self.id_types)
+            self.id_types.append(entity_type)
+            return type_id
+
+    def state(self, name, default=0, dtype=numpy.int32):
+        """Return an array of each cell's entity's name attribute
+
+        Empty cells, and entities without the attribute, hold default.  The
+        array is kept up to date from then on.
+        """
+        try:
+            return self._states[name][0]
+        except KeyError:
+            pass
+        values = numpy.full(self.shape, default, dtype)
+        for location, entity in self.world._entities.items():
+            values[location.y, location.x] = getattr(entity, name, default)
+        self._states[name] = (values, default)
+        return values
+
+    def mask(self, entity_type):
+        """Return a boolean array of the cells holding entity_type entities
+
+        As with isinstance(), subclasses count, and entity_type may also be
+        a tuple of types.
+        """
+        ids = [type_id for cls, type_id in self._ids.items()
+               if issubclass(cls, entity_type)]
+        if len(ids) == 1:
+            return self.types == ids[0]
+        return numpy.isin(self.types, ids)
+
+    def empty(self):
+        """Return a boolean array of the empty cells"""
+        return self.types == 0
+
+    def count(self, entity_type):
+        """Return the number of entity_type entities, as with mask()"""
+        return int(numpy.count_nonzero(self.mask(entity_type)))
+
+    def counts(self):
+        """Return a dict of the number of entities of each (exact) type"""
+        counts = numpy.bincount(self.types.ravel(),
+                                minlength=len(self.id_types))
+        return {cls: int(count)
+                for cls, count in zip(self.id_types[1:], counts[1:]) if count}
+
+    def neighbors(self, mask, *, diagonal=True):
+        """Return an array of how many of each cell's neighbors are in mask
+
+        Neighbors are the 8 surrounding cells, or only the 4 orthogonal
+        ones if diagonal is False.  Cells beyond the edges don't count.
+        """
+        height, width = self.shape
+        padded = numpy.pad(numpy.asarray(mask, dtype=numpy.int8), 1)
+        counts = numpy.zeros(self.shape, numpy.int8)
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                if (dx or dy) and (diagonal or not (dx and dy)):
+                    counts += padded[1 + dy:1 + dy + height,
+                                     1 + dx:1 + dx + width]
+        return counts
+
+    def place(self, entity_type, mask):
+        """Create an entity_type in every empty cell where mask is true
+
+        Return a list of the new entities.
+        """
+        world = self.world
+        ys, xs = numpy.nonzero(numpy.logical_and(mask, self.types == 0))
+        locations = list(map(world.grid.Location, xs.tolist(), ys.tolist()))
+        # Update this view's arrays all at once afterwards
+        with self._detached():
+            # Make every entity before placing any, so that an error leaves
+            # the world as it was
+            entities = [entity_type(world) for _ in locations]
+            world._put_all(entities, locations)
+        self.types[ys, xs] = self.type_id(entity_type)
+        for name, (values, default) in self._states.items():
+            values[ys, xs] = [getattr(entity, name, default)
+                              for entity in entities]
+        return entities
+
+    def remove(self, mask):
+        """Remove the entities in every cell where mask is true
+
+        Return a list of the removed entities.
+        """
+        world = self.world
+        Location, take = world.grid.Location, world._take
+        ys, xs = numpy.nonzero(numpy.logical_and(mask, self.types != 0))
+        entities = [world.at(Location(x, y))
+                    for x, y in zip(xs.tolist(), ys.tolist())]
+        removed = 0
+        with self._detached():
+            try:
+                for entity in entities:
+                    take(entity)
+                    removed += 1
+            finally:
+                cells = ys[:removed], xs[:removed]
+                self.types[cells] = 0
+                for name, (values, default) in self._states.items():
+                    values[cells] = default
+        return entities
+
+    @contextlib.contextmanager
+    def _detached(self):
+        """Stop the world from updating this view for a while"""
+        views = self.world._views
+        self.world._views = tuple(view for view in views if view is not self)
+        try:
+            yield
+        finally:
+            self.world._views = views
+
+    # Called by the world
+
+    def _clear(self):
+        self.types[...] = 0
+        for name, (values, default) in self._states.items():
+            values[...] = default
+
+    def _put(self, entity, location):
+        y, x = location.y, location.x
+        self.types[y, x] = self.type_id(type(entity))
+        for name, (values, default) in self._states.items():
+            values[y, x] = getattr(entity, name, default)
+
+    def _take(self, entity, location):
+        y, x = location.y, location.x
+        self.types[y, x] = 0
+        for name, (values, default) in self._states.items():
+            values[y, x] = default
+
+    def _changed(self, entity, name):
+        try:
+            values, default = self._states[name]
+            location = self.world._locations[entity]
+        except KeyError:
+            return
+        values[location.y, location.x] = getattr(entity, name, default)
@@ -0,0 +1,56 @@
+"""The game window
+
+Window does the little that run() needs from sdl2.ext.Window, which takes
+a while to import (it brings in NumPy, among other things).  Anything with
+the same methods, including an sdl2.ext.Window, can be drawn into.
+"""
+
+import ctypes
+
+import sdl2
+
+def init():
+    """Initialize SDL's video subsystem, if it isn't already"""
+    if not sdl2.SDL_WasInit(sdl2.SDL_INIT_VIDEO):
+        if sdl2.SDL_InitSubSystem(sdl2.SDL_INIT_VIDEO) != 0:
+            raise RuntimeError("Couldn't initialize video: {}".format(
+                sdl2.SDL_GetError().decode(errors='replace')))
+
+class Window:
+    """A window, hidden until show() is called
+
+    window is the SDL_Window.
+    """
+    def __init__(self, title, size):
+        self.window = sdl2.SDL_CreateWindow(
+            title.encode(), sdl2.SDL_WINDOWPOS_UNDEFINED,
+            sdl2.SDL_WINDOWPOS_UNDEFINED, size[0], size[1],
+            sdl2.SDL_WINDOW_HIDDEN)
+        if not self.window:
+            raise RuntimeError("Couldn't create a window: {}".format(
+                sdl2.SDL_GetError().decode(errors='replace')))
+
+    @property
+    def size(self):
+        w, h = ctypes.c_int(), ctypes.c_int()
+        sdl2.SDL_GetWindowSize(self.window, ctypes.byref(w), ctypes.byref(h))
+        return w.value, h.value
+
+    def show(self):
+        sdl2.SDL_ShowWindow(self.window)
+
+    def hide(self):
+        sdl2.SDL_HideWindow(self.window)
+
+    def get_surface(self):
+        """Return the window's SDL_Surface, to draw on without a renderer"""
+        return sdl2.SDL_GetWindowSurface(self.window).contents
+
+    def refresh(self):
+        """Show what was drawn on the window surface"""
+        sdl2.SDL_UpdateWindowSurface(self.window)
+
+    def close(self):
+        if self.window:
+            sdl2.SDL_DestroyWindow(self.window)
+            self.window = None
@@ -4,6 +4,7 @@ from . import resource
 class Entity:
     image = resource.image('images/default.png')
     pushable = False
+    world = None
 
     def __init__(self, world, *, direction=grid.up, name=None):
         self.direction = direction
@@ -14,23 +15,53 @@ class Entity:
         return self.name
 
     def move(self, direction, *, orient=False):
+        """Move one cell in direction, pushing whatever is in the way
+
+        A line of pushable entities is worked out and moved in one go, so
+        it can be any length.  An entity that overrides push() (or move())
+        ends the line: its push() is called with the last entity of the
+        line as the pusher, and the line then moves as far as it can.
+        Return whether this entity moved.
+        """
         if orient:
             self.direction = direction
-        try:
-            new_location = self.world.locate(self).adjacent(direction)
-        except grid.OutOfBounds:
-            return
-        blocking_entity = self.world._entities.get(new_location)
-        if blocking_entity:
-            blocking_entity.push(direction, self)
-        if not self.world._entities[new_location]:
-            try:
-                self.world.remove(self)
-            except ValueError:
-                # This means someone else removed us, so give up
-                return
-            else:
-                self.world.place(self, new_location)
+        world = self.world
+        chain, targets = [self], []
+        pushed = False
+        start = location = world.locate(self)
+        while True:
+            location = location.neighbor(direction)
+            if location is None:
+                return False
+            blocking_entity = world.at(location)
+            targets.append(location)
+            if blocking_entity is None:
+                break
+            cls = type(blocking_entity)
+            if cls.push is not Entity.push or cls.move is not Entity.move:
+                blocking_entity.push(direction, chain[-1])
+                pushed = True
+                break
+            if not blocking_entity.pushable:
+                return False
+            chain.append(blocking_entity)
+
+        if not pushed:
+            # Nothing else has changed, and there's room at the end
+            world._shift(list(zip(chain, targets)))
+            return True
+        # Each entity moves if the one ahead of it moved (or disappeared)
+        moves = []
+        for entity, target in zip(reversed(chain), reversed(targets)):
+            if entity not in world._locations:
+                # This means someone else removed it
+                continue
+            occupant = world.at(target)
+            if occupant is None or moves and occupant is moves[-1][0]:
+                moves.append((entity, target))
+        world._shift(moves)
+        # push() may have moved this entity itself (or removed it)
+        return world._locations.get(self, start) is not start
 
     def push(self, direction, pusher=None):
         """Return what should happen when the entity is pushed
@@ -46,3 +77,32 @@ def directional(**images):
     def image(self):
         return images[self.direction.name]
     return image
+
+def _watched_setattr(self, name, value):
+    """Entity.__setattr__ while some world has snapshots or views"""
+    # Let the world undo the change if it has snapshots, and keep its
+    # views up to date
+    world = self.world
+    if world is not None and world._journal is not None:
+        world._record(self, name)
+    object.__setattr__(self, name, value)
+    if world is not None and world._views:
+        for view in world._views:
+            view._changed(self, name)
+
+# How many worlds need to hear about attributes assigned on their entities
+_watchers = 0
+
+def _watch(watchers):
+    """Add watchers (or take them away, if negative) to the worlds watching
+
+    Attribute assignments only go through _watched_setattr() while there
+    are any, so that they cost nothing extra the rest of the time.  A
+    world that is thrown away while watching keeps counting.
+    """
+    global _watchers
+    _watchers += watchers
+    if _watchers and '__setattr__' not in vars(Entity):
+        Entity.__setattr__ = _watched_setattr
+    elif not _watchers and '__setattr__' in vars(Entity):
+        del Entity.__setattr__
@@ -0,0 +1,148 @@
+"""A world running in the window, one pass of the game loop at a time
+
+run() and aio.run() share everything but the waiting: each makes a Game
+and calls step() over and over, sleeping in between until the time step()
+returns (or until something happens).
+"""
+
+import sdl2
+
+from . import input
+from . import loop
+from . import profile
+
+class Game:
+    """The state of the game loop between steps
+
+    The arguments are those of run(); scheduler defaults to the world's.
+    Creating a Game shows the window.
+    """
+    def __init__(self, world, *, on_direction=None, on_select=None,
+                 on_tick=None, tick_rate=50, frame_rate=None,
+                 accelerated=False, bindings=None, record=None, replay=None,
+                 scheduler=None):
+        import subjunctive
+        self.world = world
+        self.on_direction = on_direction
+        self.on_select = on_select
+        self.on_tick = on_tick
+        self.bindings = bindings
+        self.record = record
+        self.replay = None if replay is None else input.Replay(replay)
+        self.scheduler = world.scheduler if scheduler is None else scheduler
+        # Called when something needs a step sooner than step() said
+        self.on_wake = None
+        self.window, self.renderer = subjunctive._show(world, accelerated)
+        self.clock = loop.Clock(tick_rate, frame_rate)
+        # The scheduler's time carries on from wherever it was left
+        self._scheduler_start = self.scheduler.time
+        self.stats = subjunctive.stats = self.clock.stats
+        self.clock.start(loop.now())
+        # The time the window last had input, for loops that poll it
+        self.input_time = self.clock.time
+        self._work_time = 0
+        # Whether anything may have changed since the last frame
+        self._changed = True
+
+    def key(self, sym):
+        """Handle the key sym as if it was pressed
+
+        Keys are ignored while a replay is playing.
+        """
+        self._key(sym)
+        if self.on_wake is not None:
+            self.on_wake()
+
+    def changed(self):
+        """Make the next step draw a frame, for changes made from outside"""
+        self._changed = True
+        if self.on_wake is not None:
+            self.on_wake()
+
+    def _key(self, sym):
+        if self.replay is not None:
+            return
+        if self.record is not None:
+            self.record.append((self.clock.tick, sym))
+        self._handle_key(sym)
+        self._changed = True
+
+    def _handle_key(self, sym):
+        input.handle_key(sym, on_direction=self.on_direction,
+                         on_select=self.on_select, bindings=self.bindings)
+
+    def step(self):
+        """Handle input, run the ticks that are due and draw if need be
+
+        Return the time (as loop.now() counts it) of the next step, or
+        None if nothing will happen until there is input.
+        """
+        clock, scheduler, world = self.clock, self.scheduler, self.world
+        start = loop.now()
+        # Every tick counts while replaying, since keys are due at them
+        idle_ticks = self.on_tick is None and self.replay is None
+        if idle_ticks:
+            deadline = scheduler.next_deadline()
+            clock.skip(start if deadline is None
+                       else min(start, self._loop_time(deadline)))
+
+        with profile.phase('input'):
+            events = input.events()
+            if events:
+                self.input_time = start
+            for event in events:
+                if event.type == sdl2.SDL_QUIT:
+                    raise KeyboardInterrupt
+                elif event.type == sdl2.SDL_KEYDOWN:
+                    self._key(event.key.keysym.sym)
+                elif (event.type == sdl2.SDL_WINDOWEVENT and
+                      event.window.event == sdl2.SDL_WINDOWEVENT_EXPOSED):
+                    world._invalidate()
+                    self._changed = True
+
+        for _ in clock.ticks(start):
+            if self.replay is not None:
+                with profile.phase('input'):
+                    for sym in self.replay.due(clock.tick):
+                        self._handle_key(sym)
+                        self._changed = True
+                if self.replay.finished:
+                    self.replay = None
+            with profile.phase('scheduler'):
+                calls = scheduler.update(
+                    self._scheduler_start + clock.game_time)
+            if calls:
+                profile.count('calls', calls)
+                self._changed = True
+            if self.on_tick is not None:
+                with profile.phase('logic'):
+                    self.on_tick()
+                self._changed = True
+
+        if self._changed and clock.frame_due(start):
+            with profile.phase('draw'):
+                if self.renderer is not None:
+                    self.renderer.draw(world)
+                else:
+                    world._draw(self.window)
+            self._changed = False
+            self.stats.record_frame(self._work_time + loop.now() - start)
+            self._work_time = 0
+            profile.end_frame(None if self.renderer is not None
+                              else self.window, world)
+        else:
+            self._work_time += loop.now() - start
+
+        if not idle_ticks:
+            wake = clock.next_tick
+        else:
+            deadline = scheduler.next_deadline()
+            wake = (None if deadline is None
+                    else clock.tick_at(self._loop_time(deadline)))
+        if self._changed and (wake is None or clock.next_frame < wake):
+            wake = clock.next_frame
+        return wake
+
+    def _loop_time(self, scheduler_time):
+        """Return the loop time at which the scheduler reaches a time"""
+        return self.clock.at(scheduler_time - self._scheduler_start)
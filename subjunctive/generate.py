@@ -0,0 +1,68 @@
+"""Generating levels in bulk
+
+generate() streams candidate levels from a level-making function, spread
+over worker processes.  Every candidate gets its own random generator,
+seeded from the run's seed and the candidate's index, so a run can be
+repeated exactly (or a single level remade) with any number of processes.
+The levels can be written straight into a level pack with level.write().
+"""
+
+import collections
+import itertools
+import multiprocessing
+import os
+import random
+import signal
+
+def rng(seed, index):
+    """Return the random.Random used for candidate index of a run"""
+    return random.Random("{}:{}".format(seed, index))
+
+def generate(make_level, count=None, *, args=(), seed=0, keep=None,
+             processes=None, chunk_size=100):
+    """Yield (index, level) for the levels made by make_level(rng, *args)
+
+    make_level returns a level.Level, or None to reject the candidate; if
+    keep is given, only the levels for which keep(level) is true are
+    yielded.  count candidates are made (forever, if count is None), in
+    chunks of chunk_size per worker task, and the levels are yielded in
+    order.  make_level, args and keep must be picklable unless processes
+    is 1, in which case everything is done in this process.
+    """
+    if count is None:
+        starts = itertools.count(0, chunk_size)
+    else:
+        starts = range(0, count, chunk_size)
+    tasks = ((make_level, args, seed, keep, start,
+              start + chunk_size if count is None
+              else min(start + chunk_size, count))
+             for start in starts)
+    if processes == 1:
+        for task in tasks:
+            yield from _make_levels(task)
+        return
+
+    processes = processes or os.cpu_count() or 1
+    with multiprocessing.Pool(processes, _init_worker) as pool:
+        # Keep every worker busy without queueing up an endless run
+        pending = collections.deque()
+        for task in tasks:
+            pending.append(pool.apply_async(_make_levels, (task,)))
+            if len(pending) >= processes * 2:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
+
+def _init_worker():
+    # SDL turns SIGTERM into a quit event once a window has been shown,
+    # which would keep the pool from stopping a forked worker
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+def _make_levels(task):
+    make_level, args, seed, keep, start, stop = task
+    levels = []
+    for index in range(start, stop):
+        level = make_level(rng(seed, index), *args)
+        if level is not None and (keep is None or keep(level)):
+            levels.append((index, level))
+    return levels
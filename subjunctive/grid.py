@@ -1,5 +1,3 @@
-import sdl2
-
 class Direction:
     def __init__(self, name, value, number_of_directions):
         self._number_of_directions = number_of_directions
@@ -13,16 +11,101 @@ class Direction:
         "Return the number of clockwise 90° rotations between self and other"
         return (self._value - other._value) % self._number_of_directions
 
+    @property
+    def delta(self):
+        """The (dx, dy) of a step in this direction"""
+        return _DELTAS[self._value]
+
 class Grid:
     def __init__(self, width, height, offset_x=None, offset_y=None):
         self.width = width
         self.height = height
         self.Location = _make_location_class(self, (width, height))
+        self._locations = None
+
+    def __reduce__(self):
+        return self.__class__, (self.width, self.height)
 
     def __iter__(self):
-        for x in range(self.width):
-            for y in range(self.height):
-                yield self.Location(x, y)
+        if self._locations is None:
+            self._locations = [self.Location(x, y)
+                               for x in range(self.width)
+                               for y in range(self.height)]
+        return iter(self._locations)
+
+    def get(self, x, y):
+        """Return the Location (x, y), or None if it is off the grid"""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.Location(x, y)
+        return None
+
+    def rect(self, x, y, width, height):
+        """Return the locations in a rectangle, row by row
+
+        The rectangle has its top left corner at (x, y); the part of it
+        that is off the grid is left out.
+        """
+        return self._locations_in(self._rect_spans(x, y, width, height))
+
+    def near(self, location, radius=1, metric='manhattan'):
+        """Return the locations within radius of location, row by row
+
+        metric is 'manhattan' (steps along the grid, so radius 1 is the
+        four adjacent cells) or 'chebyshev' (steps that can be diagonal,
+        so radius 1 is the eight surrounding cells).  location itself is
+        left out.
+        """
+        return [near for near in
+                self._locations_in(self._near_spans(location, radius, metric))
+                if near is not location]
+
+    def ray(self, location, direction, distance=None):
+        """Return the locations from location in direction, nearest first
+
+        The ray stops at the edge of the grid, or after distance steps.
+        """
+        dx, dy = direction.delta
+        steps = self._steps_to_edge(location, dx, dy)
+        if distance is not None:
+            steps = min(steps, distance)
+        x, y, Location = location.x, location.y, self.Location
+        return [Location(x + dx * step, y + dy * step)
+                for step in range(1, steps + 1)]
+
+    def _steps_to_edge(self, location, dx, dy):
+        """Return how many steps of (dx, dy) from location stay on the grid"""
+        if dx:
+            return self.width - 1 - location.x if dx > 0 else location.x
+        return self.height - 1 - location.y if dy > 0 else location.y
+
+    def _rect_spans(self, x, y, width, height):
+        """Return (y, x1, x2) for each row of a rectangle, clipped"""
+        x1, x2 = max(0, x), min(self.width - 1, x + width - 1)
+        if x1 > x2:
+            return []
+        return [(row, x1, x2) for row in
+                range(max(0, y), min(self.height, y + height))]
+
+    def _near_spans(self, location, radius, metric):
+        """Return (y, x1, x2) for each row of a neighborhood, clipped"""
+        if metric == 'chebyshev':
+            return self._rect_spans(location.x - radius, location.y - radius,
+                                    2 * radius + 1, 2 * radius + 1)
+        if metric != 'manhattan':
+            raise ValueError("Unknown metric {!r}".format(metric))
+        x, y = location.x, location.y
+        spans = []
+        for row in range(max(0, y - radius), min(self.height, y + radius + 1)):
+            reach = radius - abs(row - y)
+            x1, x2 = max(0, x - reach), min(self.width - 1, x + reach)
+            if x1 <= x2:
+                spans.append((row, x1, x2))
+        return spans
+
+    def _locations_in(self, spans):
+        Location = self.Location
+        return [Location(x, y) for y, x1, x2 in spans
+                for x in range(x1, x2 + 1)]
 
     @property
     def bottom_left(self):
@@ -47,53 +130,95 @@ class Grid:
 class OutOfBounds(Exception):
     pass
 
+def _location(grid, x, y):
+    """Return grid's Location (x, y); used to unpickle locations"""
+    return grid.Location(x, y)
+
 def _make_location_class(parent, grid_size):
     """Make a specialized Location class that validates its input
 
     Instances of the returned class will raise an exception if they are
     constructed with values that are out-of-bounds.
 
+    Locations are interned: constructing the same coordinates twice returns
+    the same object, which also remembers its neighbors once they have been
+    looked up, so adjacent() is a list lookup after the first call.
     """
+    interned = {}
+
     class Location:
-        __slots__ = ['__x', '__y']
+        __slots__ = ['x', 'y', '_hash', '_neighbors']
         max = grid_size
 
+        def __new__(cls, x, y):
+            location = interned.get((x, y))
+            if location is not None:
+                return location
+            if not (isinstance(x, int) and isinstance(y, int)):
+                raise TypeError("Location object needs integers")
+            if not 0 <= x < cls.max[0] or not 0 <= y < cls.max[1]:
+                raise OutOfBounds
+            location = object.__new__(cls)
+            set_attribute = object.__setattr__
+            set_attribute(location, 'x', x)
+            set_attribute(location, 'y', y)
+            set_attribute(location, '_hash', hash((x, y)))
+            set_attribute(location, '_neighbors', [None, None, None, None])
+            interned[x, y] = location
+            return location
+
         def __eq__(self, other):
-            return self.x == other.x and self.y == other.y
+            return self is other or (self.x == other.x and self.y == other.y)
 
         def __hash__(self):
-            return hash((self.x, self.y))
+            return self._hash
 
-        def __init__(self, x, y):
-            if not (isinstance(x, int) and isinstance(y, int)):
-                raise TypeError("Location object needs integers")
-            if not 0 <= x < self.max[0] or not 0 <= y < self.max[1]:
-                raise OutOfBounds
-            self.__x = x
-            self.__y = y
+        def __reduce__(self):
+            # The class is made per grid, so it can't be pickled by name
+            return _location, (parent, self.x, self.y)
+
+        def __copy__(self):
+            return self
+
+        def __deepcopy__(self, memo):
+            return self
 
         def __repr__(self):
             return "Location({}, {})".format(self.x, self.y)
 
-        @property
-        def x(self):
-            return self.__x
-
-        @property
-        def y(self):
-            return self.__y
+        def __setattr__(self, name, value):
+            raise AttributeError("Location objects are immutable")
 
         def adjacent(self, direction):
-            if direction == left:
-                return self.__class__(self.x - 1, self.y)
-            elif direction == down:
-                return self.__class__(self.x, self.y + 1)
-            elif direction == up:
-                return self.__class__(self.x, self.y - 1)
-            elif direction == right:
-                return self.__class__(self.x + 1, self.y)
-            else:
-                raise ValueError("Invalid direction: {}".format(direction_))
+            """Return the next location in direction
+
+            OutOfBounds is raised at the edge of the grid.
+            """
+            try:
+                neighbor = self._neighbors[direction._value]
+            except AttributeError:
+                raise ValueError("Invalid direction: {}".format(direction))
+            if not neighbor:
+                neighbor = self.neighbor(direction)
+                if neighbor is None:
+                    raise OutOfBounds
+            return neighbor
+
+        def neighbor(self, direction):
+            """Return the next location in direction, or None at the edge"""
+            try:
+                neighbor = self._neighbors[direction._value]
+            except AttributeError:
+                raise ValueError("Invalid direction: {}".format(direction))
+            if neighbor is None:
+                dx, dy = _DELTAS[direction._value]
+                x, y = self.x + dx, self.y + dy
+                if 0 <= x < self.max[0] and 0 <= y < self.max[1]:
+                    neighbor = self.__class__(x, y)
+                else:
+                    neighbor = False
+                self._neighbors[direction._value] = neighbor
+            return neighbor or None
 
     Location.__qualname__ = parent.__class__.__qualname__ + ".Location"
     return Location
@@ -103,7 +228,13 @@ up = Direction('up', 1, 4)
 right = Direction('right', 2, 4)
 down = Direction('down', 3, 4)
 
-KEYBOARD = {sdl2.SDLK_LEFT: left,
-            sdl2.SDLK_UP: up,
-            sdl2.SDLK_RIGHT: right,
-            sdl2.SDLK_DOWN: down}
+# (dx, dy) for each direction, indexed by Direction._value
+_DELTAS = [(-1, 0), (0, -1), (1, 0), (0, 1)]
+
+def __getattr__(name):
+    # The arrow key bindings moved to input, so that grids don't need SDL
+    if name == 'KEYBOARD':
+        from .input import DIRECTION_KEYS
+        return DIRECTION_KEYS
+    raise AttributeError("module {!r} has no attribute {!r}"
+                         "".format(__name__, name))
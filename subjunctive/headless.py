@@ -0,0 +1,96 @@
+"""Running worlds without a window
+
+A Simulation drives a world the same way run() does, except that nothing
+is shown, time only passes when step() is called, and input is injected
+by calling methods.  The SDL video subsystem is never initialized, so
+this works on machines without a display.
+"""
+
+import sdl2
+
+from . import input
+from . import profile
+from .loop import SubjunctiveExit
+
+class Simulation:
+    """Advance a world tick by tick, as fast as the CPU allows
+
+    The handlers and bindings are the same as those given to run().  The
+    simulation drives scheduler (by default, the world's) with its own
+    clock, time, which starts at 0 and advances 1/tick_rate seconds per
+    tick; the scheduler's time carries on from where it was.
+    If record is given, (tick, keysym) pairs are appended to it for the
+    keys passed to key(), as by run().
+    """
+    def __init__(self, world, *, on_direction=None, on_select=None,
+                 on_tick=None, tick_rate=50, scheduler=None, bindings=None,
+                 record=None):
+        self.world = world
+        self.on_direction = on_direction
+        self.on_select = on_select
+        self.on_tick = on_tick
+        self.bindings = bindings
+        self.record = record
+        self.scheduler = world.scheduler if scheduler is None else scheduler
+        self.tick_length = 1000 / tick_rate
+        self.ticks = 0
+        self.time = 0
+        self.finished = False
+        self._scheduler_start = self.scheduler.time
+
+    def direction(self, direction):
+        """Act as if a direction key was pressed"""
+        if self.on_direction is not None and not self.finished:
+            self._handle(self.on_direction, direction)
+
+    def key(self, sym):
+        """Act as if the key with the given SDL keysym was pressed"""
+        if not self.finished:
+            if self.record is not None:
+                self.record.append((self.ticks, sym))
+            self._handle(input.handle_key, sym, on_direction=self.on_direction,
+                         on_select=self.on_select, bindings=self.bindings)
+
+    def select(self):
+        """Act as if a select key (return or space) was pressed"""
+        if self.on_select is not None and not self.finished:
+            self._handle(self.on_select)
+
+    def snapshot(self, path=None):
+        """Draw the world onto a new offscreen surface and return it
+
+        If path is given, the surface is also saved there as a BMP file.
+        The caller owns the surface and should free it with
+        sdl2.SDL_FreeSurface.
+        """
+        width, height = self.world._window_size()
+        surface = sdl2.SDL_CreateRGBSurface(0, width, height, 32, 0, 0, 0, 0)
+        self.world._redraw(surface.contents, None)
+        sdl2.SDL_SetClipRect(surface, None)
+        if path is not None:
+            sdl2.SDL_SaveBMP(surface, path.encode())
+        return surface
+
+    def step(self, ticks=1):
+        """Advance the simulation by ticks ticks
+
+        Return False once the game has called subjunctive.exit().
+        """
+        for _ in range(ticks):
+            if self.finished:
+                break
+            self.ticks += 1
+            self.time = self.ticks * self.tick_length
+            with profile.phase('scheduler'):
+                self._handle(self.scheduler.update,
+                             self._scheduler_start + self.time)
+            if self.on_tick is not None:
+                with profile.phase('logic'):
+                    self._handle(self.on_tick)
+        return not self.finished
+
+    def _handle(self, function, *args, **kwargs):
+        try:
+            function(*args, **kwargs)
+        except SubjunctiveExit:
+            self.finished = True
@@ -0,0 +1,95 @@
+"""Turning key presses into game actions
+
+A binding table maps SDL keysyms to actions: a grid direction, SELECT, or
+any function to call.  BINDINGS holds the default bindings (the arrow keys
+and return/space); games can pass their own table to run(), for example
+
+    bindings = {**input.BINDINGS, sdl2.SDLK_w: grid.up, sdl2.SDLK_p: pause}
+
+Key presses can also be recorded and replayed: see Replay.
+"""
+
+import ctypes
+
+import sdl2
+
+from . import grid
+
+SELECT = 'select'
+DIRECTION_KEYS = {sdl2.SDLK_LEFT: grid.left,
+                  sdl2.SDLK_UP: grid.up,
+                  sdl2.SDLK_RIGHT: grid.right,
+                  sdl2.SDLK_DOWN: grid.down}
+SELECT_KEYS = {sdl2.SDLK_RETURN, sdl2.SDLK_SPACE}
+
+BINDINGS = dict(DIRECTION_KEYS)
+BINDINGS.update(dict.fromkeys(SELECT_KEYS, SELECT))
+
+def handle_key(sym, *, on_direction=None, on_select=None, bindings=None):
+    """Call the handler (if any) that the key sym is bound to
+
+    bindings is a binding table; it defaults to BINDINGS.  Return whether
+    the key is bound to anything.
+    """
+    action = (BINDINGS if bindings is None else bindings).get(sym)
+    if action is None:
+        return False
+    if action == SELECT:
+        if on_select is not None:
+            on_select()
+    elif isinstance(action, grid.Direction):
+        if on_direction is not None:
+            on_direction(action)
+    else:
+        action()
+    return True
+
+def events():
+    """Return all the events waiting in the SDL event queue
+
+    Everything that happened since the last call is handled as one batch,
+    so a burst of input costs at most one frame.
+    """
+    sdl2.SDL_PumpEvents()
+    events = []
+    while True:
+        batch = (sdl2.SDL_Event * 16)()
+        count = sdl2.SDL_PeepEvents(
+            ctypes.cast(batch, ctypes.POINTER(sdl2.SDL_Event)), len(batch),
+            sdl2.SDL_GETEVENT, sdl2.SDL_FIRSTEVENT, sdl2.SDL_LASTEVENT)
+        events.extend(batch[:max(count, 0)])
+        if count < len(batch):
+            return events
+
+def wait(timeout=None):
+    """Sleep until an event arrives, or for at most timeout milliseconds
+
+    The event is left in the queue for events().  With no timeout, wait
+    for as long as it takes.
+    """
+    if timeout is None:
+        sdl2.SDL_WaitEvent(None)
+    elif timeout > 0:
+        sdl2.SDL_WaitEventTimeout(None, -int(-timeout // 1))
+
+class Replay:
+    """Key presses to play back in place of the keyboard
+
+    keys is an iterable of (tick, sym) pairs in order, like those recorded
+    by run(record=...): each key is handled after that many ticks of the
+    run, just as it was when it was recorded.  Given the same starting
+    world (and random seed), the game plays out the same way.
+    """
+    def __init__(self, keys):
+        self._keys = iter(keys)
+        self._next = next(self._keys, None)
+
+    @property
+    def finished(self):
+        return self._next is None
+
+    def due(self, tick):
+        """Yield the keys that were pressed before tick ran"""
+        while self._next is not None and self._next[0] < tick:
+            yield self._next[1]
+            self._next = next(self._keys, None)
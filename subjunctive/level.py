@@ -0,0 +1,124 @@
+"""Level files
+
+Levels are written as text: one character per cell, one line per row,
+with the meaning of each character given by the game (see World.load).
+For big levels, compile() turns a text level into a binary file holding a
+small header followed by one byte per cell, row by row.  Binary levels
+are memory-mapped when loaded, so only the cells that hold something are
+ever looked at from Python.  Binary levels can also be written one after
+another into a single file (a level pack), which read_all() reads back.
+
+To compile a level from the command line:
+
+    $ python -m subjunctive.level level.txt level.sjl
+"""
+
+import argparse
+import mmap
+import re
+import struct
+
+MAGIC = b'SJLV'
+VERSION = 1
+# Magic, version, width, height
+HEADER = struct.Struct('<4sHII')
+
+class Level:
+    """The cells of a level, one byte (character) per cell
+
+    cells is a bytes-like object; the cell at (x, y) is the byte at
+    start + y * width + x.
+    """
+    def __init__(self, width, height, cells, start=0):
+        self.width = width
+        self.height = height
+        self.cells = cells
+        self.start = start
+
+    def close(self):
+        """Release the memory map, if the level has one"""
+        if isinstance(self.cells, mmap.mmap):
+            self.cells.close()
+
+    def find(self, chars):
+        """Yield the index (y * width + x) of every cell holding one of chars
+
+        chars is a bytes object.
+        """
+        pattern = re.compile(b'[' + re.escape(chars) + b']')
+        start = self.start
+        # cells may go on past the level, into the next one in a pack
+        for match in pattern.finditer(self.cells, start,
+                                      start + self.width * self.height):
+            yield match.start() - start
+
+    def undefined(self, chars):
+        """Return the set of characters used in the level that aren't in chars"""
+        cells = self.cells[self.start:self.start + self.width * self.height]
+        return set(cells.translate(None, chars))
+
+def read(f):
+    """Read a level from the open binary file f
+
+    Binary levels are memory-mapped; text levels are read into memory.
+    """
+    header = f.read(HEADER.size)
+    if header[:len(MAGIC)] == MAGIC:
+        magic, version, width, height = HEADER.unpack(header)
+        if version != VERSION:
+            raise ValueError("Unsupported level version {}".format(version))
+        cells = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(cells) < HEADER.size + width * height:
+            raise ValueError("Level file is truncated")
+        return Level(width, height, cells, HEADER.size)
+    return read_text(header + f.read())
+
+def read_all(f):
+    """Yield each level of the open binary level pack f"""
+    while True:
+        header = f.read(HEADER.size)
+        if not header:
+            return
+        if len(header) < HEADER.size or header[:len(MAGIC)] != MAGIC:
+            raise ValueError("Not a binary level")
+        magic, version, width, height = HEADER.unpack(header)
+        if version != VERSION:
+            raise ValueError("Unsupported level version {}".format(version))
+        cells = f.read(width * height)
+        if len(cells) < width * height:
+            raise ValueError("Level file is truncated")
+        yield Level(width, height, cells)
+
+def read_text(data):
+    """Return a Level from the contents of a text level file"""
+    lines = [line for line in map(bytes.strip, data.splitlines())
+             if line != b'']
+    width, height = len(lines[0]), len(lines)
+    for number, line in enumerate(lines, start=1):
+        if len(line) != width:
+            raise ValueError("Row {} of the level is {} cells wide instead "
+                             "of {}".format(number, len(line), width))
+    return Level(width, height, b''.join(lines))
+
+def write(f, width, height, cells):
+    """Write a binary level to the open binary file f"""
+    if len(cells) != width * height:
+        raise ValueError("Expected {} cells, got {}"
+                         "".format(width * height, len(cells)))
+    f.write(HEADER.pack(MAGIC, VERSION, width, height))
+    f.write(cells)
+
+def compile(text_path, binary_path):
+    """Compile the text level at text_path into a binary level"""
+    with open(text_path, 'rb') as f:
+        level = read_text(f.read())
+    with open(binary_path, 'wb') as f:
+        write(f, level.width, level.height, level.cells)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Compile a text level into a binary level")
+    parser.add_argument('text_level')
+    parser.add_argument('binary_level')
+    args = parser.parse_args()
+    compile(args.text_level, args.binary_level)
@@ -0,0 +1,149 @@
+"""Timing for the game loop
+
+The simulation advances in fixed steps (ticks) while frames are drawn at
+their own rate, so the amount of drawing doesn't change how fast the game
+runs.  All times are in milliseconds.
+"""
+
+import collections
+import math
+import time
+
+class SubjunctiveExit(Exception):
+    pass
+
+def exit(*args, **kwargs):
+    """Stop the running game loop"""
+    raise SubjunctiveExit
+
+def now():
+    """Return the current time in (fractional) milliseconds"""
+    return time.perf_counter() * 1000
+
+class Clock:
+    """Decide when the loop should tick and when it should draw
+
+    tick_rate and frame_rate are per second; frame_rate defaults to the
+    tick rate.  If the loop falls behind by more than max_steps ticks, the
+    extra ticks are dropped rather than run in a burst.
+
+    tick counts the tick lengths since the start, including ticks that were
+    skipped (which had nothing to do) but not those that were dropped, so
+    game time stands still over a stall instead of jumping ahead.  The
+    game time, game_time, is worked out from it rather than from the
+    loop's time, so that it comes out the same however the ticks were
+    timed (as it does in a headless.Simulation).
+    """
+    def __init__(self, tick_rate=50, frame_rate=None, *, max_steps=5):
+        self.tick_length = 1000 / tick_rate
+        self.frame_length = 1000 / (frame_rate or tick_rate)
+        self.max_steps = max_steps
+        self.stats = Stats()
+        self.time = None
+        self.tick = 0
+        self._next_frame = None
+
+    def start(self, time):
+        """Start counting ticks and frames from time"""
+        self.time = time
+        self.tick = 0
+        self._next_frame = time
+
+    @property
+    def next_tick(self):
+        """The time the next tick is due"""
+        return self.time + self.tick_length
+
+    @property
+    def game_time(self):
+        """The time in the game after the ticks so far, starting from 0"""
+        return self.tick * self.tick_length
+
+    def at(self, game_time):
+        """Return the loop time at which the game reaches game_time"""
+        return self.time + game_time - self.game_time
+
+    @property
+    def next_frame(self):
+        """The time the next frame is due"""
+        return self._next_frame
+
+    def ticks(self, time):
+        """Yield the simulation time of each tick that is due at time"""
+        due = int((time - self.time) // self.tick_length)
+        if due > self.max_steps:
+            skipped = due - self.max_steps
+            self.stats.dropped_ticks += skipped
+            self.time += skipped * self.tick_length
+            due = self.max_steps
+        for _ in range(due):
+            self.time += self.tick_length
+            self.tick += 1
+            self.stats.ticks += 1
+            yield self.time
+
+    def skip(self, time):
+        """Pass over the ticks before time without running them
+
+        This is for ticks that would have nothing to do, so unlike dropped
+        ticks they aren't counted anywhere.  The last tick before time is
+        left to run, so it can catch up on anything that came up meanwhile.
+        """
+        if time <= self.next_tick:
+            return
+        skipped = math.ceil((time - self.time) / self.tick_length) - 2
+        if skipped > 0:
+            self.time += skipped * self.tick_length
+            self.tick += skipped
+
+    def tick_at(self, time):
+        """Return the time of the first tick at or after time"""
+        if time <= self.next_tick:
+            return self.next_tick
+        due = math.ceil((time - self.time) / self.tick_length)
+        return self.time + due * self.tick_length
+
+    def frame_due(self, time):
+        """Return whether a frame should be drawn at time"""
+        if time < self._next_frame:
+            return False
+        self._next_frame += self.frame_length
+        if self._next_frame <= time:
+            # Too far behind; don't try to make up for lost frames
+            self._next_frame = time + self.frame_length
+        return True
+
+    def wait_time(self, time):
+        """Return how long to wait from time until the next tick or frame"""
+        next_event = min(self.time + self.tick_length, self._next_frame)
+        return max(0, next_event - time)
+
+class Stats:
+    """Timing statistics for the frames of a loop
+
+    frame_times holds how long each recent frame took (ticks and drawing,
+    not waiting), in milliseconds.
+    """
+    def __init__(self, history=120):
+        self.frames = 0
+        self.ticks = 0
+        self.dropped_ticks = 0
+        self.frame_times = collections.deque(maxlen=history)
+        self.max_frame_time = 0
+
+    def __str__(self):
+        return ("{} frames, {} ticks ({} dropped); frame time "
+                "{:.2f} ms average, {:.2f} ms max"
+                "".format(self.frames, self.ticks, self.dropped_ticks,
+                          self.average_frame_time, self.max_frame_time))
+
+    @property
+    def average_frame_time(self):
+        if not self.frame_times:
+            return 0
+        return sum(self.frame_times) / len(self.frame_times)
+
+    def record_frame(self, frame_time):
+        self.frames += 1
+        self.frame_times.append(frame_time)
+        self.max_frame_time = max(self.max_frame_time, frame_time)
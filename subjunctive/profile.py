@@ -0,0 +1,185 @@
+"""Finding out where the time of each frame goes
+
+While a profile is running, run() times the phases of each loop (input,
+scheduler, logic for on_tick, and draw) and counts the scheduled calls
+made, the blits drawn, and the calls to Entity.move and World.locate:
+
+    profile = subjunctive.profile.start(trace=True)
+    subjunctive.run(world, ...)
+    print(subjunctive.profile.stop())
+    profile.write_trace('trace.json')
+
+The trace can be opened in chrome://tracing or https://ui.perfetto.dev.
+Setting overlay shows the phase times of the last frame as bars in the
+corner of the window (when drawing to the window surface).
+
+Games can time their own phases with phase() and count their own events
+with count().  When no profile is running, these do almost nothing, and
+move() and locate() aren't touched at all.
+"""
+
+import collections
+import contextlib
+import functools
+import json
+
+import sdl2
+
+from .loop import now
+
+# The profile being recorded, if any
+current = None
+# Whether to draw the overlay, and the phase time (ms) of a full-width bar
+overlay = False
+overlay_scale = 20
+
+# Methods counted while a profile is running: (class, name, counter)
+_COUNTED = []
+_NOT_PROFILING = contextlib.nullcontext()
+
+# Overlay bar height and colors, by phase
+_BAR_HEIGHT = 4
+_COLORS = {'input': (64, 64, 255), 'scheduler': (64, 192, 64),
+           'logic': (224, 192, 64), 'draw': (224, 64, 64)}
+_OTHER_COLOR = (192, 192, 192)
+
+class Profile:
+    """The timings and counts collected by a profile
+
+    phases maps each phase name to its total time in milliseconds, and
+    counts each counter's name to its total.  last_frame holds the phase
+    times of the last whole frame.  If trace is true, every phase is also
+    kept as an event for write_trace().
+    """
+    def __init__(self, *, trace=False):
+        self.phases = collections.Counter()
+        self.counts = collections.Counter()
+        self.frames = 0
+        self.last_frame = {}
+        self.events = [] if trace else None
+        self._frame = collections.Counter()
+        self._start = now()
+
+    def __str__(self):
+        lines = ["{} frames".format(self.frames)]
+        frames = self.frames or 1
+        for name, total in self.phases.most_common():
+            lines.append("  {:<12} {:10.1f} ms {:8.3f} ms/frame"
+                         "".format(name, total, total / frames))
+        for name, total in sorted(self.counts.items()):
+            lines.append("  {:<12} {:10} {:12.1f}/frame"
+                         "".format(name, total, total / frames))
+        return "\n".join(lines)
+
+    def add(self, name, start, end):
+        """Record that the phase name took from start to end"""
+        self.phases[name] += end - start
+        self._frame[name] += end - start
+        if self.events is not None:
+            self.events.append({'name': name, 'ph': 'X', 'pid': 1, 'tid': 1,
+                                'ts': (start - self._start) * 1000,
+                                'dur': (end - start) * 1000})
+
+    def end_frame(self):
+        """Finish the current frame"""
+        self.frames += 1
+        self.last_frame = dict(self._frame)
+        self._frame.clear()
+        if self.events is not None:
+            self.events.append({'name': 'counts', 'ph': 'C', 'pid': 1,
+                                'ts': (now() - self._start) * 1000,
+                                'args': dict(self.counts)})
+
+    def write_trace(self, path):
+        """Write the trace events to path in the Chrome trace format"""
+        if self.events is None:
+            raise ValueError("The profile was not started with trace=True")
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.events,
+                       'displayTimeUnit': 'ms'}, f)
+
+class _Phase:
+    __slots__ = ['profile', 'name', 'start']
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.start = now()
+
+    def __exit__(self, *exc_info):
+        self.profile.add(self.name, self.start, now())
+
+def start(*, trace=False):
+    """Start recording a new profile and return it"""
+    global current
+    if current is not None:
+        stop()
+    if not _COUNTED:
+        # Imported here, since they use this module
+        from .entity import Entity
+        from .world import World
+        _COUNTED.extend([(Entity, 'move', 'moves'),
+                         (World, 'locate', 'locates')])
+    current = Profile(trace=trace)
+    for cls, name, counter in _COUNTED:
+        setattr(cls, name, _counting(getattr(cls, name), counter))
+    return current
+
+def stop():
+    """Stop recording and return the profile (or None if none was running)"""
+    global current
+    profile, current = current, None
+    if profile is not None:
+        for cls, name, counter in _COUNTED:
+            setattr(cls, name, getattr(cls, name).__wrapped__)
+    return profile
+
+def _counting(method, counter):
+    @functools.wraps(method)
+    def counting(*args, **kwargs):
+        current.counts[counter] += 1
+        return method(*args, **kwargs)
+    return counting
+
+def phase(name):
+    """Return a context manager that times the phase name"""
+    if current is None:
+        return _NOT_PROFILING
+    return _Phase(current, name)
+
+def count(name, number=1):
+    """Add number to the counter name"""
+    if current is not None:
+        current.counts[name] += number
+
+def end_frame(window=None, world=None):
+    """Finish a frame of the current profile, drawing the overlay if shown
+
+    The overlay is drawn onto window's surface; world is redrawn under it
+    first, so the bars don't leave trails.
+    """
+    if current is None:
+        return
+    current.end_frame()
+    if overlay and window is not None:
+        _draw_overlay(window, world, current.last_frame)
+
+def _draw_overlay(window, world, phases):
+    surface = window.get_surface()
+    names = list(_COLORS) + sorted(phases.keys() - _COLORS.keys())
+    area = sdl2.SDL_Rect(0, 0, surface.w, _BAR_HEIGHT * len(names))
+    if world is not None:
+        world._redraw(surface, area)
+    sdl2.SDL_SetClipRect(surface, area)
+    for row, name in enumerate(names):
+        width = round(surface.w * phases.get(name, 0) / overlay_scale)
+        sdl2.SDL_FillRect(surface,
+                          sdl2.SDL_Rect(0, row * _BAR_HEIGHT,
+                                        min(width, surface.w),
+                                        _BAR_HEIGHT - 1),
+                          sdl2.SDL_MapRGB(surface.format,
+                                          *_COLORS.get(name, _OTHER_COLOR)))
+    sdl2.SDL_SetClipRect(surface, None)
+    sdl2.SDL_UpdateWindowSurfaceRects(window.window, area, 1)
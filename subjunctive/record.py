@@ -0,0 +1,273 @@
+"""Input logs: recording a session's keys, and playing them back headless
+
+A Recorder writes everything that decides how a session plays out, which
+is just the keys pressed, the tick each was pressed before, and the seeds
+given to the world's random generator:
+
+    with open('session.sjin', 'wb') as f:
+        recorder = subjunctive.record.Recorder(f)
+        recorder.seed(world)
+        world.setup()
+        subjunctive.run(world, on_direction=move, record=recorder)
+
+To play it back, the world is made the same way with the recorded seed:
+
+    with open('session.sjin', 'rb') as f:
+        log = subjunctive.record.read(f)
+    world.random.seed(log.seed)
+    world.setup()
+    subjunctive.record.Player(log, world, on_direction=move).play()
+
+The log starts with a small header (magic, version, tick rate), followed
+by one event after another.  An event is a varint holding the ticks since
+the previous event and the kind of event, then a varint holding the key or
+the seed; a key press usually takes three bytes.
+
+A Player re-runs a log in a Simulation, as fast as the CPU allows, and
+can seek to any tick.  It keeps a checkpoint (a World snapshot) every so
+many ticks, so seeking backwards only replays from the checkpoint before.
+"""
+
+import random
+import struct
+
+from .headless import Simulation
+
+MAGIC = b'SJIN'
+VERSION = 1
+# Magic, version, tick rate
+HEADER = struct.Struct('<4sHH')
+
+# Kinds of event
+KEY = 0
+SEED = 1
+END = 2
+_KIND_BITS = 2
+
+# Most keysyms for keys without a character (arrows, say) are scancodes
+# with this bit set; it is moved to the bottom to keep them short
+_SCANCODE_MASK = 1 << 30
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varint(data, position):
+    value = shift = 0
+    while True:
+        if position >= len(data):
+            raise ValueError("Input log is truncated")
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+def _pack_key(sym):
+    return (sym & ~_SCANCODE_MASK) << 1 | bool(sym & _SCANCODE_MASK)
+
+def _unpack_key(value):
+    return value >> 1 | (_SCANCODE_MASK if value & 1 else 0)
+
+class Recorder:
+    """Write a session's input to the open binary file f
+
+    A Recorder can be passed as the record argument of run(), Simulation
+    or server.Session, which append (tick, keysym) pairs to it.  Events
+    must be written in order of tick.
+    """
+    def __init__(self, f, *, tick_rate=50):
+        if tick_rate != int(tick_rate):
+            raise ValueError("Can't record a tick rate of {}"
+                             "".format(tick_rate))
+        self.file = f
+        self.tick = 0
+        f.write(HEADER.pack(MAGIC, VERSION, int(tick_rate)))
+
+    def _write(self, tick, kind, value):
+        if tick < self.tick:
+            raise ValueError("Event at tick {} comes after tick {}"
+                             "".format(tick, self.tick))
+        out = bytearray()
+        _write_varint(out, (tick - self.tick) << _KIND_BITS | kind)
+        _write_varint(out, value)
+        self.file.write(out)
+        self.tick = tick
+
+    def append(self, key):
+        """Record the (tick, keysym) pair key"""
+        tick, sym = key
+        self._write(tick, KEY, _pack_key(sym))
+
+    def seed(self, world, seed=None, *, tick=None):
+        """Seed world.random with seed (by default, a random one) and record it
+
+        tick defaults to that of the last event.  Return the seed.
+        """
+        if seed is None:
+            seed = random.getrandbits(64)
+        self._write(self.tick if tick is None else tick, SEED, seed)
+        world.random.seed(seed)
+        return seed
+
+    def end(self, tick):
+        """Record that the session ended after tick ticks"""
+        self._write(tick, END, 0)
+
+class Log:
+    """The events of an input log, as (tick, kind, value) triples"""
+    def __init__(self, tick_rate, events):
+        self.tick_rate = tick_rate
+        self.events = events
+
+    @property
+    def seed(self):
+        """The seed the world started with, or None if none was recorded
+
+        This is the last seed recorded before anything else.
+        """
+        seed = None
+        for tick, kind, value in self.events:
+            if kind != SEED:
+                break
+            seed = value
+        return seed
+
+    @property
+    def keys(self):
+        """The (tick, keysym) pairs of the log, to give to run(replay=...)"""
+        return [(tick, value) for tick, kind, value in self.events
+                if kind == KEY]
+
+    @property
+    def length(self):
+        """The ticks the session lasted, or ran up to its last key"""
+        for tick, kind, value in reversed(self.events):
+            if kind == END:
+                return tick
+        return self.events[-1][0] + 1 if self.events else 0
+
+def read(f):
+    """Read the input log in the open binary file f"""
+    return loads(f.read())
+
+def loads(data):
+    """Return the Log of the bytes data, written by a Recorder"""
+    if len(data) < HEADER.size or data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not an input log")
+    magic, version, tick_rate = HEADER.unpack_from(data)
+    if version != VERSION:
+        raise ValueError("Unsupported input log version {}".format(version))
+    events = []
+    tick = 0
+    position = HEADER.size
+    while position < len(data):
+        header, position = _read_varint(data, position)
+        value, position = _read_varint(data, position)
+        tick += header >> _KIND_BITS
+        kind = header & ((1 << _KIND_BITS) - 1)
+        if kind == KEY:
+            value = _unpack_key(value)
+        events.append((tick, kind, value))
+    return Log(tick_rate, events)
+
+class _Checkpoint:
+    __slots__ = ['tick', 'event', 'snapshot', 'finished']
+
+    def __init__(self, tick, event, snapshot, finished):
+        self.tick = tick
+        self.event = event
+        self.snapshot = snapshot
+        self.finished = finished
+
+class Player:
+    """Play log back on world, which must start as the recorded one did
+
+    world.random should already be seeded with log.seed; only the seeds
+    recorded after that are given to it.  The handlers and bindings are
+    those the session was recorded with.
+    A checkpoint is kept every checkpoint_interval ticks; between them,
+    the world keeps a journal of its changes (see World.snapshot), so
+    everything the game needs to go back in time must be stored in
+    attributes of the world and its entities.
+    """
+    def __init__(self, log, world, *, on_direction=None, on_select=None,
+                 on_tick=None, bindings=None, checkpoint_interval=250):
+        self.log = log
+        self.world = world
+        self.simulation = Simulation(
+            world, on_direction=on_direction, on_select=on_select,
+            on_tick=on_tick, tick_rate=log.tick_rate, bindings=bindings)
+        self.checkpoint_interval = checkpoint_interval
+        self._checkpoints = []
+        # Index of the next event to handle, skipping the starting seed
+        self._event = 0
+        while (self._event < len(log.events) and
+               log.events[self._event][1] == SEED):
+            self._event += 1
+
+    @property
+    def tick(self):
+        """The ticks run so far"""
+        return self.simulation.ticks
+
+    @property
+    def finished(self):
+        """Whether the game has exited or the log has been played through"""
+        return self.simulation.finished or self.tick >= self.log.length
+
+    def play(self):
+        """Play the rest of the log, up to the keys after its last tick"""
+        self.seek(self.log.length)
+        self._handle_events()
+
+    def seek(self, tick):
+        """Run or rewind the session to just after tick ticks
+
+        The events of tick itself are handled by the next seek().
+        """
+        simulation = self.simulation
+        if tick < simulation.ticks:
+            checkpoints = self._checkpoints
+            while checkpoints[-1].tick > tick:
+                checkpoints.pop()
+            self._restore(checkpoints[-1])
+
+        while simulation.ticks < tick and not simulation.finished:
+            if (simulation.ticks % self.checkpoint_interval == 0 and
+                    (not self._checkpoints or
+                     self._checkpoints[-1].tick < simulation.ticks)):
+                self._checkpoint()
+            self._handle_events()
+            simulation.step()
+
+    def _handle_events(self):
+        """Handle the events due before the next tick"""
+        simulation, events = self.simulation, self.log.events
+        while (self._event < len(events) and
+               events[self._event][0] <= simulation.ticks):
+            _, kind, value = events[self._event]
+            self._event += 1
+            if kind == KEY:
+                simulation.key(value)
+            elif kind == SEED:
+                self.world.random.seed(value)
+
+    def _checkpoint(self):
+        simulation = self.simulation
+        self._checkpoints.append(_Checkpoint(
+            simulation.ticks, self._event,
+            self.world.snapshot(scheduler=simulation.scheduler,
+                                random_state=True),
+            simulation.finished))
+
+    def _restore(self, checkpoint):
+        simulation = self.simulation
+        self.world.restore(checkpoint.snapshot)
+        simulation.ticks = checkpoint.tick
+        simulation.time = checkpoint.tick * simulation.tick_length
+        simulation.finished = checkpoint.finished
+        self._event = checkpoint.event
@@ -0,0 +1,205 @@
+"""Drawing worlds with an SDL_Renderer instead of the window surface
+
+The images of the entities are packed into a few large textures (atlases),
+so a frame is drawn with one batched call per atlas instead of one blit
+per sprite.  If the machine has no accelerated renderer, SDL's software
+renderer is used instead.
+"""
+
+import array
+import ctypes
+import logging
+
+import sdl2
+
+# Largest atlas side, in pixels; every renderer supports at least this
+ATLAS_SIZE = 2048
+
+class Atlas:
+    """Images packed together into a single texture
+
+    rects maps each image to the SDL_Rect it occupies in the texture, as
+    worked out by _pack().
+    """
+    def __init__(self, renderer, rects, width, height):
+        self.rects = rects
+        self.uvs = {}
+        surface = sdl2.SDL_CreateRGBSurfaceWithFormat(
+            0, width, height, 32, sdl2.SDL_PIXELFORMAT_ARGB8888)
+        blend_mode = sdl2.SDL_BlendMode()
+        for image, rect in rects.items():
+            # Copy the pixels exactly, alpha channel included
+            sdl2.SDL_GetSurfaceBlendMode(image, ctypes.byref(blend_mode))
+            sdl2.SDL_SetSurfaceBlendMode(image, sdl2.SDL_BLENDMODE_NONE)
+            sdl2.SDL_BlitSurface(image, None, surface,
+                                 sdl2.SDL_Rect(rect.x, rect.y))
+            sdl2.SDL_SetSurfaceBlendMode(image, blend_mode)
+            u1, v1 = rect.x / width, rect.y / height
+            u2, v2 = (rect.x + rect.w) / width, (rect.y + rect.h) / height
+            self.uvs[image] = (u1, v1, u2, v1, u1, v2, u2, v2)
+        self.texture = sdl2.SDL_CreateTextureFromSurface(renderer, surface)
+        sdl2.SDL_FreeSurface(surface)
+        if not self.texture:
+            raise RuntimeError("Couldn't create a {}x{} texture: {}".format(
+                width, height, sdl2.SDL_GetError().decode(errors='replace')))
+        sdl2.SDL_SetTextureBlendMode(self.texture, sdl2.SDL_BLENDMODE_BLEND)
+
+    def destroy(self):
+        sdl2.SDL_DestroyTexture(self.texture)
+
+def _pack(images):
+    """Lay images out on shelves, tallest first
+
+    Return a list of (rects, width, height) tuples, one for each atlas
+    needed to fit all of the images.  An image wider or taller than
+    ATLAS_SIZE gets an atlas of its own, just its size.
+    """
+    atlases = []
+    rects, x, y, shelf_height, width, height = {}, 0, 0, 0, 0, 0
+    for image in sorted(images, key=lambda image: image.h, reverse=True):
+        if image.w > ATLAS_SIZE or image.h > ATLAS_SIZE:
+            atlases.append(({image: sdl2.SDL_Rect(0, 0, image.w, image.h)},
+                            image.w, image.h))
+            continue
+        if x + image.w > ATLAS_SIZE:
+            x, y, shelf_height = 0, y + shelf_height, 0
+        if y + image.h > ATLAS_SIZE and rects:
+            atlases.append((rects, width, height))
+            rects, x, y, shelf_height, width, height = {}, 0, 0, 0, 0, 0
+        rects[image] = sdl2.SDL_Rect(x, y, image.w, image.h)
+        x += image.w
+        shelf_height = max(shelf_height, image.h)
+        width, height = max(width, x), max(height, y + shelf_height)
+    if rects:
+        atlases.append((rects, width, height))
+    return atlases
+
+class Renderer:
+    """Draw worlds into a window through an SDL_Renderer
+
+    Images are packed into atlases the first time they are drawn; call
+    register() to pack them ahead of time instead.
+    """
+    def __init__(self, window, *, accelerated=True):
+        self.window = window
+        self.renderer = None
+        if accelerated:
+            self.renderer = sdl2.SDL_CreateRenderer(
+                window.window, -1, sdl2.SDL_RENDERER_ACCELERATED)
+            if not self.renderer:
+                logging.info("No accelerated renderer ({}); using software"
+                             "".format(sdl2.SDL_GetError().decode()))
+        if not self.renderer:
+            self.renderer = sdl2.SDL_CreateRenderer(
+                window.window, -1, sdl2.SDL_RENDERER_SOFTWARE)
+        info = sdl2.SDL_RendererInfo()
+        sdl2.SDL_GetRendererInfo(self.renderer, ctypes.byref(info))
+        # SDL's software renderer samples geometry textures slightly off
+        # (and wouldn't gain anything from batching), so it copies sprites
+        # one at a time
+        self.batched = (_geometry_supported and
+                        bool(info.flags & sdl2.SDL_RENDERER_ACCELERATED))
+        # 0 if the renderer doesn't say
+        self.max_texture_size = (info.max_texture_width,
+                                 info.max_texture_height)
+        self._atlases = []
+        # Image -> the atlas it was packed into
+        self._packed = {}
+        self._indices = array.array('i')
+        self._color = sdl2.SDL_Color(255, 255, 255, 255)
+
+    def destroy(self):
+        for atlas in self._atlases:
+            atlas.destroy()
+        sdl2.SDL_DestroyRenderer(self.renderer)
+
+    def register(self, images):
+        """Pack images that are not in an atlas yet into new atlases
+
+        ValueError is raised for an image too big for a texture.
+        """
+        images = {image for image in images if image not in self._packed}
+        max_width, max_height = self.max_texture_size
+        for image in images:
+            if (max_width and image.w > max_width or
+                    max_height and image.h > max_height):
+                raise ValueError(
+                    "A {}x{} image is bigger than the largest texture the "
+                    "renderer supports ({}x{})".format(
+                        image.w, image.h, max_width, max_height))
+        for rects, width, height in _pack(images):
+            atlas = Atlas(self.renderer, rects, width, height)
+            self._atlases.append(atlas)
+            for image in rects:
+                self._packed[image] = atlas
+
+    def draw(self, world):
+        """Draw world, unless nothing in it changed since the last frame"""
+        rects = world._changes()
+        if rects is not None and not rects:
+            return
+        renderer = self.renderer
+        images = set(world._drawn.values())
+        images.update(image for _, image in world.overlays)
+        if world.background is not None:
+            images.add(world.background)
+        self.register(images)
+
+        sdl2.SDL_RenderClear(renderer)
+        if world.background is not None:
+            self._copy(world.background, 0, 0)
+
+        # Sprites, batched by atlas
+        batches = {}
+        for location, image in world._drawn.items():
+            batches.setdefault(self._packed[image], []).append(
+                (image, world._pixels(location)))
+        for atlas, sprites in batches.items():
+            self._draw_batch(atlas, sprites)
+
+        for (x, y), image in world.overlays:
+            self._copy(image, x, y)
+        sdl2.SDL_RenderPresent(renderer)
+
+    def _copy(self, image, x, y):
+        atlas = self._packed[image]
+        sdl2.SDL_RenderCopy(self.renderer, atlas.texture, atlas.rects[image],
+                            sdl2.SDL_Rect(x, y, image.w, image.h))
+
+    def _draw_batch(self, atlas, sprites):
+        if not self.batched:
+            for image, (x, y) in sprites:
+                self._copy(image, x, y)
+            return
+
+        xy = array.array('f')
+        uv = array.array('f')
+        rects, uvs = atlas.rects, atlas.uvs
+        for image, (x, y) in sprites:
+            rect = rects[image]
+            x2, y2 = x + rect.w, y + rect.h
+            xy.extend((x, y, x2, y, x, y2, x2, y2))
+            uv.extend(uvs[image])
+        count = len(sprites)
+        indices = self._quad_indices(count)
+        float_p = ctypes.POINTER(ctypes.c_float)
+        xy_p = ctypes.cast(xy.buffer_info()[0], float_p)
+        uv_p = ctypes.cast(uv.buffer_info()[0], float_p)
+        # A color stride of 0 uses the same (opaque white) color everywhere
+        sdl2.SDL_RenderGeometryRaw(
+            self.renderer, atlas.texture,
+            xy_p, 8, ctypes.byref(self._color), 0, uv_p, 8,
+            count * 4, indices.buffer_info()[0], count * 6,
+            indices.itemsize)
+
+    def _quad_indices(self, count):
+        """Return the vertex indices of count quads (two triangles each)"""
+        indices = self._indices
+        for quad in range(len(indices) // 6, count):
+            first = quad * 4
+            indices.extend((first, first + 1, first + 2,
+                            first + 2, first + 1, first + 3))
+        return indices
+
+# SDL_RenderGeometryRaw needs SDL 2.0.18 and a recent PySDL2
+_geometry_supported = hasattr(sdl2, 'SDL_RenderGeometryRaw')
@@ -1,44 +1,260 @@
+import collections
+import ctypes
 import logging
 import os.path
+import sys
 
-import sdl2.ext
+import sdl2
 
 _paths = [os.path.dirname(__file__)]
-default_image = sdl2.ext.load_image(os.path.join(_paths[0],
-                                    'images/default.png'))
+# Resource name -> full path of the file found for it (or None)
+_resolved = {}
+# Resource name -> Image, so that every name is only looked up once
+_images = {}
 
 def add_path(path):
     _paths.append(path)
+    # Names that could not be found before might be found now
+    for name in [name for name, path in _resolved.items() if path is None]:
+        del _resolved[name]
+
+def _resolve(name):
+    try:
+        return _resolved[name]
+    except KeyError:
+        pass
+    for path in _paths:
+        full_path = os.path.abspath(os.path.join(path, name))
+        if os.path.isfile(full_path):
+            break
+    else:
+        full_path = None
+    _resolved[name] = full_path
+    return full_path
+
+class Image:
+    """An image that is loaded the first time it is used
+
+    Image objects stand in for SDL surfaces: they have the surface's w and
+    h, and can be passed directly to SDL functions that take a surface.
+    The surface itself comes from the cache, so it is only loaded once per
+    file no matter how many names refer to it.
+    """
+    def __init__(self, name):
+        self.name = name
+        self._entry = None
+
+    def __repr__(self):
+        return "<Image {!r}>".format(self.name)
+
+    @property
+    def _as_parameter_(self):
+        entry = self._entry
+        if entry is None or entry.pointer is None:
+            entry = self._entry = cache.load(self.name)
+        elif cache.max_bytes is not None:
+            cache.touch(entry)
+        return entry.pointer
+
+    @property
+    def surface(self):
+        """The SDL surface, converted for fast drawing if possible"""
+        return self._as_parameter_.contents
+
+    @property
+    def w(self):
+        return self.surface.w
+
+    @property
+    def h(self):
+        return self.surface.h
+
+class _Entry:
+    __slots__ = ['path', 'pointer', 'size']
+
+    def __init__(self, path):
+        self.path = path
+        self.pointer = None
+        self.size = 0
+
+class Cache:
+    """Loaded image surfaces, keyed by the path they were loaded from
+
+    If max_bytes is set, the least recently used surfaces are freed when
+    the cache holds more than that; they are loaded again if they are
+    drawn again.  hits and misses count the loads that did and did not
+    find the surface already in memory, and bytes is the size of the
+    pixel data currently held.
+    """
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._format = None
+
+    def __str__(self):
+        return ("{} images, {} bytes; {} hits, {} misses"
+                "".format(len(self._entries), self.bytes, self.hits,
+                          self.misses))
+
+    def clear(self):
+        """Free every surface held by the cache"""
+        for entry in self._entries.values():
+            self._free(entry)
+
+    def load(self, name):
+        """Return the entry for the image with the given name, loading it
+
+        If the name cannot be found, the default image is used instead.
+        """
+        path = _resolve(name)
+        if path is None:
+            logging.warning("image %r could not be found; using default" % name)
+            path = _default_path
+        entry = self._entries.get(path)
+        if entry is None:
+            entry = self._entries[path] = _Entry(path)
+        if entry.pointer is not None:
+            self.hits += 1
+            self.touch(entry)
+            return entry
+
+        self.misses += 1
+        try:
+            surface = _load(path)
+        except RuntimeError:
+            if path == _default_path:
+                raise
+            logging.warning("image %r could not be loaded; using default"
+                            % name)
+            _resolved[name] = None
+            return self.load(name)
+        entry.pointer = _convert(surface, self._format)
+        entry.size = entry.pointer.contents.pitch * entry.pointer.contents.h
+        self.bytes += entry.size
+        self.touch(entry)
+        self._shrink()
+        return entry
+
+    def set_format(self, pixel_format):
+        """Convert surfaces to pixel_format (an SDL_PIXELFORMAT_*) from now on
+
+        This should be the format of the window surface, so that drawing
+        doesn't have to convert pixels every frame.  Surfaces already
+        loaded in another format are freed and loaded again when needed.
+        """
+        if self._format is not None:
+            if self._format.format == pixel_format:
+                return
+            sdl2.SDL_FreeFormat(self._format)
+        self._format = sdl2.SDL_AllocFormat(pixel_format).contents
+        self.clear()
+
+    def touch(self, entry):
+        self._entries.move_to_end(entry.path)
+
+    def _free(self, entry):
+        if entry.pointer is not None:
+            sdl2.SDL_FreeSurface(entry.pointer)
+            entry.pointer = None
+            self.bytes -= entry.size
+            entry.size = 0
+
+    def _shrink(self):
+        if self.max_bytes is None:
+            return
+        # The most recently used entry is the one that was just loaded
+        for entry in list(self._entries.values())[:-1]:
+            if self.bytes <= self.max_bytes:
+                break
+            self._free(entry)
+
+def _load(path):
+    """Return a pointer to a new surface holding the image file at path
+
+    Without SDL_image, only BMP files can be loaded.
+    """
+    try:
+        from sdl2 import sdlimage
+    except ImportError:
+        surface = sdl2.SDL_LoadBMP(path.encode())
+    else:
+        surface = sdlimage.IMG_Load(path.encode())
+    if not surface:
+        error = sdl2.SDL_GetError().decode(errors='replace')
+        sdl2.SDL_ClearError()
+        raise RuntimeError("Unable to load {!r}: {}".format(path, error))
+    return surface
+
+def _convert(surface, pixel_format):
+    """Return surface converted to pixel_format, freeing the original
+
+    Images with an alpha channel keep it, unless every pixel turns out to
+    be opaque; blending is much slower than copying.
+    """
+    if pixel_format is None:
+        return surface
+    if surface.contents.format.contents.Amask:
+        # SDL has fast paths for blitting ARGB8888
+        converted = sdl2.SDL_ConvertSurfaceFormat(
+            surface, sdl2.SDL_PIXELFORMAT_ARGB8888, 0)
+        if converted and _opaque(converted.contents):
+            sdl2.SDL_FreeSurface(surface)
+            surface = converted
+            converted = sdl2.SDL_ConvertSurface(surface, pixel_format, 0)
+    else:
+        converted = sdl2.SDL_ConvertSurface(surface, pixel_format, 0)
+    if not converted:
+        return surface
+    sdl2.SDL_FreeSurface(surface)
+    return converted
+
+def _opaque(surface):
+    """Return whether every pixel of an ARGB8888 surface is opaque"""
+    pixels = ctypes.string_at(surface.pixels, surface.pitch * surface.h)
+    # Alpha is the most significant byte of each 32-bit pixel
+    first = 3 if sys.byteorder == 'little' else 0
+    alpha = b''.join(pixels[row * surface.pitch + first:
+                            row * surface.pitch + surface.w * 4:4]
+                     for row in range(surface.h))
+    return not alpha.strip(b'\xff')
+
+cache = Cache()
+_default_path = os.path.abspath(os.path.join(_paths[0], 'images/default.png'))
+default_image = Image(_default_path)
 
 def image(name):
-    """Return an sdl surface containing the image with the given name
+    """Return an Image for the image file with the given name
 
     Subjunctive keeps a list of resource paths that are searched; your
     application should add its path to this list by doing:
 
         subjunctive.resource.add_path(os.path.dirname(__file__))
 
-    If the specified name cannot be found, the default image will be
-    returned.
+    The file is not looked for or loaded until the image is first drawn
+    (or its size is needed).  If the specified name cannot be found, the
+    default image is used.
     """
-    for path in _paths:
-        try:
-            surface = sdl2.ext.load_image(os.path.join(path, name))
-        except sdl2.ext.common.SDLError:
-            pass
-        else:
-            return surface
-    logging.warning("image %r could not be found; using default" % name)
-    return default_image
+    try:
+        return _images[name]
+    except KeyError:
+        image = _images[name] = Image(name)
+        return image
 
-def file(name):
+def file(name, mode='r'):
+    """Return the file with the given name, opened with the given mode
+
+    The resource paths are searched as for image().
+    """
     for path in _paths:
         try:
-            text = open(os.path.join(path, name))
+            text = open(os.path.join(path, name), mode)
         except FileNotFoundError:
             pass
         except PermissionError:
-            logging.warning("Trying to access directory " + path + 
+            logging.warning("Trying to access directory " + path +
                             " with insufficient permission. " +
                             "Continuing search")
             pass
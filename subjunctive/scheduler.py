@@ -1,46 +1,226 @@
+import heapq
+import itertools
 import logging
+import math
 import re
 
-from sdl2.timer import SDL_GetTicks
+from .loop import now
+
+class Call:
+    """A call waiting in a Scheduler
+
+    Scheduler.call() returns one of these so that the call can be cancelled
+    or moved later.
+    """
+    def __init__(self, scheduler, function, every):
+        self.function = function
+        self.every = every
+        self.cancelled = False
+        self._scheduler = scheduler
+        # The list representing this call in the scheduler, if any
+        self._entry = None
+
+    def __repr__(self):
+        return "<Call {}>".format(self.function.__qualname__)
+
+    def cancel(self):
+        """Stop the call from happening (again)"""
+        self.cancelled = True
+        if self._entry is not None:
+            self._entry[-1] = None
+            self._entry = None
+
+    def reschedule(self, *, after=None, every=None):
+        """Schedule the call again; the arguments are as for Scheduler.call"""
+        if after is None and every is None:
+            raise TypeError("reschedule() needs at least one keyword argument")
+        self.cancel()
+        self.cancelled = False
+        if every is not None:
+            self.every = ms(every)
+        self._scheduler._add(self, ms(after) if after else 0)
 
 class Scheduler:
-    def __init__(self):
+    """Call functions at given times
+
+    The scheduler keeps its own game time, time, in milliseconds from 0;
+    it only moves forward, whoever drives the scheduler, so calls pending
+    when one game loop stops are due as long after it as they had left
+    when the next starts.  update() is given the game time by a loop, or
+    else moves it on by the time clock (a function returning the current
+    time in milliseconds) has moved since the last such update().  If
+    on_change is set, it is called whenever a call is made or rescheduled,
+    so that a loop sleeping until next_deadline() can wake up.
+    """
+    def __init__(self, clock=now):
+        self.clock = clock
+        self.on_change = None
+        self.time = 0
+        # The clock's time at the last update() that read it
+        self._clock_time = None
+        # [after, call] entries waiting for the next update
         self._new_items = []
-        self._items = []
+        # Heap of [trigger_time, sequence, call] entries; cancelled entries
+        # have their call replaced by None and are dropped when they surface
+        self._queue = []
+        self._sequence = itertools.count()
 
     def call(self, function, *, after=None, every=None):
+        """Call function after a delay and/or repeatedly
+
+        The delays are timespecs like '20ms', '3s' or '1m'.  Return a Call
+        object, which can be used to cancel or reschedule the call.
+        """
         if after is None and every is None:
             raise TypeError("call() needs at least one keyword argument")
         if after is not None:
             after = ms(after)
         if every is not None:
             every = ms(every)
-        self._new_items.append((function, after, every))
+        call = Call(self, function, every)
+        self._add(call, after or 0)
+        return call
+
+    def _add(self, call, after):
+        # Delays are counted from the next update
+        call._entry = [after, call]
+        self._new_items.append(call._entry)
+        if self.on_change is not None:
+            self.on_change()
+
+    def sleep(self, timespec):
+        """Return an asyncio future that is done after timespec
+
+        The time is the scheduler's, so in a coroutine running alongside
+        aio.run(), "await scheduler.sleep('3s')" waits for the game's ticks
+        rather than the wall clock.  Cancelling the future cancels the call.
+        """
+        import asyncio
+        future = asyncio.get_running_loop().create_future()
+
+        def wake():
+            if not future.done():
+                future.set_result(None)
 
-    def update(self):
-        time = SDL_GetTicks()
+        call = self.call(wake, after=timespec)
+        future.add_done_callback(
+            lambda future: future.cancelled() and call.cancel())
+        return future
 
-        for func, after, every in self._new_items:
-            trigger_time = time + after if after else time
-            logging.debug("[scheduler] Scheduling {} for {}"
-                          "".format(func.__qualname__, trigger_time))
-            self._items.append((trigger_time, func, every))
+    def _push(self, call, trigger_time):
+        logging.debug("[scheduler] Scheduling %s for %s",
+                      call.function.__qualname__, trigger_time)
+        call._entry = [trigger_time, next(self._sequence), call]
+        heapq.heappush(self._queue, call._entry)
+
+    def snapshot(self):
+        """Return the time and pending calls, to give to restore()"""
+        return ([(after, call, call.every)
+                 for after, call in self._new_items if call is not None],
+                [(trigger_time, sequence, call, call.every)
+                 for trigger_time, sequence, call in self._queue
+                 if call is not None],
+                self.time)
+
+    def restore(self, state):
+        """Make exactly the calls that were pending at snapshot() pending
+
+        Calls made or cancelled since then are forgotten or brought back.
+        """
+        new_items, queue, self.time = state
+        for entry in self._new_items + self._queue:
+            if entry[-1] is not None:
+                entry[-1]._entry = None
+        # Replace the contents, in case update() is running
+        self._new_items[:] = [_restore_entry(call, every, after)
+                              for after, call, every in new_items]
+        self._queue[:] = [_restore_entry(call, every, trigger_time, sequence)
+                          for trigger_time, sequence, call, every in queue]
+        heapq.heapify(self._queue)
+
+    def _move_calls(self, scheduler):
+        """Move every pending call to scheduler, keeping the time it has left"""
+        offset = scheduler.time - self.time
+        for entry in self._new_items:
+            if entry[-1] is not None:
+                entry[-1]._scheduler = scheduler
+                scheduler._new_items.append(entry)
+        for entry in sorted(self._queue):
+            if entry[-1] is not None:
+                entry[-1]._scheduler = scheduler
+                scheduler._push(entry[-1], entry[0] + offset)
+        self._new_items.clear()
+        self._queue.clear()
+
+    def next_deadline(self):
+        """Return the time the next call is due, or None if there are none
+
+        Calls made since the last update() are due as soon as there is
+        another; for them, -inf is returned.
+        """
+        if any(call is not None for after, call in self._new_items):
+            return -math.inf
+        queue = self._queue
+        while queue and queue[0][-1] is None:
+            heapq.heappop(queue)
+        return queue[0][0] if queue else None
+
+    def update(self, time=None):
+        """Make the calls that are due at the game time time
+
+        time defaults to the scheduler's time, moved on by the clock.  A
+        repeating call is rescheduled from the time it was due rather
+        than from time, so it doesn't drift; if it has fallen behind, it
+        is called again in the same update until it catches up.  Return
+        the number of calls made.
+        """
+        if time is None:
+            clock_time = self.clock()
+            time = self.time
+            if self._clock_time is not None:
+                time += max(0, clock_time - self._clock_time)
+            self._clock_time = clock_time
+        else:
+            # The next update() without a time starts the clock afresh
+            self._clock_time = None
+        self.time = time
+
+        for after, call in self._new_items:
+            if call is not None:
+                self._push(call, time + after)
         self._new_items.clear()
 
-        remaining_items = []
-        for trigger_time, func, every in self._items:
-            if time >= trigger_time:
-                logging.debug("[scheduler] Calling {}"
-                              "".format(func.__qualname__))
-                func()
-                if every is not None:
-                    new_trigger_time = time + every
-                    logging.debug("[scheduler] Scheduling {} for {}"
-                                  "".format(func.__qualname__, trigger_time))
-                    remaining_items.append((new_trigger_time, func, every))
-            else:
-                remaining_items.append((trigger_time, func, every))
-        self._items = remaining_items
+        queue = self._queue
+        repeating = []
+        calls = 0
+        while queue and queue[0][0] <= time:
+            trigger_time, _, call = heapq.heappop(queue)
+            if call is None:
+                continue
+            call._entry = None
+            calls += 1
+            logging.debug("[scheduler] Calling %s", call.function.__qualname__)
+            call.function()
+            # Repeat, unless the function cancelled or rescheduled its own call
+            if (call.every is not None and call._entry is None and
+                    not call.cancelled):
+                if call.every > 0:
+                    self._push(call, trigger_time + call.every)
+                else:
+                    repeating.append(call)
+
+        # Calls repeating every 0ms go back in only now, so that they happen
+        # once per update instead of forever
+        for call in repeating:
+            if call._entry is None and not call.cancelled:
+                self._push(call, time)
+        return calls
+
+def _restore_entry(call, every, *fields):
+    call._entry = [*fields, call]
+    call.every = every
+    call.cancelled = False
+    return call._entry
 
 def ms(timespec):
     match = re.match(r'(?P<magnitude>[0-9]+)(?P<unit>ms|s|m)', timespec)
@@ -52,3 +232,5 @@ def ms(timespec):
 _default_scheduler = Scheduler()
 call = _default_scheduler.call
 update = _default_scheduler.update
+next_deadline = _default_scheduler.next_deadline
+sleep = _default_scheduler.sleep
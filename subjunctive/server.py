@@ -0,0 +1,333 @@
+"""Hosting many headless worlds at once
+
+A Host holds sessions, each a world with its own Simulation and scheduler,
+and steps them all together, one tick per call to tick():
+
+    host = subjunctive.server.Host()
+    host.add('alice', Session(world, on_direction=cursor.move))
+    host.send('alice', sdl2.SDLK_LEFT)
+    host.tick()
+
+Keys sent to a session are queued and handled at the start of its next
+tick, so input from the network never runs in the middle of one.
+
+A Pool spreads sessions over worker processes, each with a Host of its
+own, so that they can use every core.  Worlds can't be sent between
+processes, so each worker makes its sessions by calling the function given
+to the Pool; everything the parent sends between ticks goes to the workers
+in one message per tick.
+"""
+
+import itertools
+import logging
+import multiprocessing
+import time
+
+from . import loop
+from . import scheduler as _scheduler
+from .headless import Simulation
+
+class Metrics:
+    """What one session has cost, and how quickly it answered
+
+    cpu_time and max_step_time are the CPU milliseconds spent stepping the
+    session, in all and in its slowest tick.  Latency is the time from
+    send() to the key being handled, in milliseconds of loop.now(), which
+    is the same clock in every process on a machine.  error is the repr()
+    of the exception that ended the session, if one did.
+    """
+    def __init__(self):
+        self.ticks = 0
+        self.inputs = 0
+        self.cpu_time = 0
+        self.max_step_time = 0
+        self.total_latency = 0
+        self.max_latency = 0
+        self.error = None
+
+    def __repr__(self):
+        return ("<Metrics {} ticks, {:.1f} ms CPU, {:.2f} ms latency>"
+                "".format(self.ticks, self.cpu_time, self.average_latency))
+
+    @property
+    def average_latency(self):
+        return self.total_latency / self.inputs if self.inputs else 0
+
+class Session:
+    """A world being simulated for one player
+
+    The arguments are those of Simulation; to keep a log of the session,
+    pass a record.Recorder as record.  If world uses the scheduler
+    shared by every world, it is given one of its own that keeps the
+    simulation's time, so that its calls don't happen in other sessions.
+    The calls pending on the shared scheduler are moved to it, so worlds
+    that use the shared scheduler should be made one at a time, each
+    followed by its Session.
+    """
+    def __init__(self, world, *, on_direction=None, on_select=None,
+                 on_tick=None, tick_rate=50, bindings=None, record=None):
+        if world.scheduler is _scheduler._default_scheduler:
+            scheduler = _scheduler.Scheduler(
+                clock=lambda: self.simulation.time)
+            world.scheduler._move_calls(scheduler)
+            world.scheduler = scheduler
+        self.world = world
+        self.simulation = Simulation(
+            world, on_direction=on_direction, on_select=on_select,
+            on_tick=on_tick, tick_rate=tick_rate, bindings=bindings,
+            record=record)
+        self.metrics = Metrics()
+        # (sym, time sent) pairs waiting for the next tick
+        self._inbox = []
+
+    @property
+    def finished(self):
+        return self.simulation.finished
+
+    def send(self, sym, sent=None):
+        """Queue the key sym, sent at time sent (by default, now)"""
+        self._inbox.append((sym, loop.now() if sent is None else sent))
+
+    def step(self):
+        """Handle the queued keys and run one tick
+
+        An exception from the game ends the session rather than the host.
+        Return False once the session has finished.
+        """
+        if self.finished:
+            return False
+        metrics = self.metrics
+        inbox, self._inbox = self._inbox, []
+        start = time.process_time()
+        try:
+            for sym, sent in inbox:
+                self.simulation.key(sym)
+                latency = loop.now() - sent
+                metrics.inputs += 1
+                metrics.total_latency += latency
+                metrics.max_latency = max(metrics.max_latency, latency)
+            self.simulation.step()
+        except Exception as error:
+            logging.info("[server] Session ended by %r", error)
+            metrics.error = repr(error)
+            self.simulation.finished = True
+        step_time = (time.process_time() - start) * 1000
+        metrics.ticks += 1
+        metrics.cpu_time += step_time
+        metrics.max_step_time = max(metrics.max_step_time, step_time)
+        return not self.finished
+
+class Host:
+    """Sessions stepped together, by id"""
+    def __init__(self):
+        self.sessions = {}
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def add(self, id, session):
+        if id in self.sessions:
+            raise ValueError("There is already a session {!r}".format(id))
+        self.sessions[id] = session
+
+    def remove(self, id):
+        """Remove the session id and return it"""
+        return self.sessions.pop(id)
+
+    def send(self, id, sym, sent=None):
+        """Queue the key sym for the session id's next tick"""
+        self.sessions[id].send(sym, sent)
+
+    def tick(self):
+        """Run one tick of every session
+
+        Return the ids of the sessions that finished in it.  Finished
+        sessions stay (and keep their metrics) until they are removed.
+        """
+        finished = []
+        for id, session in self.sessions.items():
+            if not session.finished and not session.step():
+                finished.append(id)
+        return finished
+
+    def metrics(self):
+        """Return a dict of each session's Metrics, by id"""
+        return {id: session.metrics for id, session in self.sessions.items()}
+
+def _serve(connection, make_session):
+    """Run a Pool worker's Host until the pool is closed"""
+    host = Host()
+    while True:
+        request, *args = connection.recv()
+        try:
+            if request == 'tick':
+                starts, inputs, ticks, remove = args
+                for id, session_args in starts:
+                    host.add(id, make_session(*session_args))
+                for id, sym, sent in inputs:
+                    host.send(id, sym, sent)
+                finished = []
+                for _ in range(ticks):
+                    finished += host.tick()
+                for id in remove:
+                    host.remove(id)
+                reply = finished
+            elif request == 'metrics':
+                reply = host.metrics()
+            else:
+                break
+        except Exception as error:
+            logging.exception("[server] Worker failed")
+            connection.send((False, repr(error)))
+        else:
+            connection.send((True, reply))
+    connection.close()
+
+class Pool:
+    """Sessions sharded over worker processes
+
+    make_session is called in a worker with the arguments given to start()
+    and returns a Session; with the spawn start method it must be picklable
+    (a module-level function).  processes defaults to the number of CPUs.
+    Sessions are numbered by start(), and session id runs in worker
+    id % processes.
+    """
+    def __init__(self, make_session, *, processes=None):
+        context = multiprocessing.get_context()
+        self.processes = processes or multiprocessing.cpu_count()
+        self._connections = []
+        self._workers = []
+        for _ in range(self.processes):
+            connection, worker_connection = context.Pipe()
+            worker = context.Process(target=_serve, daemon=True,
+                                     args=(worker_connection, make_session))
+            worker.start()
+            worker_connection.close()
+            self._connections.append(connection)
+            self._workers.append(worker)
+        self._ids = itertools.count()
+        self._clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _clear(self):
+        # What to send each worker with the next tick
+        self._starts = [[] for _ in range(self.processes)]
+        self._inputs = [[] for _ in range(self.processes)]
+        self._removes = [[] for _ in range(self.processes)]
+
+    def start(self, *args):
+        """Start a session with make_session(*args) and return its id
+
+        The session is made at the next tick().
+        """
+        id = next(self._ids)
+        self._starts[id % self.processes].append((id, args))
+        return id
+
+    def send(self, id, sym, sent=None):
+        """Queue the key sym for the session id's next tick"""
+        self._inputs[id % self.processes].append(
+            (id, sym, loop.now() if sent is None else sent))
+
+    def remove(self, id):
+        """Remove the session id at the end of the next tick"""
+        self._removes[id % self.processes].append(id)
+
+    def tick(self, ticks=1):
+        """Run ticks ticks of every session, with the workers in parallel
+
+        Return the ids of the sessions that finished.
+        """
+        self._send_tick(ticks)
+        return self._finished()
+
+    def _send_tick(self, ticks):
+        for worker, connection in enumerate(self._connections):
+            connection.send(('tick', self._starts[worker],
+                             self._inputs[worker], ticks,
+                             self._removes[worker]))
+        self._clear()
+
+    def _finished(self):
+        """Return the ids the workers say finished in the tick sent"""
+        return [id for finished in self._replies() for id in finished]
+
+    async def _replied(self):
+        """Wait until every worker has replied, without blocking the loop"""
+        import asyncio
+        event_loop = asyncio.get_running_loop()
+        for connection in self._connections:
+            if connection.poll():
+                continue
+            replied = event_loop.create_future()
+            event_loop.add_reader(
+                connection.fileno(),
+                lambda: replied.done() or replied.set_result(None))
+            try:
+                await replied
+            finally:
+                event_loop.remove_reader(connection.fileno())
+
+    def metrics(self):
+        """Return a dict of every session's Metrics, by id"""
+        for connection in self._connections:
+            connection.send(('metrics',))
+        metrics = {}
+        for reply in self._replies():
+            metrics.update(reply)
+        return metrics
+
+    def _replies(self):
+        replies = []
+        for connection in self._connections:
+            ok, reply = connection.recv()
+            if not ok:
+                raise RuntimeError("Server worker failed: {}".format(reply))
+            replies.append(reply)
+        return replies
+
+    def close(self):
+        """Stop the workers; their sessions are lost"""
+        for connection in self._connections:
+            try:
+                connection.send(('close',))
+            except OSError:
+                pass
+            connection.close()
+        for worker in self._workers:
+            worker.join()
+        self._connections = self._workers = []
+
+async def serve(host, *, tick_rate=50, on_tick=None):
+    """Tick host, a Host or a Pool, tick_rate times per second forever
+
+    Other tasks on the event loop (connections from players, say) send
+    keys and start sessions in between ticks.  on_tick, if given, is
+    called with the ids of the sessions that finished in each tick.  Ticks
+    that fall too far behind are dropped, as in run().
+
+    A Host's sessions are stepped in the event loop's thread, so other
+    tasks wait while they tick.  A Pool's workers are waited for without
+    blocking the loop (on Windows, this needs a selector event loop);
+    other tasks shouldn't call its metrics() meanwhile, since the replies
+    to both would be mixed up.
+    """
+    import asyncio
+    clock = loop.Clock(tick_rate)
+    clock.start(loop.now())
+    while True:
+        for _ in clock.ticks(loop.now()):
+            if isinstance(host, Pool):
+                host._send_tick(1)
+                await host._replied()
+                finished = host._finished()
+            else:
+                finished = host.tick()
+            if on_tick is not None:
+                on_tick(finished)
+        await asyncio.sleep(max(0, clock.next_tick - loop.now()) / 1000)
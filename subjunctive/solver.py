@@ -0,0 +1,313 @@
+"""Solving puzzles by searching their states
+
+A puzzle is described by a Puzzle: its starting state, the moves that can
+be made from each state, and which states are solved.  States should be
+small hashable values, like ints, since every state seen is kept in a
+set or sent to another process.  WorldPuzzle works the moves out by
+playing them with a World's own rules.
+
+bfs() finds the shortest solution, and ida_star() finds one while using
+very little memory.  parallel_bfs() spreads the work of bfs() over a
+process pool, and solve_all() solves many puzzles at once, one per
+process, which is the quickest way to check a batch of generated levels.
+"""
+
+import abc
+import multiprocessing
+import os
+import signal
+import time
+
+from .grid import down, left, right, up
+
+# Most states a worker process expands per task
+_CHUNK_SIZE = 1000
+
+class Puzzle(abc.ABC):
+    """The states of a puzzle, for the search functions
+
+    Subclasses must define start(), moves() and solved().
+    """
+    @abc.abstractmethod
+    def start(self):
+        """Return the starting state"""
+
+    @abc.abstractmethod
+    def moves(self, state):
+        """Return a list of (move, new state) pairs for the moves from state"""
+
+    @abc.abstractmethod
+    def solved(self, state):
+        """Return whether state is a solution"""
+
+    def estimate(self, state):
+        """Return a lower bound on the number of moves left to solve state
+
+        ida_star() is much faster with a good estimate; the default of 0
+        makes it a plain iterative deepening search.
+        """
+        return 0
+
+class WorldPuzzle(Puzzle):
+    """A puzzle played out by the rules of a World
+
+    Subclasses define solved(), and encode() and decode() to turn the
+    world into a state and back.  Each of actions is tried by act() (by
+    default, moving self.player) from a snapshot of the world, which is
+    restored afterwards.  Moves that don't change the state are left out.
+
+    The snapshots of the states whose moves were asked for last are kept,
+    so a state reached from one of them (as in a depth-first search) is
+    set up by restoring it and acting again rather than by decode().
+    """
+    actions = (left, up, right, down)
+
+    def __init__(self, world, player=None):
+        self.world = world
+        self.player = player
+        # (state, snapshot, {new state: action}) for each state along the
+        # way to the one the world is in
+        self._path = []
+
+    def act(self, action):
+        self.player.move(action)
+
+    @abc.abstractmethod
+    def encode(self):
+        """Return the state self.world is in"""
+
+    @abc.abstractmethod
+    def decode(self, state):
+        """Put self.world in state"""
+
+    def start(self):
+        while self._path:
+            self._path.pop()
+            self.world.undo()
+        return self.encode()
+
+    def moves(self, state):
+        world = self.world
+        self._reach(state)
+        snapshot = world.snapshot()
+        new_states = {}
+        for action in self.actions:
+            self.act(action)
+            new_state = self.encode()
+            world.restore(snapshot)
+            if new_state != state:
+                new_states.setdefault(new_state, action)
+        self._path.append((state, snapshot, new_states))
+        return [(action, new_state)
+                for new_state, action in new_states.items()]
+
+    def _reach(self, state):
+        """Put the world in state, as cheaply as possible"""
+        path = self._path
+        while path:
+            path_state, snapshot, new_states = path[-1]
+            if state in new_states:
+                self.world.restore(snapshot)
+                self.act(new_states[state])
+                return
+            path.pop()
+            self.world.undo()
+            if path_state == state:
+                return
+        self.decode(state)
+
+class Result:
+    """The outcome of a search
+
+    path is the list of moves that solves the puzzle, or None if no
+    solution was found; in that case, exhausted says whether every state
+    was searched, which means that there is no solution.  states is the
+    number of states expanded, and seconds how long the search took.
+    """
+    def __init__(self, path, exhausted, states, seconds):
+        self.path = path
+        self.exhausted = exhausted
+        self.states = states
+        self.seconds = seconds
+
+    def __str__(self):
+        if self.path is not None:
+            outcome = "solved in {} moves".format(len(self.path))
+        elif self.exhausted:
+            outcome = "no solution"
+        else:
+            outcome = "gave up"
+        return ("{}; {} states in {:.2f} s ({:,.0f} states/s)"
+                "".format(outcome, self.states, self.seconds,
+                          self.states_per_second))
+
+    @property
+    def states_per_second(self):
+        if not self.seconds:
+            return 0
+        return self.states / self.seconds
+
+def bfs(puzzle, *, limit=None):
+    """Search puzzle breadth-first and return the Result
+
+    The solution found is a shortest one.  If limit is given, the search
+    gives up after expanding that many states.
+    """
+    start = puzzle.start()
+    return _search(start, puzzle.solved(start),
+                   lambda chunks: (_expand(puzzle, chunk) for chunk in chunks),
+                   1, limit)
+
+def parallel_bfs(make_puzzle, args=(), *, processes=None, limit=None):
+    """Search breadth-first like bfs(), spreading the work over processes
+
+    make_puzzle(*args) is called once in this process and once in each
+    worker process to make the puzzle, so make_puzzle and args must be
+    picklable.  Each level of the search is split among the workers, and
+    the new states they find are collected here.
+    """
+    processes = processes or os.cpu_count() or 1
+    puzzle = make_puzzle(*args)
+    start = puzzle.start()
+    with multiprocessing.Pool(processes, _init_worker,
+                              (make_puzzle, args)) as pool:
+        return _search(start, puzzle.solved(start),
+                       lambda chunks: pool.imap_unordered(_expand_in_worker,
+                                                          chunks),
+                       processes, limit)
+
+def _search(start, start_solved, expand_chunks, processes, limit):
+    """Do a breadth-first search, expanding states with expand_chunks
+
+    expand_chunks takes a list of lists of states and yields the results
+    of _expand() for them, in any order.
+    """
+    started = time.perf_counter()
+    # State -> (previous state, move), to find the path back to the start
+    parents = {start: None}
+    frontier = [start]
+    expanded = 0
+    found = start if start_solved else None
+    while frontier and found is None:
+        size = max(1, min(_CHUNK_SIZE, len(frontier) // (processes * 4)))
+        chunks = [frontier[i:i + size] for i in range(0, len(frontier), size)]
+        frontier = []
+        for results in expand_chunks(chunks):
+            for state, moves in results:
+                expanded += 1
+                for move, new_state, solved in moves:
+                    if new_state not in parents:
+                        parents[new_state] = (state, move)
+                        frontier.append(new_state)
+                        if solved and found is None:
+                            found = new_state
+            if found is not None:
+                break
+            if limit is not None and expanded >= limit:
+                seconds = time.perf_counter() - started
+                return Result(None, False, expanded, seconds)
+
+    seconds = time.perf_counter() - started
+    if found is None:
+        return Result(None, not frontier, expanded, seconds)
+    path = []
+    while parents[found] is not None:
+        found, move = parents[found]
+        path.append(move)
+    path.reverse()
+    return Result(path, False, expanded, seconds)
+
+def _expand(puzzle, states):
+    """Return (state, [(move, new state, solved), ...]) for each state"""
+    return [(state, [(move, new_state, puzzle.solved(new_state))
+                     for move, new_state in puzzle.moves(state)])
+            for state in states]
+
+# The puzzle of a worker process started by parallel_bfs()
+_puzzle = None
+
+def _init_worker(make_puzzle=None, args=()):
+    global _puzzle
+    # SDL turns SIGTERM into a quit event once a window has been shown,
+    # which would keep the pool from stopping a forked worker
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    if make_puzzle is not None:
+        _puzzle = make_puzzle(*args)
+
+def _expand_in_worker(states):
+    return _expand(_puzzle, states)
+
+def ida_star(puzzle, *, limit=None):
+    """Search puzzle with iterative deepening A* and return the Result
+
+    The search goes depth-first, as deep as puzzle.estimate() says a
+    solution could be, and deeper on each pass; only the current path is
+    kept in memory.  If the estimate never overestimates, the solution is
+    a shortest one.  If limit is given, the search gives up after
+    expanding that many states.
+    """
+    started = time.perf_counter()
+    start = puzzle.start()
+    if puzzle.solved(start):
+        return Result([], False, 0, time.perf_counter() - started)
+    expanded = 0
+    bound = puzzle.estimate(start)
+    while True:
+        # The smallest estimated length beyond bound, for the next pass
+        next_bound = None
+        # The states and moves along the current path, and an iterator
+        # over the untried moves from each of the states
+        states, path = [start], []
+        on_path = {start}
+        untried = [iter(puzzle.moves(start))]
+        expanded += 1
+        while untried:
+            try:
+                move, new_state = next(untried[-1])
+            except StopIteration:
+                untried.pop()
+                on_path.remove(states.pop())
+                if path:
+                    path.pop()
+                continue
+            if new_state in on_path:
+                continue
+            length = len(path) + 1 + puzzle.estimate(new_state)
+            if length > bound:
+                if next_bound is None or length < next_bound:
+                    next_bound = length
+                continue
+            if puzzle.solved(new_state):
+                return Result(path + [move], False, expanded,
+                              time.perf_counter() - started)
+            if limit is not None and expanded >= limit:
+                return Result(None, False, expanded,
+                              time.perf_counter() - started)
+            states.append(new_state)
+            on_path.add(new_state)
+            path.append(move)
+            untried.append(iter(puzzle.moves(new_state)))
+            expanded += 1
+        if next_bound is None:
+            return Result(None, True, expanded, time.perf_counter() - started)
+        bound = next_bound
+
+def solve_all(make_puzzle, args_list, *, search=ida_star, processes=None,
+              **options):
+    """Solve a puzzle for each item of args_list, in parallel
+
+    make_puzzle(*args) is called in a worker process for each args tuple
+    in args_list, and the puzzle is searched there with search (ida_star
+    or bfs, given options such as limit).  Yield (args, Result) pairs in
+    the order of args_list.
+    """
+    tasks = ((make_puzzle, args, search, options) for args in args_list)
+    if processes == 1:
+        yield from map(_solve, tasks)
+        return
+    with multiprocessing.Pool(processes, _init_worker) as pool:
+        yield from pool.imap(_solve, tasks)
+
+def _solve(task):
+    make_puzzle, args, search, options = task
+    return args, search(make_puzzle(*args), **options)
@@ -1,14 +1,51 @@
+import array
 import itertools
 import logging
 import random
-import sys
 
-import sdl2.ext
+import sdl2
 
+from . import entity as _entity
+from . import level
+from . import profile
+from . import scheduler as _scheduler
 from .entity import Entity
 from .grid import Grid
 from .resource import file
 
+# How many free cells spawn_random tries before listing the allowed ones
+_RANDOM_GUESSES = 16
+
+# Bits of World._occupied: the cell holds an entity, and the cell is in
+# World._free
+_OCCUPIED = 1
+_LISTED = 2
+# Maps each byte of World._occupied, before World._free is made, to
+# whether the cell is free
+_FREE = bytes([1]) + bytes(255)
+
+# Maps each byte of World._occupied to 1 if the cell holds an entity
+_HOLDS_ENTITY = bytes(byte & _OCCUPIED for byte in range(256))
+# Spatial queries covering more cells than this many per entity look
+# through the entities instead of the cells
+_CELLS_PER_ENTITY = 32
+
+# Stands for an attribute that an object didn't have, in the journal
+_MISSING = object()
+
+class _Snapshot:
+    """A point in a World's journal that restore() can go back to"""
+    __slots__ = ['position', 'scheduler', 'scheduler_state', 'random_state',
+                 'valid']
+
+    def __init__(self, position, scheduler, random_state):
+        self.position = position
+        self.scheduler = scheduler
+        self.scheduler_state = (None if scheduler is None
+                                else scheduler.snapshot())
+        self.random_state = random_state
+        self.valid = True
+
 class World:
     background = None
     grid = Grid(8, 8)
@@ -17,14 +54,27 @@ class World:
     score_offset = None
     tile_size = (16, 16)
     window_title = "Subjunctive!"
-
-    def __init__(self, grid=None):
+    # Undo information, only recorded while there are snapshots
+    _journal = None
+    _snapshots = ()
+    # Objects kept in sync with the world, like subjunctive.arrays.WorldArray
+    _views = ()
+    # Whether the world is counted in entity._watchers
+    _watching = False
+
+    def __init__(self, grid=None, *, scheduler=None):
         super().__init__()
         if grid is not None:
             self.grid = grid
+        self.random = random.Random()
+        # The scheduler that runs this world's timed calls; worlds share
+        # subjunctive.scheduler's unless they are given their own
+        self.scheduler = (_scheduler._default_scheduler if scheduler is None
+                          else scheduler)
 
-        # Set up locations
-        self._entities = {loc: None for loc in self.grid}
+        # Set up locations; only occupied cells are stored
+        self.clear()
+        self._invalidate()
 
         # Copy the default overlays
         self.overlays = self.__class__.overlays[:]
@@ -36,79 +86,334 @@ class World:
             #self.score_label = pyglet.text.Label(
             #    "", bold=True, color=(0, 0, 0, 255), x=x, y=y)
 
+    def __setattr__(self, name, value):
+        if self._journal is not None and not name.startswith('_'):
+            self._record(self, name)
+        object.__setattr__(self, name, value)
+
     @property
     def entities(self):
-        return (e for e in self._entities.values() if e is not None)
+        return iter(list(self._entities.values()))
+
+    def at(self, location):
+        """Return the entity at location, or None if it is empty"""
+        return self._entities.get(location)
 
     def clear(self):
-        self._entities = {self.grid.Location(x, y): None
-                          for x in range(self.grid.width)
-                          for y in range(self.grid.height)}
+        """Remove every entity, and forget every snapshot"""
+        for snapshot in self._snapshots:
+            snapshot.valid = False
+        self._journal = None
+        self._snapshots = []
+        self._entities = {}
+        self._locations = {}
+        # Class -> {entity: None} for the entities of that class or any of
+        # its subclasses, in the order they were placed
+        self._by_type = {}
+        # One byte per cell, indexed by _index(), holding _OCCUPIED and
+        # _LISTED bits
+        self._occupied = bytearray(self.grid.width * self.grid.height)
+        # Indices of free cells for spawn_random, made when first needed.
+        # Cells that are filled stay listed until they are picked.
+        self._free = None
+        for view in self._views:
+            view._clear()
+        self._update_watching()
 
     def count(self, entity_type):
-        """Return the number of entity_type entities currently in the world"""
-        return sum(1 for e in self._entities.values()
-                   if isinstance(e, entity_type))
+        """Return the number of entity_type entities currently in the world
+
+        As with isinstance(), entity_type may also be a tuple of types.
+        """
+        if isinstance(entity_type, tuple):
+            return len(self._of_types(entity_type))
+        return len(self._by_type.get(entity_type, ()))
+
+    def entities_of(self, entity_type):
+        """Return a list of the entity_type entities currently in the world
+
+        As with isinstance(), entity_type may also be a tuple of types.
+        """
+        if isinstance(entity_type, tuple):
+            return list(self._of_types(entity_type))
+        return list(self._by_type.get(entity_type, ()))
+
+    def in_rect(self, x, y, width, height):
+        """Return (location, entity) for the entities in a rectangle
+
+        The rectangle is as for Grid.rect(), and the entities are listed
+        row by row.
+        """
+        return self._entities_in(self.grid._rect_spans(x, y, width, height))
+
+    def near(self, location, radius=1, metric='manhattan'):
+        """Return (location, entity) for the entities within radius
+
+        The neighborhood is as for Grid.near(), so any entity at location
+        itself is left out, and the entities are listed row by row.
+        """
+        return [(near, entity) for near, entity in
+                self._entities_in(
+                    self.grid._near_spans(location, radius, metric))
+                if near is not location]
+
+    def cast(self, location, direction, distance=None):
+        """Return (location, entity) for the first entity in direction
+
+        The ray starts next to location and stops at the edge of the grid,
+        or after distance steps; if it meets nothing, None is returned.
+        """
+        dx, dy = direction.delta
+        steps = self.grid._steps_to_edge(location, dx, dy)
+        if distance is not None:
+            steps = min(steps, distance)
+        if steps <= 0:
+            return None
+        # The cells along the ray are evenly spaced in _occupied
+        step = dx + dy * self.grid.width
+        start = self._index(location) + step
+        end = start + steps * step
+        cells = self._occupied[start:end if end >= 0 else None:step]
+        found = cells.translate(_HOLDS_ENTITY).find(1)
+        if found < 0:
+            return None
+        hit = self.grid.Location(location.x + dx * (found + 1),
+                                 location.y + dy * (found + 1))
+        return hit, self._entities[hit]
+
+    def _entities_in(self, spans):
+        """Return (location, entity) for the entities in the spans
+
+        spans are (y, x1, x2) rows, in order.  Each row is scanned in
+        _occupied, unless there are far fewer entities than cells.
+        """
+        cells = sum(x2 - x1 + 1 for y, x1, x2 in spans)
+        entities, Location = self._entities, self.grid.Location
+        if cells > _CELLS_PER_ENTITY * len(entities):
+            rows = {y: (x1, x2) for y, x1, x2 in spans}
+            found = []
+            for location, entity in entities.items():
+                span = rows.get(location.y)
+                if span is not None and span[0] <= location.x <= span[1]:
+                    found.append((location, entity))
+            found.sort(key=lambda item: (item[0].y, item[0].x))
+            return found
+
+        found = []
+        occupied, width = self._occupied, self.grid.width
+        for y, x1, x2 in spans:
+            start = y * width
+            row = occupied[start + x1:start + x2 + 1].translate(_HOLDS_ENTITY)
+            x = row.find(1)
+            while x >= 0:
+                location = Location(x1 + x, y)
+                found.append((location, entities[location]))
+                x = row.find(1, x + 1)
+        return found
+
+    def _of_types(self, entity_types):
+        entities = {}
+        for entity_type in entity_types:
+            entities.update(self._by_type.get(entity_type, {}))
+        return entities
+
+    def _cell_rect(self, location, *images):
+        """Return the rect covered by location's cell and the given images"""
+        x, y = self._pixels(location)
+        w, h = self.tile_size
+        for image in images:
+            if image is not None:
+                w, h = max(w, image.w), max(h, image.h)
+        return sdl2.SDL_Rect(x, y, w, h)
+
+    def _changes(self):
+        """Return a list of the rects that changed since the last call
+
+        None is returned instead if everything needs to be redrawn: the
+        first time, after _invalidate(), or when the background changes.
+        Afterwards, self._drawn maps each occupied location to the image
+        that should be drawn there.
+        """
+        overlays = list(self.overlays)
+        drawn = {location: entity.image
+                 for location, entity in self._entities.items()}
+
+        rects = None
+        if (self._drawn is not None and
+                self.background is self._drawn_background):
+            rects = []
+            for location, image in drawn.items():
+                old_image = self._drawn.get(location)
+                if image is not old_image:
+                    rects.append(self._cell_rect(location, image, old_image))
+            for location in self._drawn.keys() - drawn.keys():
+                rects.append(self._cell_rect(location, self._drawn[location]))
+            if overlays != self._drawn_overlays:
+                for offset, image in overlays + self._drawn_overlays:
+                    if ((offset, image) not in overlays or
+                            (offset, image) not in self._drawn_overlays):
+                        rects.append(sdl2.SDL_Rect(offset[0], offset[1],
+                                                   image.w, image.h))
+
+        self._drawn = drawn
+        self._drawn_background = self.background
+        self._drawn_overlays = overlays
+        return rects
 
     def _draw(self, window):
+        """Draw the parts of the world that changed since the last call
+
+        Only the cells and overlays that changed are redrawn and copied to
+        the screen, unless _changes() says that everything should be.  If
+        nothing changed, nothing is drawn.
+        """
         surface = window.get_surface()
+        rects = self._changes()
+        if rects is not None:
+            # Past a point, one big blit is cheaper than many small ones
+            area = sum(rect.w * rect.h for rect in rects)
+            if area > surface.w * surface.h // 2:
+                rects = None
+
+        if rects is None:
+            self._redraw(surface, None)
+            window.refresh()
+        elif rects:
+            for rect in rects:
+                self._redraw(surface, rect)
+            sdl2.SDL_SetClipRect(surface, None)
+            sdl2.SDL_UpdateWindowSurfaceRects(
+                window.window, (sdl2.SDL_Rect * len(rects))(*rects),
+                len(rects))
+
+    def _invalidate(self):
+        """Make the next _changes() report that everything changed"""
+        self._drawn = None
+
+    def _redraw(self, surface, rect):
+        """Draw everything that overlaps rect (or the whole surface)"""
+        sdl2.SDL_SetClipRect(surface, rect)
         if self.background:
             sdl2.SDL_BlitSurface(self.background, None, surface, None)
-        # Update the position of each sprite
-        for location, entity in self._entities.items():
-            if entity:
-                w, h = entity.image.w, entity.image.h
-                x, y = self._pixels(location)
-                sdl2.SDL_BlitSurface(entity.image, None, surface,
-                                     sdl2.SDL_Rect(x, y))
+        else:
+            sdl2.SDL_FillRect(surface, rect, 0)
 
-        # Draw overlays
-        for offset, image in self.overlays:
-            sdl2.SDL_BlitSurface(image, None, surface, sdl2.SDL_Rect(*offset))
+        # Update the position of each sprite
+        if rect is None:
+            entities = self._entities.items()
+        else:
+            entities = self._entities_overlapping(rect)
+        # The background is a blit; filling with black isn't
+        blits = int(bool(self.background))
+        for location, entity in entities:
+            x, y = self._pixels(location)
+            sdl2.SDL_BlitSurface(entity.image, None, surface,
+                                 sdl2.SDL_Rect(x, y))
+            blits += 1
+
+        # Draw the overlays that overlap rect
+        for (x, y), image in self.overlays:
+            if rect is not None and not (
+                    x < rect.x + rect.w and rect.x < x + image.w and
+                    y < rect.y + rect.h and rect.y < y + image.h):
+                continue
+            sdl2.SDL_BlitSurface(image, None, surface, sdl2.SDL_Rect(x, y))
+            blits += 1
+        profile.count('blits', blits)
 
         # Draw the score
         #if self.score_offset:
         #    self.score_label.text = str(self.score)
         #    self.score_label.draw()
-        window.refresh()
+
+    def _entities_overlapping(self, rect):
+        """Yield (location, entity) for the cells that overlap rect"""
+        (tile_w, tile_h), (offset_x, offset_y) = self.tile_size, self.grid_offset
+        x1 = max(0, (rect.x - offset_x) // tile_w)
+        y1 = max(0, (rect.y - offset_y) // tile_h)
+        x2 = min(self.grid.width - 1, (rect.x + rect.w - 1 - offset_x) // tile_w)
+        y2 = min(self.grid.height - 1, (rect.y + rect.h - 1 - offset_y) // tile_h)
+        if (x2 - x1 + 1) * (y2 - y1 + 1) > len(self._entities):
+            for location, entity in self._entities.items():
+                if x1 <= location.x <= x2 and y1 <= location.y <= y2:
+                    yield location, entity
+        else:
+            for x in range(x1, x2 + 1):
+                for y in range(y1, y2 + 1):
+                    entity = self._entities.get(self.grid.Location(x, y))
+                    if entity is not None:
+                        yield self.grid.Location(x, y), entity
+
+    def _fill(self, level, definitions, player=None):
+        """Create the entities described by level and place them in bulk
+
+        Nothing is logged or checked per cell, so the world must be empty.
+        Return the player entity (the last one, if there are several).
+        """
+        codes = {char.encode('latin-1'): entity_type
+                 for char, entity_type in definitions.items()}
+        for code in level.undefined(b''.join(codes)):
+            logging.error("Character {!r} is not defined; ignoring"
+                          "".format(chr(code)))
+
+        Location, width, put = self.grid.Location, level.width, self._put
+        _player = None
+        player_index = -1
+        for code, entity_type in codes.items():
+            if not entity_type:
+                continue
+            for index in level.find(code):
+                entity = entity_type(self)
+                put(entity, Location(index % width, index // width))
+                if entity_type == player and index > player_index:
+                    _player, player_index = entity, index
+        return _player
+
+    @classmethod
+    def from_level(cls, contents, definitions, player):
+        """Return a World populated as described by a level.Level
+
+        The arguments and return value are as for load().
+        """
+        world = cls(Grid(contents.width, contents.height))
+        return world, world._fill(contents, definitions, player)
 
     @classmethod
     def load(cls, level_file, definitions, player):
-        """Return a World with a grid populated as described by level_file"""
-
-        with file(level_file) as f:
-            lines = [line for line in map(str.strip, f) if line != '']
-
-        width, height = len(lines[0]), len(lines)
-        grid = Grid(width, height)
-        world = cls(grid)
-
-        for y, line in enumerate(lines, start=0):
-            for x, char in enumerate(line):
-                try:
-                    entity_type = definitions[char]
-                except KeyError:
-                    logging.error("Character {!r} is not defined; ignoring"
-                                  "".format(char))
-                else:
-                    if entity_type:
-                        if entity_type == player:
-                            _player = entity_type(world)
-                            world.place(_player, world.grid.Location(x, y))
-                        else:
-                            world.place(entity_type(world), world.grid.Location(x, y))
+        """Return a World with a grid populated as described by level_file
 
-        return world, _player
+        level_file can be a text level or a binary level made with
+        subjunctive.level.compile().  definitions maps each character to
+        the entity type to put there (or None for nothing).  The return
+        value is (world, player), where player is the entity created for
+        the player type.
+        """
+        with file(level_file, 'rb') as f:
+            contents = level.read(f)
+        try:
+            return cls.from_level(contents, definitions, player)
+        finally:
+            contents.close()
 
     def locate(self, entity):
         """Return entity's location in the world
 
         If entity is not in the world, ValueError is raised.
         """
-        for location, suspect in self._entities.items():
-            if suspect is entity:
-                return location
-        raise ValueError("{} not in world".format(entity))
+        try:
+            return self._locations[entity]
+        except KeyError:
+            raise ValueError("{} not in world".format(entity)) from None
+
+    def _window_size(self):
+        """Return the size in pixels of a window showing the world"""
+        if self.background is not None:
+            return self.background.w, self.background.h
+        return (self.grid.width * self.tile_size[0],
+                self.grid.height * self.tile_size[1])
+
+    def _index(self, location):
+        return location.y * self.grid.width + location.x
 
     def _pixels(self, location):
         return (location.x * self.tile_size[0] + self.grid_offset[0],
@@ -117,32 +422,86 @@ class World:
     def place(self, entity, location):
         """Place entity at location
 
-        If there is already an entity at location, ValueError is raised.
+        If there is already an entity at location, or if entity is already
+        somewhere else in the world, ValueError is raised.
         """
-        logging.debug("Placing {} at {}".format(entity, location))
-        if self._entities[location] is not None:
+        logging.debug("Placing %s at %s", entity, location)
+        if location in self._entities:
             raise ValueError("Location {} already contains {}"
                              "".format(location, self._entities[location]))
+        if entity in self._locations:
+            raise ValueError("{} is already at {}"
+                             "".format(entity, self._locations[entity]))
+        self._put(entity, location)
+
+    def _put(self, entity, location):
+        """Store entity at location without any checks"""
+        if self._journal is not None:
+            self._journal.append((self._take, entity))
         self._entities[location] = entity
-
-    def _read_level(self, path):
-        """Part of incomplete level-file-loading code"""
-        columns = []
-        with open(path, "r") as leveltext_file:
-            rows = leveltext_file.read().splitlines()
-            for i in rows:
-                columns.append(i.split())
-        return rows, columns
+        self._locations[entity] = location
+        self._occupied[self._index(location)] |= _OCCUPIED
+        by_type = self._by_type
+        for cls in type(entity).__mro__:
+            try:
+                by_type[cls][entity] = None
+            except KeyError:
+                by_type[cls] = {entity: None}
+        for view in self._views:
+            view._put(entity, location)
+
+    def _put_all(self, entities, locations):
+        """Store entities, all of one type, at locations without any checks"""
+        if not entities:
+            return
+        if self._journal is not None:
+            self._journal.extend((self._take, entity) for entity in entities)
+        self._entities.update(zip(locations, entities))
+        self._locations.update(zip(entities, locations))
+        occupied, width = self._occupied, self.grid.width
+        for location in locations:
+            occupied[location.y * width + location.x] |= _OCCUPIED
+        placed = dict.fromkeys(entities)
+        by_type = self._by_type
+        for cls in type(entities[0]).__mro__:
+            try:
+                by_type[cls].update(placed)
+            except KeyError:
+                by_type[cls] = placed.copy()
+        for view in self._views:
+            for entity, location in zip(entities, locations):
+                view._put(entity, location)
 
     def remove(self, entity):
         """Remove entity from the world
 
         If entity is not in the world, ValueError is raised.
         """
-        location = self.locate(entity)
-        self._entities[location] = None
+        if entity not in self._locations:
+            raise ValueError("{} not in world".format(entity))
+        return self._take(entity)
+
+    def _take(self, entity):
+        """Remove entity, which must be in the world, and return its location"""
+        location = self._locations.pop(entity)
+        if self._journal is not None:
+            self._journal.append((self._put, entity, location))
+        del self._entities[location]
+        self._vacate(self._index(location))
+        for cls in type(entity).__mro__:
+            del self._by_type[cls][entity]
+        for view in self._views:
+            view._take(entity, location)
         return location
 
+    def _vacate(self, index):
+        """Mark the cell at index as free"""
+        if self._free is not None and not self._occupied[index] & _LISTED:
+            self._free.append(index)
+            self._occupied[index] = _LISTED
+        else:
+            self._occupied[index] &= _LISTED
+
     def replace(self, entity, new_entity):
         """Replace entity with new_entity
 
@@ -151,46 +510,221 @@ class World:
         location = self.remove(entity)
         self.place(new_entity, location)
 
-    def _place_objects(self, obj_list, rows, columns):
-        """Part of incomplete level-file-loading code"""
-        for ly, i in enumerate(rows):
-            for lx, j in enumerate(columns[ly]):
-                try:
-                    e = obj_list[j]()
-                    self.place(e, self.grid.Location(lx, self.grid.height-ly-1))
-                except KeyError:
-                    pass
-
-    def spawn_random(self, entity_type, number=1, avoid=None, edges=True):
+    def _shift(self, moves):
+        """Move entities without any checks
+
+        moves is a list of (entity, location) pairs; each location must be
+        empty once all of the entities have been taken out.  The entities
+        stay in the world throughout, so only their locations are updated.
+        """
+        entities, locations = self._entities, self._locations
+        old_locations = [locations[entity] for entity, _ in moves]
+        if self._journal is not None:
+            self._journal.append((self._shift, [
+                (entity, location)
+                for (entity, _), location in zip(moves, old_locations)]))
+        for location in old_locations:
+            del entities[location]
+        for entity, location in moves:
+            entities[location] = entity
+            locations[entity] = location
+        for location in old_locations:
+            if location not in entities:
+                self._vacate(self._index(location))
+        for _, location in moves:
+            self._occupied[self._index(location)] |= _OCCUPIED
+        for view in self._views:
+            for (entity, _), location in zip(moves, old_locations):
+                view._take(entity, location)
+            for entity, location in moves:
+                view._put(entity, location)
+
+    def snapshot(self, *, scheduler=None, random_state=False):
+        """Start recording changes, and return a snapshot of the world
+
+        The snapshot can be given to restore() to undo everything that
+        changes from now on: entities placed, removed and moved, and
+        attributes assigned on the world and on its entities (changes
+        inside attribute values, like appending to a list, are not
+        recorded).  If scheduler is given, its pending calls are saved as
+        well.  Taking a snapshot is cheap, and restoring one only costs as
+        much as the changes it undoes.
+
+        If random_state is true, the state of self.random and of the free
+        cells spawn_random() picks from are saved too, so that it makes
+        the same choices again after restore().  This copies a byte per
+        cell, so it is for occasional snapshots, like replay checkpoints.
+        """
+        if self._journal is None:
+            self._journal = []
+            self._update_watching()
+        if random_state:
+            random_state = (self.random.getstate(), bytes(self._occupied),
+                            None if self._free is None else self._free[:])
+        else:
+            random_state = None
+        snapshot = _Snapshot(len(self._journal), scheduler, random_state)
+        self._snapshots.append(snapshot)
+        return snapshot
+
+    def restore(self, snapshot=None):
+        """Undo every change made since snapshot (by default, the latest)
+
+        The snapshot can be restored again later, but snapshots taken after
+        it can't.  ValueError is raised if snapshot can't be restored.
+        """
+        if snapshot is None:
+            if not self._snapshots:
+                raise ValueError("No snapshot to restore")
+            snapshot = self._snapshots[-1]
+        if not snapshot.valid or snapshot not in self._snapshots:
+            raise ValueError("Snapshot can no longer be restored")
+        while self._snapshots[-1] is not snapshot:
+            self._snapshots.pop().valid = False
+
+        journal = self._journal
+        # Undoing changes shouldn't record them
+        self._journal = None
+        try:
+            while len(journal) > snapshot.position:
+                function, *args = journal.pop()
+                function(*args)
+        finally:
+            self._journal = journal
+        if snapshot.scheduler is not None:
+            snapshot.scheduler.restore(snapshot.scheduler_state)
+        if snapshot.random_state is not None:
+            state, occupied, free = snapshot.random_state
+            self.random.setstate(state)
+            self._occupied = bytearray(occupied)
+            self._free = None if free is None else free[:]
+
+    def undo(self):
+        """Restore the latest snapshot and forget it
+
+        Return False if there was no snapshot to restore.  Once there are
+        no snapshots left, changes stop being recorded.
+        """
+        if not self._snapshots:
+            return False
+        self.restore()
+        self._snapshots.pop().valid = False
+        if not self._snapshots:
+            self._journal = None
+            self._update_watching()
+        return True
+
+    def _update_watching(self):
+        """Watch entity attributes only while there is a journal or a view
+
+        restore() and WorldArray only drop the journal or a view for a
+        moment, so they don't call this.
+        """
+        watching = self._journal is not None or bool(self._views)
+        if watching != self._watching:
+            self._watching = watching
+            _entity._watch(1 if watching else -1)
+
+    def _record(self, obj, name):
+        """Record the value of obj's name attribute before it changes"""
+        self._journal.append((self._restore_attribute, obj, name,
+                              vars(obj).get(name, _MISSING)))
+
+    def _restore_attribute(self, obj, name, value):
+        if value is _MISSING:
+            vars(obj).pop(name, None)
+        else:
+            vars(obj)[name] = value
+        if obj is not self:
+            for view in self._views:
+                view._changed(obj, name)
+
+    def spawn_random(self, entity_type, number=1, avoid=None, edges=True,
+                     rng=None):
         """Spawn number new entity_types at random locations
 
-        If avoid is an entity, new entities will not spawn in the same row or
-        column as that entity.
+        If avoid is an entity or a location, new entities will not spawn in
+        the same row or column as it.
 
         If edges is True, entities can spawn on the edges of the board.
+
+        rng is the random.Random to use; it defaults to self.random.  Fewer
+        than number entities are spawned if the board fills up.  Return a
+        list of the new entities.
         """
-        logging.debug("Spawning {} {}s".format(number, entity_type))
-        invalid_x, invalid_y = [], []
-        if avoid:
-            invalid_x.append(avoid.x)
-            invalid_y.append(avoid.y)
+        logging.debug("Spawning %s %ss", number, entity_type)
+        if rng is None:
+            rng = self.random
+        width, height = self.grid.width, self.grid.height
+        invalid_x, invalid_y = set(), set()
+        if isinstance(avoid, Entity):
+            avoid = self.locate(avoid)
+        if avoid is not None:
+            invalid_x.add(avoid.x)
+            invalid_y.add(avoid.y)
         if not edges:
-            invalid_x += [0, self.grid.width - 1]
-            invalid_y += [0, self.grid.height - 1]
-        available_locations = [loc for loc, entity in self._entities.items()
-                               if not entity and loc.x not in invalid_x
-                                             and loc.y not in invalid_y]
+            invalid_x.update((0, width - 1))
+            invalid_y.update((0, height - 1))
+
+        # While the board is mostly empty, guess at cells directly; after
+        # that, pick from the free cells, which is quick unless most of
+        # them are excluded, in which case the allowed ones are listed once
+        free, occupied = self._free, self._occupied
+        candidates = None
+        guesses = 0
+        Location, put = self.grid.Location, self._put
         new_entities = []
-        for _ in range(number):
-            if not available_locations:
-                break
-            location = random.choice(available_locations)
+        while len(new_entities) < number:
+            if free is None:
+                for _ in range(_RANDOM_GUESSES):
+                    index = rng.randrange(len(occupied))
+                    if not (occupied[index] or index % width in invalid_x or
+                            index // width in invalid_y):
+                        break
+                else:
+                    free, occupied = self._free_cells(), self._occupied
+                    continue
+            elif candidates is None:
+                if not free:
+                    break
+                position = rng.randrange(len(free))
+                index = free[position]
+                if occupied[index] & _OCCUPIED:
+                    # Filled since it was listed
+                    _swap_remove(free, position)
+                    occupied[index] = _OCCUPIED
+                    continue
+                if index % width in invalid_x or index // width in invalid_y:
+                    guesses += 1
+                    if guesses == _RANDOM_GUESSES:
+                        candidates = array.array('i', (
+                            i for i in free if not occupied[i] & _OCCUPIED
+                            and i % width not in invalid_x
+                            and i // width not in invalid_y))
+                    continue
+                guesses = 0
+                _swap_remove(free, position)
+                occupied[index] = 0
+            else:
+                if not candidates:
+                    break
+                # Left in self._free, where it will be found to be filled
+                index = _swap_remove(candidates,
+                                     rng.randrange(len(candidates)))
             entity = entity_type(self)
-            self.place(entity, location)
+            put(entity, Location(index % width, index // width))
             new_entities.append(entity)
-            available_locations.remove(location)
         return new_entities
 
+    def _free_cells(self):
+        """Return the free cell index, making it if needed"""
+        if self._free is None:
+            self._free = array.array('i', itertools.compress(
+                range(len(self._occupied)), self._occupied.translate(_FREE)))
+            self._occupied = self._occupied.translate(
+                bytes([_LISTED]) + bytes(range(1, 256)))
+        return self._free
+
     def swap(self, entity1, entity2):
         loc1 = self.locate(entity1)
         self.remove(entity1)
@@ -199,7 +733,10 @@ class World:
         self.place(entity1, loc2)
         self.place(entity2, loc1)
 
-if '--debug' in sys.argv:
-    logging.basicConfig(level=logging.DEBUG)
-else:
-    logging.basicConfig(level=logging.INFO)
+def _swap_remove(items, position):
+    """Remove and return items[position], moving the last item into its place"""
+    item = items[position]
+    last = items.pop()
+    if position < len(items):
+        items[position] = last
+    return item
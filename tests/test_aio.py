@@ -0,0 +1,28 @@
+import asyncio
+import os
+import unittest
+
+# The game needs a window, even on a machine without a display
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+from subjunctive import aio
+from subjunctive.game import Game
+from subjunctive.grid import Grid
+from subjunctive.loop import exit
+from subjunctive.scheduler import Scheduler
+from subjunctive.world import World
+
+class PollTest(unittest.TestCase):
+    def test_polls_less_without_input(self):
+        game = Game(World(Grid(2, 2), scheduler=Scheduler()))
+        steps = []
+        step = game.step
+        game.step = lambda: steps.append(None) or step()
+        game.scheduler.call(exit, after='1500ms')
+        asyncio.run(aio.play(game, input_rate=60, idle_input_rate=4))
+        # About 60 polls in the first second, then 2 in the next half
+        self.assertLess(len(steps), 75)
+        self.assertGreater(len(steps), 30)
+
+if __name__ == '__main__':
+    unittest.main()
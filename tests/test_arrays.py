@@ -0,0 +1,94 @@
+import unittest
+
+import numpy
+
+from subjunctive.arrays import WorldArray
+from subjunctive.entity import Entity
+from subjunctive.grid import Grid, right
+from subjunctive.world import World
+
+class Hazard(Entity):
+    heat = 1
+
+class Fire(Hazard):
+    heat = 5
+
+class SyncTest(unittest.TestCase):
+    def setUp(self):
+        self.world = World(Grid(4, 3))
+        self.Location = self.world.grid.Location
+        self.hazard = Hazard(self.world)
+        self.world.place(self.hazard, self.Location(1, 1))
+        self.view = WorldArray(self.world)
+        self.addCleanup(self.view.close)
+        self.heat = self.view.state('heat')
+
+    def assertInSync(self):
+        view, world = self.view, self.world
+        for location in world.grid:
+            entity = world.at(location)
+            cell = location.y, location.x
+            if entity is None:
+                self.assertEqual(view.types[cell], 0)
+                self.assertEqual(self.heat[cell], 0)
+            else:
+                self.assertIs(view.id_types[view.types[cell]], type(entity))
+                self.assertEqual(self.heat[cell], entity.heat)
+
+    def test_world_changes(self):
+        world, Location = self.world, self.Location
+        self.assertInSync()
+        fire = Fire(world)
+        world.place(fire, Location(0, 0))
+        self.assertInSync()
+        self.hazard.move(right)
+        self.assertInSync()
+        world.swap(fire, self.hazard)
+        self.assertInSync()
+        self.hazard.heat = 3
+        self.assertEqual(self.heat[0, 0], 3)
+        world.replace(fire, Hazard(world))
+        world.remove(self.hazard)
+        self.assertInSync()
+        world.clear()
+        self.assertFalse(self.view.types.any())
+        self.assertFalse(self.heat.any())
+
+    def test_restore(self):
+        world = self.world
+        world.snapshot()
+        self.hazard.heat = 3
+        self.hazard.move(right)
+        world.place(Fire(world), self.Location(0, 0))
+        world.spawn_random(Hazard, 3)
+        self.assertInSync()
+        world.undo()
+        self.assertInSync()
+        self.assertEqual(self.heat[1, 1], 1)
+        self.assertEqual(self.view.counts(), {Hazard: 1})
+
+    def test_bulk_changes(self):
+        view, world = self.view, self.world
+        top = numpy.zeros(view.shape, bool)
+        top[0] = True
+        fires = view.place(Fire, top | view.mask(Hazard))
+        self.assertEqual(len(fires), 4)
+        self.assertEqual(world.count(Fire), 4)
+        self.assertInSync()
+        self.assertEqual(view.count(Hazard), 5)
+        self.assertEqual(view.counts(), {Hazard: 1, Fire: 4})
+        # The middle two fires have two fires next to them, and the
+        # hazard below them has three
+        removed = view.remove(view.neighbors(view.mask(Fire)) >= 2)
+        self.assertEqual(removed, [fires[1], fires[2], self.hazard])
+        self.assertEqual(world.entities_of(Entity), [fires[0], fires[3]])
+        self.assertInSync()
+
+    def test_close(self):
+        self.view.close()
+        self.world.remove(self.hazard)
+        self.assertEqual(self.view.types[1, 1],
+                         self.view.type_id(Hazard))
+
+if __name__ == '__main__':
+    unittest.main()
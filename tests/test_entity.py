@@ -0,0 +1,108 @@
+import unittest
+
+from subjunctive.entity import Entity
+from subjunctive.grid import Grid, left, right
+from subjunctive.world import World
+
+class Tile(Entity):
+    """Swaps places with whatever pushes it, like Floorpaint's tiles"""
+    def push(self, direction, pusher=None):
+        self.world.swap(self, pusher)
+
+class Wall(Entity):
+    def push(self, direction, pusher=None):
+        pass
+
+class Crate(Entity):
+    pushable = True
+
+class Coin(Entity):
+    """Picked up by whatever pushes it"""
+    def push(self, direction, pusher=None):
+        self.world.remove(self)
+
+class MoveTest(unittest.TestCase):
+    def setUp(self):
+        self.world = World(Grid(3, 1))
+        self.mover = Entity(self.world)
+        self.world.place(self.mover, self.world.grid.Location(0, 0))
+
+    def test_moved_by_push(self):
+        self.world.place(Tile(self.world), self.world.grid.Location(1, 0))
+        self.assertTrue(self.mover.move(right))
+        self.assertEqual(self.world.locate(self.mover),
+                         self.world.grid.Location(1, 0))
+
+    def test_blocked(self):
+        self.world.place(Wall(self.world), self.world.grid.Location(1, 0))
+        self.assertFalse(self.mover.move(right))
+        self.assertFalse(self.mover.move(left))
+        self.assertEqual(self.world.locate(self.mover),
+                         self.world.grid.Location(0, 0))
+
+class PushChainTest(unittest.TestCase):
+    def setUp(self):
+        self.world = World(Grid(6, 1))
+        self.mover = self.line(Entity, Crate, Crate, Crate)[0]
+
+    def line(self, *types):
+        """Place an entity of each type in a row from the left edge"""
+        entities = []
+        for x, entity_type in enumerate(types):
+            entity = entity_type(self.world)
+            self.world.place(entity, self.world.grid.Location(x, 0))
+            entities.append(entity)
+        return entities
+
+    def positions(self):
+        return [str(self.world.at(location)) for location in self.world.grid]
+
+    def test_pushed_along(self):
+        self.assertTrue(self.mover.move(right))
+        self.assertEqual(self.positions(),
+                         ['None', 'Entity', 'Crate', 'Crate', 'Crate', 'None'])
+        self.assertTrue(self.mover.move(right))
+        self.assertFalse(self.mover.move(right))
+        self.assertEqual(self.positions(),
+                         ['None', 'None', 'Entity', 'Crate', 'Crate', 'Crate'])
+
+    def test_blocked_at_end(self):
+        self.world.place(Wall(self.world), self.world.grid.Location(4, 0))
+        before = self.positions()
+        self.assertFalse(self.mover.move(right))
+        self.assertEqual(self.positions(), before)
+
+    def test_end_moves_away(self):
+        self.world.place(Coin(self.world), self.world.grid.Location(4, 0))
+        self.assertTrue(self.mover.move(right))
+        self.assertEqual(self.world.count(Coin), 0)
+        self.assertEqual(self.positions(),
+                         ['None', 'Entity', 'Crate', 'Crate', 'Crate', 'None'])
+
+    def test_end_swaps(self):
+        # The tile swaps with the last crate, which leaves no room
+        self.world.place(Tile(self.world), self.world.grid.Location(4, 0))
+        self.assertFalse(self.mover.move(right))
+        self.assertEqual(self.positions(),
+                         ['Entity', 'Crate', 'Crate', 'Tile', 'Crate', 'None'])
+
+class WatchedAttributeTest(unittest.TestCase):
+    def test_watched_only_while_needed(self):
+        world, other = World(Grid(2, 2)), World(Grid(2, 2))
+        mover = Entity(world)
+        self.assertNotIn('__setattr__', vars(Entity))
+        world.snapshot()
+        other.snapshot()
+        mover.name = 'renamed'
+        world.undo()
+        self.assertEqual(mover.name, 'Entity')
+        # other still has a snapshot, but world records nothing
+        mover.name = 'renamed'
+        self.assertIn('__setattr__', vars(Entity))
+        self.assertIsNone(world._journal)
+        other.undo()
+        self.assertNotIn('__setattr__', vars(Entity))
+        self.assertEqual(mover.name, 'renamed')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import itertools
+import unittest
+
+from subjunctive import generate
+from subjunctive.level import Level
+
+def make_level(rng, width, height):
+    """Return a level of random blocks, or None for a quarter of them"""
+    if rng.random() < 0.25:
+        return None
+    return Level(width, height,
+                 bytes(rng.choice(b'-b') for _ in range(width * height)))
+
+def cells(levels):
+    return [(index, level.cells) for index, level in levels]
+
+class GenerateTest(unittest.TestCase):
+    def test_same_for_seed(self):
+        levels = cells(generate.generate(make_level, 50, args=(4, 3),
+                                         seed=7, processes=1))
+        self.assertLess(len(levels), 50)
+        self.assertEqual([index for index, _ in levels],
+                         sorted(index for index, _ in levels))
+        # Any number of processes and chunk size makes the same levels
+        self.assertEqual(cells(generate.generate(
+            make_level, 50, args=(4, 3), seed=7, processes=2, chunk_size=8)),
+            levels)
+        self.assertNotEqual(cells(generate.generate(
+            make_level, 50, args=(4, 3), seed=8, processes=1)), levels)
+
+    def test_remake_one(self):
+        index, first = self.levels(seed=3)[0]
+        self.assertEqual(make_level(generate.rng(3, index), 4, 3).cells,
+                         first)
+
+    def test_keep(self):
+        kept = self.levels(keep=lambda level: level.cells.count(b'b') > 6)
+        self.assertTrue(kept)
+        self.assertEqual(kept, [(index, blocks) for index, blocks
+                                in self.levels() if blocks.count(b'b') > 6])
+
+    def test_endless(self):
+        levels = cells(itertools.islice(
+            generate.generate(make_level, args=(4, 3), processes=1,
+                              chunk_size=10), 30))
+        self.assertEqual(len(levels), 30)
+        self.assertEqual(levels, cells(generate.generate(
+            make_level, levels[-1][0] + 1, args=(4, 3), processes=1)))
+
+    def levels(self, seed=0, keep=None):
+        return cells(generate.generate(make_level, 40, args=(4, 3),
+                                       seed=seed, keep=keep, processes=1))
+
+if __name__ == '__main__':
+    unittest.main()
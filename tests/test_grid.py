@@ -0,0 +1,60 @@
+import copy
+import pickle
+import unittest
+
+from subjunctive.grid import Grid, down, left, right, up
+
+class LocationTest(unittest.TestCase):
+    def test_pickle(self):
+        grid = Grid(4, 3)
+        location = grid.Location(3, 2)
+        grid_copy, location_copy = pickle.loads(
+            pickle.dumps((grid, location)))
+        self.assertEqual((grid_copy.width, grid_copy.height), (4, 3))
+        self.assertIs(location_copy, grid_copy.Location(3, 2))
+
+    def test_copy(self):
+        location = Grid(4, 3).Location(1, 2)
+        self.assertIs(copy.copy(location), location)
+        self.assertIs(copy.deepcopy(location), location)
+
+class QueryTest(unittest.TestCase):
+    def setUp(self):
+        self.grid = Grid(5, 4)
+
+    def cells(self, locations):
+        return [(location.x, location.y) for location in locations]
+
+    def test_rect(self):
+        self.assertEqual(self.cells(self.grid.rect(1, 2, 2, 2)),
+                         [(1, 2), (2, 2), (1, 3), (2, 3)])
+        # Clipped to the grid
+        self.assertEqual(self.cells(self.grid.rect(-1, -1, 2, 3)),
+                         [(0, 0), (0, 1)])
+        self.assertEqual(self.grid.rect(5, 0, 2, 2), [])
+        self.assertEqual(len(self.grid.rect(0, 0, 9, 9)), 20)
+
+    def test_near(self):
+        center = self.grid.Location(1, 1)
+        self.assertEqual(self.cells(self.grid.near(center)),
+                         [(1, 0), (0, 1), (2, 1), (1, 2)])
+        self.assertEqual(self.cells(self.grid.near(center, 2)),
+                         [(0, 0), (1, 0), (2, 0), (0, 1), (2, 1), (3, 1),
+                          (0, 2), (1, 2), (2, 2), (1, 3)])
+        self.assertEqual(
+            self.cells(self.grid.near(self.grid.Location(0, 0),
+                                      metric='chebyshev')),
+            [(1, 0), (0, 1), (1, 1)])
+        self.assertRaises(ValueError, self.grid.near, center,
+                          metric='euclidean')
+
+    def test_ray(self):
+        start = self.grid.Location(1, 2)
+        self.assertEqual(self.cells(self.grid.ray(start, right)),
+                         [(2, 2), (3, 2), (4, 2)])
+        self.assertEqual(self.cells(self.grid.ray(start, up, 1)), [(1, 1)])
+        self.assertEqual(self.cells(self.grid.ray(start, down, 5)), [(1, 3)])
+        self.assertEqual(self.grid.ray(self.grid.Location(0, 0), left), [])
+
+if __name__ == '__main__':
+    unittest.main()
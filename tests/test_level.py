@@ -0,0 +1,36 @@
+import os
+import tempfile
+import unittest
+
+from subjunctive import level
+from subjunctive.entity import Entity
+from subjunctive.world import World
+
+class Block(Entity):
+    pass
+
+class Player(Entity):
+    pass
+
+DEFINITIONS = {'-': None, 'b': Block, 'o': Player}
+
+class PackTest(unittest.TestCase):
+    def test_load_first_level_of_pack(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'pack.sjl')
+            with open(path, 'wb') as f:
+                level.write(f, 3, 2, b'o-b' b'---')
+                level.write(f, 4, 4, b'bbbb' b'bbbb' b'bbbb' b'bbbo')
+            world, player = World.load(path, DEFINITIONS, Player)
+            self.assertEqual((world.grid.width, world.grid.height), (3, 2))
+            self.assertEqual(world.count(Block), 1)
+            self.assertEqual(world.count(Player), 1)
+            self.assertEqual(world.locate(player), world.grid.Location(0, 0))
+
+            with open(path, 'rb') as f:
+                levels = list(level.read_all(f))
+            self.assertEqual([sorted(l.find(b'o')) for l in levels],
+                             [[0], [15]])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+
+from subjunctive.loop import Clock
+from subjunctive.scheduler import Scheduler
+
+class StallTest(unittest.TestCase):
+    def test_stall_runs_at_most_max_steps_of_timers(self):
+        clock = Clock(50, max_steps=5)
+        clock.start(0)
+        scheduler = Scheduler()
+        calls = []
+        scheduler.call(lambda: calls.append(clock.tick), every='20ms')
+
+        def run(time):
+            for _ in clock.ticks(time):
+                scheduler.update(clock.game_time)
+
+        run(100)
+        self.assertEqual(len(calls), 5)
+        # A 5 second stall: 250 ticks are due, 245 of them are dropped, and
+        # the timer only goes off in the 5 that are run
+        run(5100)
+        self.assertEqual(clock.stats.dropped_ticks, 245)
+        self.assertEqual(len(calls), 10)
+        self.assertEqual(calls[5:], [6, 7, 8, 9, 10])
+        # Afterwards, the game carries on at the usual rate
+        run(5200)
+        self.assertEqual(len(calls), 15)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from subjunctive import profile
+from subjunctive.entity import Entity
+from subjunctive.grid import Grid, right
+from subjunctive.world import World
+
+class ProfileTest(unittest.TestCase):
+    def setUp(self):
+        self.time = [1000]
+        patcher = mock.patch.object(profile, 'now', lambda: self.time[0])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(profile.stop)
+
+    def frame(self, **phases):
+        for name, duration in phases.items():
+            with profile.phase(name):
+                self.time[0] += duration
+        profile.end_frame()
+
+    def test_phases(self):
+        current = profile.start()
+        self.frame(input=1, draw=4)
+        self.frame(input=2, logic=3)
+        self.assertIs(profile.stop(), current)
+        self.assertEqual(current.frames, 2)
+        self.assertEqual(current.phases, {'input': 3, 'draw': 4, 'logic': 3})
+        self.assertEqual(current.last_frame, {'input': 2, 'logic': 3})
+        self.assertIn("2 frames", str(current))
+        # Nothing is recorded once the profile has stopped
+        self.frame(input=5)
+        self.assertEqual(current.phases['input'], 3)
+
+    def test_counts(self):
+        move, locate = Entity.move, World.locate
+        world = World(Grid(3, 1))
+        entity = Entity(world)
+        world.place(entity, world.grid.Location(0, 0))
+        current = profile.start()
+        profile.count('spawns', 3)
+        entity.move(right)
+        world.locate(entity)
+        profile.stop()
+        self.assertEqual(current.counts['spawns'], 3)
+        # move() locates the entity itself
+        self.assertEqual(current.counts['moves'], 1)
+        self.assertEqual(current.counts['locates'], 2)
+        self.assertIs(Entity.move, move)
+        self.assertIs(World.locate, locate)
+
+    def test_trace(self):
+        self.assertRaises(ValueError, profile.start().write_trace, 'unused')
+        current = profile.start(trace=True)
+        self.frame(scheduler=2)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.json')
+            current.write_trace(path)
+            with open(path) as f:
+                events = json.load(f)['traceEvents']
+        self.assertEqual(events[0], {'name': 'scheduler', 'ph': 'X',
+                                     'pid': 1, 'tid': 1, 'ts': 0,
+                                     'dur': 2000})
+        self.assertEqual(events[1]['ph'], 'C')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import io
+import os
+import random
+import unittest
+from unittest import mock
+
+# The live game needs a window, even on a machine without a display
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import sdl2
+
+from subjunctive import loop, record
+from subjunctive.game import Game
+from subjunctive.grid import Grid
+from subjunctive.loop import SubjunctiveExit, exit
+from subjunctive.scheduler import Scheduler
+from subjunctive.world import World
+
+KEYS = [sdl2.SDLK_LEFT, sdl2.SDLK_UP, sdl2.SDLK_RIGHT, sdl2.SDLK_DOWN]
+
+class ReplayTest(unittest.TestCase):
+    def make_world(self):
+        """Return a world full of timers, its handlers and the calls made"""
+        world = World(Grid(4, 4), scheduler=Scheduler())
+        ticks, calls = [0], []
+        rng = random.Random(0)
+
+        def timer(number):
+            def call():
+                calls.append((number, ticks[0]))
+                if len(calls) < 500:
+                    world.scheduler.call(
+                        timer(number),
+                        after='{}ms'.format(rng.randrange(1, 200)))
+            return call
+
+        def count_tick():
+            ticks[0] += 1
+
+        def move(direction):
+            calls.append((direction.name, ticks[0]))
+
+        for number in range(100):
+            world.scheduler.call(timer(number),
+                                 after='{}ms'.format(rng.randrange(1, 500)))
+        world.scheduler.call(timer('every'), every='17ms')
+        world.scheduler.call(exit, after='3s')
+        handlers = {'on_tick': count_tick, 'on_direction': move}
+        return world, handlers, calls
+
+    def play_live(self, start, recorder):
+        """Run a game at 60 ticks/s from loop time start; return its calls"""
+        world, handlers, calls = self.make_world()
+        rng = random.Random(start)
+        now = [start]
+        with mock.patch.object(loop, 'now', lambda: now[0]):
+            game = Game(world, tick_rate=60, record=recorder, **handlers)
+            try:
+                while True:
+                    game.step()
+                    # Fewer than max_steps ticks at a time, so none are
+                    # dropped
+                    now[0] += rng.uniform(0, 50)
+                    if rng.random() < 0.2:
+                        game.key(rng.choice(KEYS))
+            except SubjunctiveExit:
+                pass
+        recorder.end(calls[-1][1] + 1)
+        return calls
+
+    def test_live_game_replays_headless(self):
+        # 1/60 s is not a whole number of milliseconds, so the timers only
+        # go off on the same ticks if both count game time the same way,
+        # wherever the loop's clock started
+        for start in [0, 1e9 / 7, 123456789.123, 2**30 + 0.1]:
+            f = io.BytesIO()
+            live = self.play_live(start, record.Recorder(f, tick_rate=60))
+            world, handlers, replayed = self.make_world()
+            record.Player(record.loads(f.getvalue()), world,
+                          **handlers).play()
+            self.assertGreater(len(live), 500)
+            self.assertEqual(replayed, live)
+
+if __name__ == '__main__':
+    unittest.main()
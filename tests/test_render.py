@@ -0,0 +1,50 @@
+import os
+import unittest
+
+# The renderer needs a window, even on a machine without a display
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import sdl2
+import sdl2.ext
+
+from subjunctive import render
+
+class Picture:
+    """A blank image, standing in for a resource.Image"""
+    def __init__(self, width, height):
+        self.w, self.h = width, height
+        self._as_parameter_ = sdl2.SDL_CreateRGBSurfaceWithFormat(
+            0, width, height, 32, sdl2.SDL_PIXELFORMAT_ARGB8888)
+
+class PackTest(unittest.TestCase):
+    def test_oversized_image_gets_own_atlas(self):
+        big = Picture(render.ATLAS_SIZE + 1, 4)
+        small = [Picture(16, 16) for _ in range(3)]
+        atlases = render._pack([big] + small)
+        self.assertEqual(len(atlases), 2)
+        for rects, width, height in atlases:
+            self.assertLessEqual(max(width, height), render.ATLAS_SIZE + 1)
+            if big in rects:
+                self.assertEqual((list(rects), width, height),
+                                 ([big], render.ATLAS_SIZE + 1, 4))
+            else:
+                self.assertLessEqual(width, render.ATLAS_SIZE)
+                self.assertEqual(set(rects), set(small))
+
+class RendererTest(unittest.TestCase):
+    def setUp(self):
+        sdl2.ext.init()
+        self.window = sdl2.ext.Window("test", (32, 32))
+        self.renderer = render.Renderer(self.window, accelerated=False)
+        self.addCleanup(self.window.close)
+        self.addCleanup(self.renderer.destroy)
+
+    def test_image_too_big_for_any_texture(self):
+        self.renderer.max_texture_size = (64, 64)
+        with self.assertRaises(ValueError):
+            self.renderer.register([Picture(65, 8)])
+        self.renderer.register([Picture(64, 8)])
+        self.assertEqual(len(self.renderer._atlases), 1)
+
+if __name__ == '__main__':
+    unittest.main()
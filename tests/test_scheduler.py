@@ -0,0 +1,128 @@
+import os
+import unittest
+from unittest import mock
+
+# The games need a window, even on a machine without a display
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+from subjunctive import loop, scheduler
+from subjunctive.game import Game
+from subjunctive.grid import Grid
+from subjunctive.world import World
+
+class SharedSchedulerTest(unittest.TestCase):
+    def test_pending_calls_carry_over_between_games(self):
+        # Two games in a row on the scheduler worlds share, with a long
+        # wait in between (a title screen, say)
+        ticks = []
+        call = scheduler.call(lambda: ticks.append(len(ticks)), every='100ms')
+        self.addCleanup(call.cancel)
+        now = [1e6]
+
+        def play(duration):
+            game = Game(World(Grid(2, 2)))
+            end = now[0] + duration
+            while now[0] < end:
+                game.step()
+                now[0] += 10
+
+        with mock.patch.object(loop, 'now', lambda: now[0]):
+            play(1050)
+            self.assertEqual(len(ticks), 11)
+            now[0] += 5000
+            # The call goes off at 20ms, 120ms... 1020ms of game time; the
+            # first game's last tick was at 1040ms, so the call goes off 80ms
+            # into the second rather than 1120ms into it
+            play(100)
+            self.assertEqual(len(ticks), 12)
+            play(1000)
+            self.assertEqual(len(ticks), 21)
+
+    def test_update_without_time_continues_game_time(self):
+        clock = [5000]
+        shared = scheduler.Scheduler(clock=lambda: clock[0])
+        calls = []
+        shared.call(lambda: calls.append(shared.time), every='100ms')
+        shared.update(250)
+        self.assertEqual(calls, [250])
+        # The clock's own time doesn't matter, only how far it moves
+        shared.update()
+        clock[0] += 100
+        shared.update()
+        self.assertEqual(calls, [250, 350])
+
+class CallTest(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = scheduler.Scheduler()
+        self.calls = []
+
+    def make(self, name, **timing):
+        return self.scheduler.call(lambda: self.calls.append(name), **timing)
+
+    def test_cancel(self):
+        once = self.make('once', after='100ms')
+        every = self.make('every', every='50ms')
+        self.scheduler.update(0)
+        self.assertEqual(self.calls, ['every'])
+        once.cancel()
+        self.scheduler.update(100)
+        self.assertEqual(self.calls, ['every', 'every', 'every'])
+        every.cancel()
+        self.scheduler.update(1000)
+        self.assertEqual(len(self.calls), 3)
+        self.assertIsNone(self.scheduler.next_deadline())
+
+    def test_cancel_before_first_update(self):
+        self.make('cancelled', after='10ms').cancel()
+        self.scheduler.update(0)
+        self.scheduler.update(100)
+        self.assertEqual(self.calls, [])
+
+    def test_reschedule(self):
+        call = self.make('call', after='100ms')
+        self.scheduler.update(0)
+        self.scheduler.update(50)
+        # Delays count from the next update
+        call.reschedule(after='100ms')
+        self.scheduler.update(60)
+        self.scheduler.update(100)
+        self.assertEqual(self.calls, [])
+        self.scheduler.update(160)
+        self.assertEqual(self.calls, ['call'])
+        call.reschedule(every='20ms')
+        self.scheduler.update(200)
+        self.scheduler.update(240)
+        self.assertEqual(self.calls, ['call'] * 4)
+
+    def test_reschedule_from_own_call(self):
+        def call_again():
+            self.calls.append(self.scheduler.time)
+            call.reschedule(after='30ms')
+        call = self.scheduler.call(call_again, every='10ms')
+        self.scheduler.update(0)
+        self.assertEqual(self.scheduler.next_deadline(), -float('inf'))
+        # The repeat is replaced by the rescheduled call
+        self.scheduler.update(10)
+        self.scheduler.update(39)
+        self.scheduler.update(40)
+        self.assertEqual(self.calls, [0, 40])
+
+    def test_next_deadline(self):
+        changes = []
+        self.scheduler.on_change = lambda: changes.append(len(changes))
+        self.assertIsNone(self.scheduler.next_deadline())
+        soon = self.make('soon', after='30ms')
+        later = self.make('later', after='1s')
+        self.assertEqual(changes, [0, 1])
+        self.scheduler.update(100)
+        self.assertEqual(self.scheduler.next_deadline(), 130)
+        soon.cancel()
+        self.assertEqual(self.scheduler.next_deadline(), 1100)
+        # Rescheduling wakes a loop waiting for the old deadline
+        later.reschedule(after='10ms')
+        self.assertEqual(changes, [0, 1, 2])
+        self.scheduler.update(100)
+        self.assertEqual(self.scheduler.next_deadline(), 110)
+
+if __name__ == '__main__':
+    unittest.main()
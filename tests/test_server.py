@@ -0,0 +1,55 @@
+import asyncio
+import time
+import unittest
+
+from subjunctive import scheduler, server
+from subjunctive.grid import Grid
+from subjunctive.world import World
+
+def slow_session():
+    """Return a session whose every tick takes 50ms"""
+    return server.Session(World(Grid(2, 2), scheduler=scheduler.Scheduler()),
+                          on_tick=lambda: time.sleep(0.05))
+
+class SessionTest(unittest.TestCase):
+    def test_pending_calls_move_to_session(self):
+        calls = []
+        world = World(Grid(2, 2))
+        call = scheduler.call(lambda: calls.append(world), after='40ms')
+        self.addCleanup(call.cancel)
+        session = server.Session(world)
+        self.assertIsNot(world.scheduler, scheduler._default_scheduler)
+        self.assertIsNone(scheduler.next_deadline())
+        session.step()
+        session.step()
+        self.assertEqual(calls, [])
+        session.step()
+        self.assertEqual(calls, [world])
+
+class ServeTest(unittest.TestCase):
+    def test_pool_ticks_without_blocking_loop(self):
+        wakes = []
+
+        async def other_task():
+            while True:
+                wakes.append(time.perf_counter())
+                await asyncio.sleep(0.005)
+
+        async def main(pool):
+            pool.start()
+            other = asyncio.create_task(other_task())
+            try:
+                await asyncio.wait_for(server.serve(pool), 0.5)
+            except asyncio.TimeoutError:
+                pass
+            other.cancel()
+
+        with server.Pool(slow_session, processes=1) as pool:
+            asyncio.run(main(pool))
+        gaps = [b - a for a, b in zip(wakes, wakes[1:])]
+        # Ticks take 50ms each, but the other task kept running meanwhile
+        self.assertGreater(len(wakes), 30)
+        self.assertLess(max(gaps), 0.04)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+
+from subjunctive import solver
+from subjunctive.entity import Entity
+from subjunctive.grid import Grid
+from subjunctive.world import World
+
+class Doubling(solver.Puzzle):
+    """Get from 1 to target by adding 1 or doubling
+
+    The fewest moves are one per binary digit after the first, and one
+    per 1 after the first.
+    """
+    def __init__(self, target):
+        self.target = target
+
+    def start(self):
+        return 1
+
+    def moves(self, state):
+        return [(move, new_state)
+                for move, new_state in [('+1', state + 1), ('*2', state * 2)]
+                if new_state <= self.target]
+
+    def solved(self, state):
+        return state == self.target
+
+    def estimate(self, state):
+        return 0 if state == self.target else 1
+
+class Maze(solver.WorldPuzzle):
+    """Walk from the top left to the cell marked g, around the walls"""
+    LEVEL = ['o#g.',
+             '.##.',
+             '....']
+
+    def __init__(self):
+        world = World(Grid(len(self.LEVEL[0]), len(self.LEVEL)))
+        for y, row in enumerate(self.LEVEL):
+            for x, cell in enumerate(row):
+                if cell == '#':
+                    world.place(Entity(world), world.grid.Location(x, y))
+                elif cell == 'o':
+                    player = Entity(world)
+                    world.place(player, world.grid.Location(x, y))
+                elif cell == 'g':
+                    self.goal = world.grid.Location(x, y)
+        super().__init__(world, player)
+
+    def encode(self):
+        location = self.world.locate(self.player)
+        return location.x, location.y
+
+    def decode(self, state):
+        self.world.remove(self.player)
+        self.world.place(self.player, self.world.grid.Location(*state))
+
+    def solved(self, state):
+        return state == (self.goal.x, self.goal.y)
+
+    def estimate(self, state):
+        return abs(state[0] - self.goal.x) + abs(state[1] - self.goal.y)
+
+def follow(puzzle, path):
+    state = puzzle.start()
+    for move in path:
+        state = dict(puzzle.moves(state))[move]
+    return state
+
+class SearchTest(unittest.TestCase):
+    def check(self, search, puzzle, length):
+        result = search(puzzle)
+        self.assertEqual(len(result.path), length)
+        self.assertTrue(puzzle.solved(follow(puzzle, result.path)))
+
+    def test_bfs(self):
+        self.check(solver.bfs, Doubling(10), 4)
+        self.check(solver.bfs, Doubling(37), 7)
+        self.check(solver.bfs, Maze(), 8)
+
+    def test_ida_star(self):
+        self.check(solver.ida_star, Doubling(10), 4)
+        self.check(solver.ida_star, Doubling(37), 7)
+        self.check(solver.ida_star, Maze(), 8)
+
+    def test_parallel_bfs(self):
+        result = solver.parallel_bfs(Maze, processes=2)
+        # The moves come back from the workers as copies
+        self.assertEqual([move.name for move in result.path],
+                         ['down', 'down', 'right', 'right', 'right', 'up',
+                          'up', 'left'])
+
+    def test_solve_all(self):
+        results = solver.solve_all(Doubling, [(10,), (37,)], search=solver.bfs,
+                                   processes=2)
+        self.assertEqual([(args, len(result.path)) for args, result in results],
+                         [((10,), 4), ((37,), 7)])
+
+    def test_solved_at_start(self):
+        for search in [solver.bfs, solver.ida_star]:
+            self.assertEqual(search(Doubling(1)).path, [])
+
+    def test_no_solution(self):
+        puzzle = Maze()
+        puzzle.goal = puzzle.world.grid.Location(1, 0)
+        for search in [solver.bfs, solver.ida_star]:
+            result = search(puzzle)
+            self.assertIsNone(result.path)
+            self.assertTrue(result.exhausted)
+
+    def test_incomplete_puzzle(self):
+        class NoEncode(solver.WorldPuzzle):
+            def solved(self, state):
+                return True
+        with self.assertRaises(TypeError):
+            NoEncode(World(Grid(2, 2)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,325 @@
+import os
+import unittest
+
+# Drawing needs SDL's video, even on a machine without a display
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import sdl2
+
+from subjunctive import profile
+from subjunctive.entity import Entity
+from subjunctive.grid import Grid, down, left, right, up
+from subjunctive.scheduler import Scheduler
+from subjunctive.world import World
+
+class Picture:
+    """A blank image, standing in for a resource.Image"""
+    def __init__(self, width, height):
+        self.w, self.h = width, height
+        self._as_parameter_ = sdl2.SDL_CreateRGBSurfaceWithFormat(
+            0, width, height, 32, sdl2.SDL_PIXELFORMAT_ARGB8888)
+
+class Sprite(Entity):
+    image = Picture(16, 16)
+
+class LocateTest(unittest.TestCase):
+    def setUp(self):
+        self.world = World(Grid(4, 3))
+        self.Location = self.world.grid.Location
+
+    def test_follows_changes(self):
+        world, Location = self.world, self.Location
+        first, second = Entity(world), Entity(world)
+        world.place(first, Location(0, 0))
+        world.place(second, Location(3, 2))
+        self.assertEqual(world.locate(first), Location(0, 0))
+        world.swap(first, second)
+        self.assertEqual(world.locate(first), Location(3, 2))
+        self.assertEqual(world.locate(second), Location(0, 0))
+        third = Entity(world)
+        world.replace(second, third)
+        self.assertEqual(world.locate(third), Location(0, 0))
+        self.assertRaises(ValueError, world.locate, second)
+        self.assertEqual(world.remove(first), Location(3, 2))
+        self.assertRaises(ValueError, world.locate, first)
+
+    def test_moved(self):
+        entity = Entity(self.world)
+        self.world.place(entity, self.Location(1, 1))
+        self.assertTrue(entity.move(right))
+        self.assertEqual(self.world.locate(entity), self.Location(2, 1))
+
+    def test_place_twice(self):
+        entity = Entity(self.world)
+        self.world.place(entity, self.Location(1, 1))
+        self.assertRaises(ValueError, self.world.place, entity,
+                          self.Location(2, 1))
+        self.assertEqual(self.world.locate(entity), self.Location(1, 1))
+
+class StorageTest(unittest.TestCase):
+    def test_cells(self):
+        world = World(Grid(4, 3))
+        Location = world.grid.Location
+        entity = Entity(world)
+        world.place(entity, Location(2, 1))
+        self.assertIs(world.at(Location(2, 1)), entity)
+        self.assertIsNone(world.at(Location(1, 2)))
+        self.assertRaises(ValueError, world.place, Entity(world),
+                          Location(2, 1))
+        self.assertEqual(list(world.entities), [entity])
+        world.remove(entity)
+        self.assertIsNone(world.at(Location(2, 1)))
+        self.assertEqual(list(world.entities), [])
+
+    def test_clear(self):
+        world = World(Grid(4, 3))
+        for location in world.grid:
+            world.place(Entity(world), location)
+        self.assertEqual(len(list(world.entities)), 12)
+        world.clear()
+        self.assertEqual(list(world.entities), [])
+        self.assertTrue(all(world.at(location) is None
+                            for location in world.grid))
+
+class Hazard(Entity):
+    pass
+
+class Fire(Hazard):
+    pass
+
+class Coin(Entity):
+    pass
+
+class CountTest(unittest.TestCase):
+    def test_by_type(self):
+        world = World(Grid(4, 3))
+        Location = world.grid.Location
+        hazard, fire, coin = Hazard(world), Fire(world), Coin(world)
+        world.place(fire, Location(0, 0))
+        world.place(coin, Location(1, 0))
+        world.place(hazard, Location(2, 0))
+        self.assertEqual(world.count(Fire), 1)
+        # Subclasses count, in the order they were placed
+        self.assertEqual(world.count(Hazard), 2)
+        self.assertEqual(world.entities_of(Hazard), [fire, hazard])
+        self.assertEqual(world.count(Entity), 3)
+        self.assertCountEqual(world.entities_of((Coin, Fire)), [fire, coin])
+        self.assertEqual(world.count((Fire, Hazard)), 2)
+
+        world.remove(fire)
+        self.assertEqual(world.count(Fire), 0)
+        self.assertEqual(world.entities_of(Hazard), [hazard])
+        world.replace(coin, Fire(world))
+        self.assertEqual(world.count(Coin), 0)
+        self.assertEqual(world.count(Hazard), 2)
+        world.swap(hazard, world.entities_of(Fire)[0])
+        self.assertEqual(world.count(Hazard), 2)
+
+class SpawnRandomTest(unittest.TestCase):
+    def setUp(self):
+        self.world = World(Grid(6, 5))
+        self.world.random.seed(1)
+
+    def test_avoid(self):
+        world = self.world
+        player = Entity(world)
+        world.place(player, world.grid.Location(2, 3))
+        # Every cell outside the player's row and column, and no more
+        coins = world.spawn_random(Coin, 100, avoid=player)
+        self.assertEqual(len(coins), 5 * 4)
+        for coin in coins:
+            location = world.locate(coin)
+            self.assertNotEqual(location.x, 2)
+            self.assertNotEqual(location.y, 3)
+        self.assertEqual(world.spawn_random(Coin, avoid=player), [])
+
+    def test_avoid_location(self):
+        world = self.world
+        for coin in world.spawn_random(Coin, 10,
+                                       avoid=world.grid.Location(0, 0)):
+            location = world.locate(coin)
+            self.assertTrue(location.x and location.y)
+
+    def test_no_edges(self):
+        world = self.world
+        coins = world.spawn_random(Coin, 100, edges=False)
+        self.assertEqual(len(coins), 4 * 3)
+        for coin in coins:
+            location = world.locate(coin)
+            self.assertIn(location.x, range(1, 5))
+            self.assertIn(location.y, range(1, 4))
+
+    def test_freed_cells(self):
+        world = self.world
+        world.place(Entity(world), world.grid.Location(1, 1))
+        self.assertEqual(len(world.spawn_random(Coin, 100)), 29)
+        # Cells freed after the board filled, one of them filled again
+        freed = [world.remove(coin) for coin in world.entities_of(Coin)[:5]]
+        world.place(Entity(world), freed[0])
+        coins = world.spawn_random(Coin, 100)
+        self.assertCountEqual([world.locate(coin) for coin in coins],
+                              freed[1:])
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.world = World(Grid(4, 3))
+        # Stop watching entity attributes afterwards
+        self.addCleanup(self.world.clear)
+        self.Location = self.world.grid.Location
+        self.first, self.second = Entity(self.world), Entity(self.world)
+        self.world.place(self.first, self.Location(0, 0))
+        self.world.place(self.second, self.Location(3, 2))
+
+    def cells(self):
+        return {location: entity for location, entity in
+                ((location, self.world.at(location))
+                 for location in self.world.grid) if entity is not None}
+
+    def test_restore(self):
+        world, Location = self.world, self.Location
+        before = self.cells()
+        snapshot = world.snapshot()
+        self.first.move(right)
+        self.first.name = 'moved'
+        world.remove(self.second)
+        world.place(Coin(world), Location(2, 2))
+        world.tile_size = (8, 8)
+        world.restore(snapshot)
+        self.assertEqual(self.cells(), before)
+        self.assertEqual(self.first.name, 'Entity')
+        self.assertEqual(world.count(Coin), 0)
+        self.assertNotIn('tile_size', vars(world))
+        # Restoring again undoes the changes since
+        world.swap(self.first, self.second)
+        world.restore(snapshot)
+        self.assertEqual(self.cells(), before)
+
+    def test_nested(self):
+        world = self.world
+        outer = world.snapshot()
+        self.first.move(right)
+        inner = world.snapshot()
+        self.first.move(right)
+        world.restore(outer)
+        self.assertEqual(world.locate(self.first), self.Location(0, 0))
+        self.assertRaises(ValueError, world.restore, inner)
+
+    def test_undo(self):
+        world = self.world
+        world.snapshot()
+        self.first.move(right)
+        world.snapshot()
+        self.first.move(right)
+        self.assertTrue(world.undo())
+        self.assertEqual(world.locate(self.first), self.Location(1, 0))
+        self.assertTrue(world.undo())
+        self.assertEqual(world.locate(self.first), self.Location(0, 0))
+        self.assertFalse(world.undo())
+        self.assertRaises(ValueError, world.restore)
+        # Nothing is recorded without a snapshot
+        self.first.move(right)
+        self.assertIsNone(world._journal)
+
+    def test_scheduler(self):
+        scheduler = Scheduler(clock=lambda: 0)
+        calls = []
+        pending = scheduler.call(lambda: calls.append('pending'),
+                                 after='10ms')
+        snapshot = self.world.snapshot(scheduler=scheduler)
+        pending.cancel()
+        scheduler.call(lambda: calls.append('new'), after='10ms')
+        scheduler.update(50)
+        self.assertEqual(calls, [])
+        self.world.restore(snapshot)
+        self.assertEqual(scheduler.time, 0)
+        scheduler.update(0)
+        scheduler.update(10)
+        self.assertEqual(calls, ['pending'])
+
+    def test_random_state(self):
+        world = self.world
+        snapshot = world.snapshot(random_state=True)
+        spawned = [world.locate(coin) for coin in world.spawn_random(Coin, 5)]
+        world.restore(snapshot)
+        self.assertEqual(world.count(Coin), 0)
+        self.assertEqual(
+            [world.locate(coin) for coin in world.spawn_random(Coin, 5)],
+            spawned)
+
+class QueryTest(unittest.TestCase):
+    def setUp(self):
+        self.world = World(Grid(6, 5))
+        self.Location = self.world.grid.Location
+
+    def fill(self, *cells):
+        for x, y in cells:
+            self.world.place(Coin(self.world), self.Location(x, y))
+
+    def cells(self, found):
+        for location, entity in found:
+            self.assertIs(self.world.at(location), entity)
+        return [(location.x, location.y) for location, _ in found]
+
+    def test_in_rect(self):
+        self.fill((4, 0), (1, 1), (2, 1), (0, 3), (2, 3))
+        self.assertEqual(self.cells(self.world.in_rect(1, 0, 4, 4)),
+                         [(4, 0), (1, 1), (2, 1), (2, 3)])
+        # Few entities in many cells, found without scanning the cells
+        world = World(Grid(100, 100))
+        coin = Coin(world)
+        world.place(coin, world.grid.Location(50, 60))
+        self.assertEqual(world.in_rect(0, 50, 100, 50),
+                         [(world.grid.Location(50, 60), coin)])
+        self.assertEqual(world.in_rect(0, 0, 100, 50), [])
+
+    def test_near(self):
+        self.fill((2, 1), (1, 2), (2, 2), (4, 2), (3, 3))
+        center = self.Location(2, 2)
+        self.assertEqual(self.cells(self.world.near(center)),
+                         [(2, 1), (1, 2)])
+        self.assertEqual(self.cells(self.world.near(center, 2)),
+                         [(2, 1), (1, 2), (4, 2), (3, 3)])
+        self.assertEqual(self.cells(self.world.near(center,
+                                                    metric='chebyshev')),
+                         [(2, 1), (1, 2), (3, 3)])
+
+    def test_cast(self):
+        self.fill((4, 2), (2, 0))
+        start = self.Location(2, 2)
+        self.assertEqual(self.cells([self.world.cast(start, right)]),
+                         [(4, 2)])
+        self.assertEqual(self.cells([self.world.cast(start, up)]), [(2, 0)])
+        self.assertIsNone(self.world.cast(start, right, 1))
+        self.assertIsNone(self.world.cast(start, left))
+        self.assertIsNone(self.world.cast(start, down))
+        self.assertIsNone(self.world.cast(self.Location(2, 0), up))
+
+class DrawTest(unittest.TestCase):
+    def blits(self, world, rect):
+        surface = sdl2.SDL_CreateRGBSurface(0, 128, 128, 32, 0, 0, 0, 0)
+        self.addCleanup(sdl2.SDL_FreeSurface, surface)
+        profile.start()
+        try:
+            world._redraw(surface.contents, rect)
+        finally:
+            counts = profile.stop().counts
+        return counts['blits']
+
+    def test_redraw_blits_what_overlaps_rect(self):
+        world = World(Grid(8, 8))
+        world.overlays = [((0, 0), Picture(32, 16)),
+                          ((96, 96), Picture(32, 32))]
+        for x in range(3):
+            world.place(Sprite(world), world.grid.Location(x, 0))
+        # Everything: three sprites and two overlays, and no background
+        self.assertEqual(self.blits(world, None), 5)
+        # The second sprite's cell, under the first overlay
+        self.assertEqual(self.blits(world, sdl2.SDL_Rect(16, 0, 16, 16)), 2)
+        # The corner under the second overlay, with no sprite
+        self.assertEqual(self.blits(world, sdl2.SDL_Rect(112, 112, 16, 16)),
+                         1)
+        world.background = Picture(128, 128)
+        self.assertEqual(self.blits(world, sdl2.SDL_Rect(64, 64, 16, 16)), 1)
+
+if __name__ == '__main__':
+    unittest.main()